@@ -0,0 +1,101 @@
+"""Micro-benchmark do histórico dos estudantes: registro incremental e consultas.
+
+Uso:
+    python -m benchmarks.bench_historico [--alunos 100000] [--atividades 20] [--alterados 0.05] [--json saida.json]
+
+Gera um relatório estruturado sintético (menção e tentativas de cada
+atividade) e registra três execuções numa base nova: a primeira (tudo é
+novo), uma com a fração ``--alterados`` dos alunos com uma avaliativa que
+passou a ``--`` e uma idêntica à anterior. Mede também as consultas de
+novas pendências (geral e de um polo) e o histórico de um aluno, e confere
+que as novas pendências são exatamente os alunos alterados.
+"""
+import argparse
+import json
+import os
+import platform
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+
+from pedagogico.historico import HistoricoAlunos, retrato_relatorio
+
+MENCOES = ["--", "I", "R", "B", "MB"]
+
+
+def gerar_relatorio(alunos, atividades, semente=0):
+    rng = np.random.default_rng(semente)
+    numero = np.arange(alunos)
+    polos = np.char.add("Polo ", (numero % 50).astype(str))
+    nomes = np.char.add("Aluno ", numero.astype(str))
+    dados = {
+        "Aluno_ID": np.char.add(np.char.add(polos, " - "), nomes),
+        "DR": np.char.add("DR ", (numero % 5).astype(str)),
+        "Polo": polos,
+        "Nome": nomes,
+    }
+    for i in range(atividades):
+        nome = f"avaliativa {i % 4 + 1} - area {i}"
+        # Só entre I e MB: nenhum aluno começa pendente na primeira atividade alterada
+        dados[nome] = pd.Categorical.from_codes(rng.integers(-1 if i else 1, len(MENCOES), alunos), MENCOES)
+        dados[f"{nome}_Tentativas"] = rng.integers(0, 4, alunos)
+    return pd.DataFrame(dados)
+
+
+def medir(funcao):
+    inicio = time.perf_counter()
+    resultado = funcao()
+    return resultado, time.perf_counter() - inicio
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--alunos", type=int, default=100_000)
+    parser.add_argument("--atividades", type=int, default=20)
+    parser.add_argument("--alterados", type=float, default=0.05)
+    parser.add_argument("--json", help="grava o resultado neste arquivo")
+    args = parser.parse_args()
+
+    primeiro = gerar_relatorio(args.alunos, args.atividades)
+    segundo = primeiro.copy()
+    alterados = np.random.default_rng(1).random(args.alunos) < args.alterados
+    segundo.loc[alterados, "avaliativa 1 - area 0"] = "--"
+
+    with tempfile.TemporaryDirectory() as pasta:
+        caminho = os.path.join(pasta, "historico.sqlite")
+        historico = HistoricoAlunos(caminho)
+        resultado = {
+            "alunos": args.alunos,
+            "atividades": args.atividades,
+            "alterados": int(alterados.sum()),
+            "python": platform.python_version(),
+            "pandas": pd.__version__,
+            "numpy": np.__version__,
+        }
+        for nome, df, data in [("primeiro", primeiro, "2026-01-05"), ("alterado", segundo, "2026-01-12"),
+                               ("identico", segundo, "2026-01-19")]:
+            retrato, resultado[f"retrato_{nome}_s"] = medir(lambda: retrato_relatorio(df))
+            registro, resultado[f"registrar_{nome}_s"] = medir(lambda: historico.registrar([retrato], data=data))
+            resultado[f"mudancas_{nome}"] = registro["mudancas"]
+
+        novos, resultado["novos_pendentes_s"] = medir(lambda: historico.novos_pendentes(desde=1, ate=2))
+        _, resultado["novos_pendentes_polo_s"] = medir(
+            lambda: historico.novos_pendentes(desde=1, ate=2, polos=["Polo 3"])
+        )
+        _, resultado["historico_aluno_s"] = medir(lambda: historico.historico_aluno(primeiro["Aluno_ID"][3]))
+        resultado["novos_pendentes_corretos"] = (
+            set(novos["Aluno_ID"]) == set(primeiro["Aluno_ID"][alterados])
+        )
+        resultado["tamanho_mb"] = round(os.path.getsize(caminho) / 1e6, 1)
+
+    texto = json.dumps(resultado, indent=2)
+    print(texto)
+    if args.json:
+        with open(args.json, "w") as f:
+            f.write(texto)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,105 @@
+"""Micro-benchmark do núcleo de risco: interpretação de CH e classificação.
+
+Uso:
+    python -m benchmarks.bench_risco [--linhas 1000000] [--meses 12] [--repeticoes 3] [--json saida.json]
+
+Gera textos de CH sintéticos nos formatos aceitos ("28/84", "36 / 76",
+"28,5/80", número puro, vazios e lixo) e mede o caminho vetorizado contra a
+regra linha a linha (``parse_ch`` via ``apply``), conferindo que os resultados
+são idênticos. Mede também a projeção para ``--meses`` meses (grade e
+contagens por polo), conferida mês a mês contra ``calcular_risco``.
+"""
+import argparse
+import json
+import platform
+import time
+
+import numpy as np
+import pandas as pd
+
+from pedagogico.risco import calcular_risco, interpretar_ch, parse_ch, projetar_risco
+
+
+def gerar_ch(linhas, semente=0):
+    rng = np.random.default_rng(semente)
+    realizadas = rng.integers(0, 90, linhas).astype(str)
+    totais = rng.choice(["76", "80", "84", "0"], linhas)
+    formato = rng.integers(0, 10, linhas)
+    valores = np.where(formato < 6, np.char.add(np.char.add(realizadas, "/"), totais), realizadas)
+    valores = np.where(formato == 6, np.char.add(np.char.add(realizadas, " / "), totais), valores)
+    valores = np.where(formato == 7, np.char.add(np.char.add(realizadas, ",5/"), totais), valores)
+    serie = pd.Series(valores, dtype=object)
+    serie[formato == 8] = np.nan
+    serie[(formato == 9) & (rng.random(linhas) < 0.1)] = "sem registro"
+    return serie
+
+
+def medir(funcao, repeticoes):
+    tempos = []
+    for _ in range(repeticoes):
+        inicio = time.perf_counter()
+        funcao()
+        tempos.append(time.perf_counter() - inicio)
+    return min(tempos)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--linhas", type=int, default=1_000_000)
+    parser.add_argument("--meses", type=int, default=12)
+    parser.add_argument("--repeticoes", type=int, default=3)
+    parser.add_argument("--sem-referencia", action="store_true",
+                        help="não mede a regra linha a linha (mais lenta)")
+    parser.add_argument("--json", help="grava o resultado neste arquivo")
+    args = parser.parse_args()
+
+    serie = gerar_ch(args.linhas)
+    df = pd.DataFrame({"CH": serie})
+    cronograma = {f"mes_{i + 1}": horas for i, horas in enumerate(np.linspace(10, 80, args.meses).round())}
+    polos = pd.DataFrame({
+        "DR": np.random.default_rng(1).integers(0, 5, args.linhas),
+        "Polo": np.random.default_rng(2).integers(0, 60, args.linhas),
+        "CH": serie,
+    })
+
+    def projetar():
+        projecao = projetar_risco(polos, "CH", cronograma, 80)
+        return projecao, projecao.por_polo()
+
+    resultado = {
+        "linhas": args.linhas,
+        "meses": args.meses,
+        "python": platform.python_version(),
+        "pandas": pd.__version__,
+        "numpy": np.__version__,
+        "interpretar_ch_s": medir(lambda: interpretar_ch(serie), args.repeticoes),
+        "calcular_risco_s": medir(lambda: calcular_risco(df.copy(), "CH", 80, 36), args.repeticoes),
+    }
+    resultado["projetar_risco_s"] = medir(projetar, args.repeticoes)
+    projecao, _ = projetar()
+    resultado["projecao_identica"] = all(
+        np.array_equal(np.asarray(calcular_risco(df.copy(), "CH", 80, horas)["Classificacao"]),
+                       np.asarray(projecao.classificacao(mes)))
+        for mes, horas in cronograma.items()
+    )
+
+    if not args.sem_referencia:
+        inicio = time.perf_counter()
+        referencia = serie.apply(parse_ch)
+        resultado["parse_ch_apply_s"] = time.perf_counter() - inicio
+        realizadas, totais = interpretar_ch(serie)
+        esperado = np.array(referencia.tolist(), dtype=float).reshape(-1, 2)
+        resultado["identico"] = bool(
+            np.array_equal(realizadas, esperado[:, 0], equal_nan=True)
+            and np.array_equal(totais, esperado[:, 1], equal_nan=True)
+        )
+
+    texto = json.dumps(resultado, indent=2)
+    print(texto)
+    if args.json:
+        with open(args.json, "w") as f:
+            f.write(texto)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,126 @@
+"""Gerador de relatórios brutos sintéticos, no formato das planilhas de polo.
+
+Cada planilha tem a linha de título que a compilação descarta, o cabeçalho
+na linha seguinte e uma linha por aluno x atividade, com a coluna
+"Atividades(tentativas/quantidade de tentativas)" no formato
+"Avaliativa 1 - Matemática(2/3)" e a coluna CH em formatos variados.
+
+Uso:
+    python -m benchmarks.gerador SAIDA [--linhas 100000] [--polos 40] [--drs 4] ...
+"""
+import argparse
+import io
+import math
+import os
+
+import numpy as np
+import pandas as pd
+
+from pedagogico.exportacao import escrever_xlsx
+from pedagogico.reestruturacao import COLUNA_ATIVIDADES
+
+AREAS = ["Linguagens", "Matemática", "Ciências Humanas", "Ciências da Natureza"]
+MENCOES = ["MB", "B", "R", "I"]
+ETAPAS = ["1ª Série", "2ª Série", "3ª Série"]
+
+
+def nomes_atividades(n_atividades, n_avaliativas):
+    """Avaliativas por área primeiro; o restante são atividades comuns."""
+    nomes = [f"Avaliativa {k} - {area}" for k in range(1, n_avaliativas + 1) for area in AREAS]
+    nomes = nomes[:n_atividades]
+    nomes += [f"Atividade {j} - {AREAS[j % len(AREAS)]}" for j in range(1, n_atividades - len(nomes) + 1)]
+    return nomes
+
+
+def _textos_ch(rng, n, proporcao_vazios):
+    realizadas = rng.integers(0, 90, n).astype(str)
+    totais = rng.choice(["76", "80", "84"], n)
+    formato = rng.integers(0, 4, n)
+    ch = pd.Series(realizadas, dtype=object)
+    fracao = formato == 0
+    ch[fracao] = pd.Series(realizadas[fracao]) + "/" + pd.Series(totais[fracao])
+    espacada = formato == 1
+    ch[espacada] = pd.Series(realizadas[espacada]) + " / " + pd.Series(totais[espacada])
+    decimal = formato == 2
+    ch[decimal] = pd.Series(realizadas[decimal]) + ",5/" + pd.Series(totais[decimal])
+    ch[rng.random(n) < proporcao_vazios] = np.nan
+    return ch
+
+
+def gerar_compilado(linhas=100_000, n_drs=4, n_polos=40, n_atividades=20, n_avaliativas=4,
+                    proporcao_pendente=0.3, proporcao_ch_vazio=0.02, semente=0):
+    """Relatório compilado sintético (uma linha por aluno x atividade)."""
+    rng = np.random.default_rng(semente)
+    atividades = nomes_atividades(n_atividades, n_avaliativas)
+    n_alunos = max(1, math.ceil(linhas / len(atividades)))
+
+    aluno = np.arange(linhas) // len(atividades)
+    atividade = np.arange(linhas) % len(atividades)
+    polo = aluno % n_polos
+    total_tentativas = rng.integers(1, 4, linhas)
+    tentativas = rng.integers(0, 4, linhas) % (total_tentativas + 1)
+
+    mencao = pd.Series(rng.choice(MENCOES, linhas), dtype=object)
+    mencao[rng.random(linhas) < proporcao_pendente] = "--"
+
+    por_aluno = {
+        "Etapa": rng.choice(ETAPAS, n_alunos),
+        "Sala": pd.Series(rng.integers(1, 12, n_alunos)).map("Sala {}".format).to_numpy(),
+        "Área de conhecimento": rng.choice(AREAS, n_alunos),
+        "Data último acesso": (pd.Timestamp("2024-02-01")
+                               + pd.to_timedelta(rng.integers(0, 120, n_alunos), unit="D")).to_numpy(),
+        "CH": _textos_ch(rng, n_alunos, proporcao_ch_vazio).to_numpy(),
+    }
+
+    df = pd.DataFrame({
+        "DR": pd.Series(polo % n_drs).map("DR {:02d}".format).to_numpy(),
+        "Polo": pd.Series(polo).map("Polo {:03d}".format).to_numpy(),
+        "Nome": pd.Series(aluno).map("Aluno {:07d}".format).to_numpy(),
+        "Etapa": por_aluno["Etapa"][aluno],
+        "Sala": por_aluno["Sala"][aluno],
+        "Área de conhecimento": por_aluno["Área de conhecimento"][aluno],
+        "Data último acesso": por_aluno["Data último acesso"][aluno],
+        COLUNA_ATIVIDADES: (pd.Series(np.array(atividades, dtype=object)[atividade])
+                            + "(" + pd.Series(tentativas).astype(str)
+                            + "/" + pd.Series(total_tentativas).astype(str) + ")").to_numpy(),
+        "Menção Atual": mencao.to_numpy(),
+        "CH": por_aluno["CH"][aluno],
+    })
+    return df
+
+
+def gerar_planilhas(compilado):
+    """Divide o compilado por Polo e gera o .xlsx bruto de cada um: lista de (nome, bytes)."""
+    planilhas = []
+    for polo, grupo in compilado.groupby("Polo", sort=True):
+        arquivo = io.BytesIO()
+        escrever_xlsx(grupo, arquivo, titulo=f"Relatório de Acompanhamento - {polo}")
+        planilhas.append((f"{polo}.xlsx", arquivo.getvalue()))
+    return planilhas
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Gera planilhas de polo sintéticas.")
+    parser.add_argument("saida", help="pasta onde as planilhas serão gravadas")
+    parser.add_argument("--linhas", type=int, default=100_000, help="total de linhas aluno x atividade")
+    parser.add_argument("--drs", type=int, default=4)
+    parser.add_argument("--polos", type=int, default=40)
+    parser.add_argument("--atividades", type=int, default=20)
+    parser.add_argument("--avaliativas", type=int, default=4)
+    parser.add_argument("--pendentes", type=float, default=0.3, help="proporção de menções '--'")
+    parser.add_argument("--semente", type=int, default=0)
+    args = parser.parse_args(argv)
+
+    compilado = gerar_compilado(
+        linhas=args.linhas, n_drs=args.drs, n_polos=args.polos, n_atividades=args.atividades,
+        n_avaliativas=args.avaliativas, proporcao_pendente=args.pendentes, semente=args.semente
+    )
+    os.makedirs(args.saida, exist_ok=True)
+    for nome, conteudo in gerar_planilhas(compilado):
+        with open(os.path.join(args.saida, nome), "wb") as f:
+            f.write(conteudo)
+    print(f"{args.polos} planilha(s), {len(compilado)} linhas, em {args.saida}")
+
+
+if __name__ == "__main__":
+    main()
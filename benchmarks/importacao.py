@@ -0,0 +1,104 @@
+"""Tempo de importação do app, comparado a um orçamento.
+
+Uso:
+    python -m benchmarks.importacao [--repeticoes 5] [--detalhe] [--saida importacao.json]
+
+Cada alvo é importado num processo novo, depois do ``streamlit`` (que o
+servidor já tem carregado quando o script roda), e vale o menor tempo das
+repetições. O alvo ``ferramentas`` é o que o app.py importa antes de
+desenhar o título e o menu; ele não pode carregar pandas, NumPy nem openpyxl.
+Os demais são os módulos das páginas, importados na primeira vez em que a
+ferramenta é aberta. Sai com código 1 se algum alvo passar do orçamento.
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+
+# Segundos por alvo, com folga sobre o medido num núcleo (pandas + openpyxl ~0,6 s)
+ORCAMENTO_S = {
+    "ferramentas": 0.1,
+    "ferramentas.compilar": 1.0,
+    "ferramentas.reestruturar": 1.0,
+    "ferramentas.busca_ativa": 1.0,
+    "ferramentas.risco": 1.0,
+    "ferramentas.historico": 1.0,
+}
+# Não podem ser carregados antes do menu aparecer
+PESADOS = ["pandas", "numpy", "openpyxl"]
+
+_MEDIR = """
+import json, sys, time
+import streamlit
+inicio = time.perf_counter()
+import {alvo}
+tempo = time.perf_counter() - inicio
+print(json.dumps({{"tempo_s": tempo, "carregados": [m for m in {pesados!r} if m in sys.modules]}}))
+"""
+
+_RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def medir(alvo, repeticoes=5):
+    """Menor tempo de importação de ``alvo`` e os módulos pesados que ele carregou."""
+    melhor = None
+    for _ in range(repeticoes):
+        saida = subprocess.run(
+            [sys.executable, "-c", _MEDIR.format(alvo=alvo, pesados=PESADOS)],
+            capture_output=True, text=True, check=True, cwd=_RAIZ
+        ).stdout
+        medida = json.loads(saida.strip().splitlines()[-1])
+        if melhor is None or medida["tempo_s"] < melhor["tempo_s"]:
+            melhor = medida
+    return melhor
+
+
+def detalhe(alvo, limite=10):
+    """Os ``limite`` módulos mais caros (tempo acumulado, em s) segundo ``-X importtime``."""
+    erro = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import streamlit; import {alvo}"],
+        capture_output=True, text=True, check=True, cwd=_RAIZ
+    ).stderr
+    linhas = [linha.split("|") for linha in erro.splitlines() if linha.startswith("import time:")]
+    # Só os módulos importados depois do streamlit
+    inicio = max(i for i, partes in enumerate(linhas) if partes[-1].strip() == "streamlit") + 1
+    modulos = [(partes[-1].strip(), int(partes[1]) / 1e6) for partes in linhas[inicio:]]
+    return sorted(modulos, key=lambda item: -item[1])[:limite]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--alvos", nargs="+", default=list(ORCAMENTO_S))
+    parser.add_argument("--repeticoes", type=int, default=5)
+    parser.add_argument("--detalhe", action="store_true", help="mostra os módulos mais caros de cada alvo")
+    parser.add_argument("--saida", help="grava o resultado JSON neste arquivo")
+    args = parser.parse_args(argv)
+
+    resultados = {}
+    estourou = False
+    for alvo in args.alvos:
+        medida = medir(alvo, args.repeticoes)
+        orcamento = ORCAMENTO_S.get(alvo)
+        medida["orcamento_s"] = orcamento
+        medida["dentro"] = (orcamento is None or medida["tempo_s"] <= orcamento) and (
+            alvo != "ferramentas" or not medida["carregados"]
+        )
+        estourou = estourou or not medida["dentro"]
+        resultados[alvo] = medida
+
+        situacao = "ok" if medida["dentro"] else "ACIMA DO ORÇAMENTO"
+        carregados = f" (carrega {', '.join(medida['carregados'])})" if medida["carregados"] else ""
+        print(f"{alvo:<26} {medida['tempo_s']:.3f}s / {orcamento}s {situacao}{carregados}", flush=True)
+        if args.detalhe:
+            for modulo, tempo in detalhe(alvo):
+                print(f"    {tempo:.3f}s {modulo}")
+
+    if args.saida:
+        with open(args.saida, "w", encoding="utf-8") as f:
+            json.dump(resultados, f, indent=2, ensure_ascii=False)
+    return 1 if estourou else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,226 @@
+"""Benchmark das quatro etapas sobre relatórios sintéticos de vários tamanhos.
+
+Uso:
+    python -m benchmarks.suite [--tamanhos 10000 100000 1000000] [--saida relatorio.json]
+
+Para cada tamanho, gera as planilhas de polo com ``benchmarks.gerador`` e mede
+tempo e pico de memória de cada etapa: compilação, pivô da reestruturação,
+matriz de pendências e pendências por avaliativa, risco e exportação .xlsx
+(com a conferência da ida e volta: uma amostra exportada e relida pelo app
+tem de voltar igual, inclusive o texto que o .xlsx guarda escapado).
+O tempo é o menor de ``--repeticoes`` execuções. A memória é medida numa
+passada à parte com ``tracemalloc`` (que deixa o código mais lento); nessa
+passada a compilação roda num único processo, para que a leitura das
+planilhas também seja contada. O relatório JSON traz as versões e o commit,
+para comparar execuções entre commits.
+"""
+import argparse
+import datetime
+import json
+import os
+import platform
+import subprocess
+import time
+import tracemalloc
+
+import numpy as np
+import openpyxl
+import pandas as pd
+
+from benchmarks.gerador import gerar_compilado, gerar_planilhas
+from pedagogico.busca_ativa import MatrizPendencias
+from pedagogico.compilacao import compilar_planilhas
+from pedagogico.exportacao import exportar, tamanho
+from pedagogico.leitura import ler_planilha
+from pedagogico.pipeline import AVALIATIVAS, ch_por_aluno
+from pedagogico.reestruturacao import reestruturar_relatorio
+from pedagogico.risco import calcular_risco, detectar_coluna_ch
+
+TAMANHOS_PADRAO = [10_000, 100_000, 1_000_000]
+# Linhas da amostra exportada e relida, e textos que o .xlsx grava escapados (_xHHHH_)
+LINHAS_IDA_E_VOLTA = 2_000
+TEXTOS_IDA_E_VOLTA = ["tab\tquebra\nfim", "controle \x01\x1f", "literal _x0041_ e _x005F_", "acentuação ç"]
+ETAPAS = ["compilacao", "reestruturacao", "busca_ativa", "risco", "exportacao"]
+
+
+def _commit():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True,
+            cwd=os.path.dirname(os.path.abspath(__file__))
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def ambiente():
+    return {
+        "data": datetime.datetime.now().isoformat(timespec="seconds"),
+        "commit": _commit(),
+        "python": platform.python_version(),
+        "pandas": pd.__version__,
+        "numpy": np.__version__,
+        "openpyxl": openpyxl.__version__,
+        "plataforma": platform.platform(),
+        "cpus": os.cpu_count(),
+    }
+
+
+def cronometrar(funcao, repeticoes):
+    """Retorna (menor tempo em segundos, resultado da última execução)."""
+    melhor = None
+    for _ in range(repeticoes):
+        inicio = time.perf_counter()
+        resultado = funcao()
+        decorrido = time.perf_counter() - inicio
+        melhor = decorrido if melhor is None else min(melhor, decorrido)
+    return melhor, resultado
+
+
+def pico_memoria_mb(funcao):
+    """Pico de memória alocada (em MB) durante uma execução de ``funcao``."""
+    tracemalloc.start()
+    try:
+        funcao()
+        _, pico = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return round(pico / 1024 / 1024, 1)
+
+
+def _megabytes(df):
+    return round(df.memory_usage(deep=True).sum() / 1024 / 1024, 1)
+
+
+def _pendencias(matriz):
+    tempos = {}
+    for avaliativa in AVALIATIVAS:
+        colunas = matriz.colunas if avaliativa == "Todos" else matriz.colunas_da_avaliativa(avaliativa)
+        if colunas:
+            inicio = time.perf_counter()
+            tempos[str(avaliativa)] = (len(matriz.pendentes(avaliativa)), time.perf_counter() - inicio)
+    return tempos
+
+
+def medir_tamanho(linhas, etapas=ETAPAS, repeticoes=1, memoria=True, processos=None, **opcoes_gerador):
+    """Mede as etapas escolhidas para um relatório sintético de ``linhas`` linhas."""
+    inicio = time.perf_counter()
+    compilado = gerar_compilado(linhas, **opcoes_gerador)
+    planilhas = [conteudo for _, conteudo in gerar_planilhas(compilado)]
+    resultado = {
+        "linhas": linhas,
+        "planilhas": len(planilhas),
+        "bytes_planilhas": sum(len(conteudo) for conteudo in planilhas),
+        "geracao_s": round(time.perf_counter() - inicio, 3),
+        "etapas": {},
+    }
+
+    def registrar(etapa, funcao, funcao_memoria=None, **extras):
+        tempo, saida = cronometrar(funcao, repeticoes)
+        medida = {"tempo_s": round(tempo, 4), **extras}
+        if memoria:
+            medida["pico_memoria_mb"] = pico_memoria_mb(funcao_memoria or funcao)
+        resultado["etapas"][etapa] = medida
+        return saida
+
+    # As etapas seguintes partem do resultado da compilação, como no app
+    if "compilacao" in etapas:
+        compilado, juncao = registrar(
+            "compilacao",
+            lambda: compilar_planilhas(planilhas, max_workers=processos),
+            lambda: compilar_planilhas(planilhas, max_workers=1),
+        )
+        resultado["etapas"]["compilacao"]["linhas_duplicadas"] = juncao["linhas_duplicadas"]
+    relatorio = compilado.dropna(how='all')
+
+    estruturado = reestruturar_relatorio(relatorio.copy())
+    if "reestruturacao" in etapas:
+        estruturado = registrar("reestruturacao", lambda: reestruturar_relatorio(relatorio.copy()))
+    resultado["alunos"] = len(estruturado)
+    resultado["memoria_compilado_mb"] = _megabytes(compilado)
+    resultado["memoria_estruturado_mb"] = _megabytes(estruturado)
+
+    if "busca_ativa" in etapas:
+        matriz = registrar("busca_ativa", lambda: MatrizPendencias(estruturado))
+        resultado["etapas"]["busca_ativa"]["colunas_avaliativas"] = len(matriz.colunas)
+        resultado["etapas"]["busca_ativa"]["por_avaliativa"] = {
+            avaliativa: {"alunos": total, "tempo_s": round(tempo, 4)}
+            for avaliativa, (total, tempo) in _pendencias(matriz).items()
+        }
+
+    if "risco" in etapas:
+        # Como no pipeline: o risco é calculado sobre uma linha por aluno, não por atividade
+        ch_col, _ = detectar_coluna_ch(compilado)
+        ch = ch_por_aluno(relatorio, ch_col)
+        registrar("risco", lambda: calcular_risco(ch.copy(), ch_col, 80, 36), alunos=len(ch))
+
+    if "exportacao" in etapas:
+        arquivo = registrar("exportacao", lambda: exportar(compilado, formato="xlsx"))
+        with arquivo:
+            resultado["etapas"]["exportacao"]["bytes"] = tamanho(arquivo)
+        resultado["etapas"]["exportacao"]["ida_e_volta"] = ida_e_volta(compilado)
+
+    return resultado
+
+
+def ida_e_volta(compilado, linhas=LINHAS_IDA_E_VOLTA):
+    """Se uma amostra do compilado, exportada em .xlsx e relida por ``ler_planilha``, volta igual."""
+    amostra = compilado.head(linhas).reset_index(drop=True)
+    amostra["Texto"] = pd.Series(np.resize(np.array(TEXTOS_IDA_E_VOLTA, dtype=object), len(amostra)))
+    with exportar(amostra, formato="xlsx") as arquivo:
+        relido = ler_planilha(arquivo.read())
+    try:
+        pd.testing.assert_frame_equal(relido, amostra, check_dtype=False, check_categorical=False, check_names=False)
+    except AssertionError:
+        return False
+    return True
+
+
+def _resumo(resultado):
+    partes = [f"{resultado['linhas']:>9} linhas"]
+    for etapa, medida in resultado["etapas"].items():
+        texto = f"{etapa} {medida['tempo_s']:.2f}s"
+        if "pico_memoria_mb" in medida:
+            texto += f"/{medida['pico_memoria_mb']:.0f}MB"
+        if medida.get("ida_e_volta") is False:
+            texto += " (ida e volta FALHOU)"
+        partes.append(texto)
+    return " | ".join(partes)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--tamanhos", type=int, nargs="+", default=TAMANHOS_PADRAO,
+                        help="linhas aluno x atividade de cada rodada")
+    parser.add_argument("--etapas", nargs="+", choices=ETAPAS, default=ETAPAS)
+    parser.add_argument("--repeticoes", type=int, default=1)
+    parser.add_argument("--sem-memoria", action="store_true", help="não faz a passada com tracemalloc")
+    parser.add_argument("--processos", type=int, default=None, help="processos da compilação")
+    parser.add_argument("--drs", type=int, default=4)
+    parser.add_argument("--polos", type=int, default=40)
+    parser.add_argument("--atividades", type=int, default=20)
+    parser.add_argument("--avaliativas", type=int, default=4)
+    parser.add_argument("--semente", type=int, default=0)
+    parser.add_argument("--saida", help="grava o relatório JSON neste arquivo")
+    args = parser.parse_args(argv)
+
+    relatorio = {"ambiente": ambiente(), "resultados": []}
+    for linhas in args.tamanhos:
+        resultado = medir_tamanho(
+            linhas, etapas=args.etapas, repeticoes=args.repeticoes, memoria=not args.sem_memoria,
+            processos=args.processos, n_drs=args.drs, n_polos=args.polos,
+            n_atividades=args.atividades, n_avaliativas=args.avaliativas, semente=args.semente
+        )
+        relatorio["resultados"].append(resultado)
+        print(_resumo(resultado), flush=True)
+
+    texto = json.dumps(relatorio, indent=2, ensure_ascii=False)
+    if args.saida:
+        with open(args.saida, "w", encoding="utf-8") as f:
+            f.write(texto)
+    else:
+        print(texto)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,74 @@
+"""Páginas do app, uma por ferramenta.
+
+O app.py só importa este pacote leve (Streamlit e as partes do pedagogico
+sem pandas), desenha o título e o menu e então importa o módulo da
+ferramenta escolhida (ver ``carregar``). pandas, NumPy e openpyxl entram
+com o módulo da ferramenta, na primeira vez em que ela é aberta no
+processo; nas reexecuções seguintes o módulo já está em ``sys.modules`` e
+cada interação só roda a função ``pagina``.
+"""
+import importlib
+import os
+import re
+import secrets
+
+import streamlit as st
+
+from pedagogico.tarefas import Tarefas
+
+# Rótulo no menu -> módulo da página (cada módulo define ``pagina()``)
+FERRAMENTAS = {
+    "Compilar Planilhas": "ferramentas.compilar",
+    "Reestruturar Relatório": "ferramentas.reestruturar",
+    "Busca Ativa de Estudantes": "ferramentas.busca_ativa",
+    "Risco de Reprovação Presencial": "ferramentas.risco",
+    "Histórico dos Estudantes": "ferramentas.historico",
+}
+
+# As bases locais (compilação incremental, histórico) ficam numa pasta por
+# espaço de trabalho: cada sessão começa no seu, e um nome digitado é
+# compartilhado por quem o usar (ex.: a equipe de uma DR, semana a semana)
+PASTA_ESPACOS = os.environ.get("PEDAGOGICO_ESPACOS") or os.path.join(".pedagogico", "espacos")
+_NOME_ESPACO = re.compile(r"[\w-]{1,40}")
+
+
+def carregar(ferramenta):
+    """Módulo da página da ferramenta (importado só quando ela é aberta)."""
+    return importlib.import_module(FERRAMENTAS[ferramenta])
+
+
+def tarefas_sessao():
+    """Tarefas em segundo plano desta sessão (ver pedagogico.tarefas)."""
+    return st.session_state.setdefault("tarefas", Tarefas())
+
+
+def tarefas_exibidas():
+    """Tarefas em andamento mostradas nesta execução do script (o app.py zera a lista)."""
+    return st.session_state.setdefault("tarefas_exibidas", [])
+
+
+def seletor_espaco():
+    """Campo do menu lateral com o nome do espaço de trabalho da sessão."""
+    st.session_state.setdefault("espaco", f"sessao-{secrets.token_hex(4)}")
+    st.session_state.setdefault("espaco_valido", st.session_state["espaco"])
+    nome = st.sidebar.text_input(
+        "🗂️ Espaço de trabalho", key="espaco",
+        help="Nome das bases locais (compilação incremental e histórico). Cada sessão começa num espaço "
+             "próprio; use o mesmo nome para continuar de onde parou em outra sessão."
+    ).strip()
+    if _NOME_ESPACO.fullmatch(nome):
+        st.session_state["espaco_valido"] = nome
+    else:
+        st.sidebar.error("Use só letras, números, \"-\" e \"_\" (até 40). Mantido: "
+                         f"{st.session_state['espaco_valido']}")
+
+
+def caminho_espaco(arquivo):
+    """Caminho de ``arquivo`` na pasta do espaço de trabalho desta sessão."""
+    st.session_state.setdefault("espaco_valido", f"sessao-{secrets.token_hex(4)}")
+    return os.path.join(PASTA_ESPACOS, st.session_state["espaco_valido"], arquivo)
+
+
+def caminho_historico():
+    """Histórico dos estudantes do espaço de trabalho desta sessão."""
+    return caminho_espaco("historico.sqlite")
@@ -0,0 +1,118 @@
+"""Página "Busca Ativa de Estudantes": alunos com pendências por avaliativa."""
+import streamlit as st
+
+from ferramentas import tarefas_sessao
+from ferramentas.comum import acompanhar, botao_download, botao_historico, mostrar_leitura, visualizador
+from pedagogico.busca_ativa import montar_matriz_pendencias
+from pedagogico.cache import cache_padrao, ler_abas
+from pedagogico.historico import HistoricoAlunos, retrato_relatorio
+from pedagogico.leitura import ler_planilha
+from pedagogico.tarefas import chave_tarefa
+
+
+def preparar_busca_ativa(conteudo, sheet_name, progresso):
+    progresso(0, 1, "Lendo a aba e montando a matriz de pendências")
+    return cache_padrao.obter(conteudo, montar_matriz_pendencias, sheet_name=sheet_name)
+
+
+def registrar_relatorio(conteudo, sheet_name, cabecalho, caminho, data, progresso):
+    # A matriz só tem as avaliativas: o histórico lê a aba inteira (menções e tentativas)
+    progresso(0, 2, "Lendo o relatório")
+    df = cache_padrao.obter(conteudo, ler_planilha, aba=sheet_name, cabecalho=cabecalho)
+    progresso(1, 2, "Comparando com o histórico")
+    return HistoricoAlunos(caminho).registrar([retrato_relatorio(df)], data=data, origem="busca_ativa")
+
+
+def pagina():
+    st.header("🔍 Busca Ativa de Estudantes com Pendências")
+    st.info("Identifica alunos com resultados pendentes por avaliativa.")
+
+    uploaded_file = st.file_uploader("Carregue o relatório processado", type=["xlsx"])
+
+    if uploaded_file:
+        conteudo = uploaded_file.getvalue()
+        sheet_names = cache_padrao.obter(conteudo, ler_abas)
+
+        if len(sheet_names) > 1:
+            sheet_name = st.selectbox("Selecione a aba para processar", sheet_names)
+        else:
+            sheet_name = sheet_names[0]
+
+        if sheet_name:
+            tarefa = tarefas_sessao().submeter(
+                "busca_ativa", chave_tarefa(conteudo, sheet_name), preparar_busca_ativa, conteudo, sheet_name
+            )
+            matriz = acompanhar(tarefa)
+
+            if matriz is not None:
+                mostrar_leitura(matriz.esquema)
+                df = matriz.df
+
+                # Avaliativas + opção "Todos"
+                avaliativa = st.selectbox("Selecione a Avaliativa", ["Todos", 1, 2, 3, 4])
+
+                if avaliativa != "Todos":
+                    colunas_avaliativa = matriz.colunas_da_avaliativa(avaliativa)
+
+                    if colunas_avaliativa:
+                        st.success(f"✅ {len(colunas_avaliativa)} coluna(s) encontrada(s) para a Avaliativa {avaliativa}")
+                        alunos_com_pendencia = matriz.pendentes(avaliativa)
+
+                    else:
+                        st.warning(f"❌ Nenhuma coluna encontrada para a Avaliativa {avaliativa}")
+
+                else:
+                    colunas_atividades = matriz.colunas
+
+                    if colunas_atividades:
+                        st.success(f"✅ {len(colunas_atividades)} colunas de avaliativas consideradas")
+                        alunos_com_pendencia = matriz.pendentes("Todos")
+
+                    else:
+                        st.warning("❌ Nenhuma coluna de avaliativas encontrada.")
+
+                # Exibição final
+                if 'alunos_com_pendencia' in locals() and not alunos_com_pendencia.empty:
+                    st.subheader(f"🎯 Estudantes com Pendências - Avaliativa {avaliativa}")
+
+                    cols_to_show = ["DR", "Polo", "Nome"]
+                    for col in ["Etapa", "Sala", "Data último acesso"]:
+                        if col in alunos_com_pendencia.columns:
+                            cols_to_show.append(col)
+                    cols_to_show.append("Áreas com Pendência")
+
+                    nome_base = f"pendencias_avaliativa_{avaliativa}"
+                    filtrado, chave_filtrado = visualizador(
+                        alunos_com_pendencia, nome_base, chave_tarefa(tarefa.chave, avaliativa), colunas=cols_to_show
+                    )
+
+                    botao_download(
+                        filtrado, "⬇️ Baixar Relatório de Pendências", nome_base, chave_filtrado,
+                        nome_aba="Pendências"
+                    )
+
+                    st.subheader("📈 Estatísticas")
+                    col1, col2, col3 = st.columns(3)
+                    with col1:
+                        st.metric("Total de Alunos com Pendências", len(alunos_com_pendencia))
+                    with col2:
+                        if "Etapa" in df.columns:
+                            st.metric("Etapas Envolvidas", alunos_com_pendencia["Etapa"].nunique())
+                    with col3:
+                        if "Sala" in df.columns:
+                            st.metric("Salas Envolvidas", alunos_com_pendencia["Sala"].nunique())
+
+                    if avaliativa == "Todos":
+                        st.bar_chart({"Sem Nenhuma Entrega": [len(alunos_com_pendencia)]})
+                    else:
+                        areas_count = alunos_com_pendencia["Áreas com Pendência"].str.split(", ").explode().value_counts()
+                        st.bar_chart(areas_count)
+
+                else:
+                    st.info("🎉 Nenhum aluno com pendência encontrado!")
+
+                with st.expander("🕓 Registrar no histórico dos estudantes"):
+                    st.caption("Guarda as menções e tentativas deste relatório para comparar com os próximos "
+                               "na página \"Histórico dos Estudantes\".")
+                    botao_historico("busca_ativa", tarefa.chave, registrar_relatorio, conteudo, sheet_name,
+                                    matriz.esquema["linha_cabecalho"] or 0)
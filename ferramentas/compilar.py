@@ -0,0 +1,104 @@
+"""Página "Compilar Planilhas": junta as planilhas de polo num único arquivo."""
+import os
+
+import streamlit as st
+
+from ferramentas import caminho_espaco, tarefas_sessao
+from ferramentas.comum import acompanhar, botao_download, visualizador
+from pedagogico.cache import cache_padrao
+from pedagogico.compilacao import LIMITE_MEMORIA_PADRAO_MB, compilar_planilhas
+from pedagogico.incremental import BaseIncremental, compilar_incremental
+from pedagogico.tarefas import chave_tarefa
+
+
+def mostrar_juncao(resumo):
+    """Linhas duplicadas removidas e colunas unificadas na junção das planilhas."""
+    if resumo["linhas_duplicadas"]:
+        st.warning(f"♻️ {resumo['linhas_duplicadas']} linha(s) duplicada(s) removida(s) "
+                   "(idênticas a linhas de outra planilha, como as de um arquivo enviado duas vezes; "
+                   "linhas repetidas dentro da mesma planilha e linhas vazias são mantidas).")
+    ajustes = [f"- Cabeçalho \"{original}\" lido como \"{nome}\""
+               for original, nome in resumo["cabecalhos_unificados"].items()]
+    ajustes += [f"- Coluna \"{nome}\" repetida numa planilha: valores unidos numa só"
+                for nome in resumo["colunas_repetidas"]]
+    ajustes += [f"- Coluna \"{nome}\" convertida para número (texto numérico em alguma planilha)"
+                for nome in resumo["colunas_convertidas"]]
+    if ajustes:
+        with st.expander("🧩 Ajustes nas colunas"):
+            st.markdown("\n".join(ajustes))
+
+
+def pagina():
+    st.header("📂 Compilar Múltiplas Planilhas")
+    st.info("Faça upload de várias planilhas para compilar em um único arquivo.")
+
+    # Upload de múltiplos arquivos
+    uploaded_files = st.file_uploader(
+        "Selecione todas as planilhas que deseja compilar:",
+        type=["xlsx"],
+        accept_multiple_files=True
+    )
+
+    if uploaded_files:
+        st.success(f"✅ {len(uploaded_files)} arquivo(s) carregado(s) com sucesso!")
+
+        with st.expander("⚙️ Opções de processamento"):
+            max_workers = st.number_input(
+                "Processos em paralelo",
+                min_value=1, max_value=64, value=min(len(uploaded_files), os.cpu_count() or 1), step=1
+            )
+            limite_memoria_mb = st.number_input(
+                "Limite de memória para leitura (MB)",
+                min_value=64, value=LIMITE_MEMORIA_PADRAO_MB, step=64
+            )
+            incremental = st.checkbox(
+                "Compilação incremental (base local)",
+                help="Guarda as planilhas já lidas: só arquivos novos ou alterados são processados, e o "
+                     "arquivo compilado inclui todas as planilhas da base, mesmo as que não foram reenviadas."
+            )
+
+        opcoes = {"max_workers": int(max_workers), "limite_memoria_mb": int(limite_memoria_mb),
+                  "cache": cache_padrao}
+        # A base incremental é a do espaço de trabalho da sessão (menu lateral)
+        caminho_base = caminho_espaco("compilacao.sqlite") if incremental else None
+        chave = chave_tarefa(
+            *[arquivo.getvalue() for arquivo in uploaded_files],
+            [arquivo.name for arquivo in uploaded_files], int(max_workers), int(limite_memoria_mb), caminho_base
+        )
+        if incremental:
+            tarefa = tarefas_sessao().submeter("compilar", chave, compilar_incremental, uploaded_files,
+                                               caminho_base, **opcoes)
+        else:
+            tarefa = tarefas_sessao().submeter("compilar", chave, compilar_planilhas, uploaded_files, **opcoes)
+        resultado = acompanhar(tarefa)
+
+        df_compilado = None
+        if resultado is not None:
+            df_compilado, resumo = resultado
+            if incremental:
+                st.info(
+                    f"Base incremental: {len(resumo['novos'])} nova(s), {len(resumo['alterados'])} alterada(s), "
+                    f"{len(resumo['inalterados'])} sem alteração."
+                )
+                base = BaseIncremental(caminho_base)
+                manifesto = base.manifesto()
+                with st.expander("🗂️ Planilhas na base"):
+                    st.dataframe(manifesto)
+                    confirmado = st.checkbox(
+                        f"Confirmo que quero apagar as {len(manifesto)} planilha(s) desta base",
+                        key="confirmar_limpar_base"
+                    )
+                    if st.button("Limpar base", disabled=not confirmado):
+                        base.limpar()
+                        del st.session_state["confirmar_limpar_base"]
+                        tarefas_sessao().descartar("compilar")
+                        st.rerun()
+            mostrar_juncao(resumo)
+
+        if df_compilado is not None and not df_compilado.columns.empty:
+            st.subheader("📊 Arquivo Compilado")
+            filtrado, chave_filtrado = visualizador(df_compilado, "planilhas_compiladas", tarefa.chave)
+
+            botao_download(filtrado, "⬇️ Baixar Arquivo Compilado", "planilhas_compiladas", chave_filtrado)
+
+            st.success(f"✅ Compilação concluída! Total de linhas: {len(df_compilado)}")
@@ -0,0 +1,194 @@
+"""Elementos comuns às páginas: andamento das tarefas, resultados, download, leitura e histórico."""
+import math
+import threading
+import time
+
+import streamlit as st
+from streamlit.runtime.media_file_manager import MediaFileManager
+
+from ferramentas import caminho_historico, tarefas_exibidas, tarefas_sessao
+from pedagogico.consulta import IndiceResultado
+from pedagogico.exportacao import FORMATOS, exportar, nome_arquivo, tipo_mime
+from pedagogico.tarefas import AGUARDANDO, CANCELADA, CONCLUIDA, MAX_TAREFAS, chave_tarefa
+
+# Espera pela tarefa antes de mostrar o progresso: tarefas curtas nem chegam a aparecer
+ESPERA_INICIAL = 0.3
+TAMANHOS_PAGINA = [25, 50, 100, 200, 500]
+SEM_ORDENACAO = "(ordem original)"
+# Versões recentes do Streamlit aceitam uma função em ``data=``, chamada só quando o botão é clicado
+DOWNLOAD_ADIADO = hasattr(MediaFileManager, "add_deferred")
+
+_trava_download = threading.Lock()
+
+
+def acompanhar(tarefa, mensagem_erro="Erro no processamento"):
+    """Resultado da tarefa se concluída; senão mostra o andamento ou a falha e retorna None."""
+    tarefa.aguardar(ESPERA_INICIAL)
+    if tarefa.estado == CONCLUIDA:
+        return tarefa.resultado
+
+    if tarefa.ativa:
+        decorrido = time.time() - tarefa.inicio
+        na_frente = tarefa.posicao_fila if tarefa.estado == AGUARDANDO else None
+        if na_frente is not None:
+            # O pool é compartilhado por todos os usuários do app
+            st.progress(0.0, text=f"⏳ Aguardando a vez: {na_frente} tarefa(s) na frente; o servidor executa "
+                                  f"até {MAX_TAREFAS} de cada vez, somando todos os usuários ({decorrido:.0f}s)")
+        else:
+            st.progress(tarefa.fracao, text=f"⏳ {tarefa.mensagem or 'Processando...'} ({decorrido:.0f}s)")
+        if st.button("✖️ Cancelar", key=f"cancelar_{tarefa.nome}"):
+            tarefa.cancelar()
+            st.rerun()
+        tarefas_exibidas().append(tarefa)
+        return None
+
+    if tarefa.estado == CANCELADA:
+        st.warning("⏹️ Processamento cancelado.")
+    else:
+        st.error(f"{mensagem_erro}: {tarefa.erro}")
+    if st.button("🔁 Processar novamente", key=f"repetir_{tarefa.nome}"):
+        tarefas_sessao().descartar(tarefa.nome)
+        st.rerun()
+    return None
+
+
+def conteudo_download(arquivo):
+    """``data`` do st.download_button para um arquivo de ``exportar``.
+
+    Onde o Streamlit aceita, é uma função que lê o arquivo no clique; senão,
+    os bytes, lidos a cada exibição do botão.
+    """
+    def ler():
+        # Dois cliques seguidos rodam em threads diferentes sobre o mesmo arquivo
+        with _trava_download:
+            arquivo.seek(0)
+            return arquivo.read()
+
+    return ler if DOWNLOAD_ADIADO else ler()
+
+
+def botao_download(df, rotulo, nome_base, chave, nome_aba="Sheet1", colunas=None):
+    """Seletor de formato, botão que gera o arquivo e botão de download do resultado.
+
+    O arquivo só é gerado quando pedido, em segundo plano, e fica com a
+    tarefa, num arquivo temporário (ver pedagogico.exportacao). Mudar o
+    formato ou os filtros descarta o arquivo anterior, que não chega a ocupar
+    o pool se ainda não tiver começado. ``chave`` identifica o conteúdo de
+    ``df`` (a chave da tarefa que o produziu).
+    """
+    formato = st.radio("Formato do arquivo", list(FORMATOS), horizontal=True, key=f"formato_{nome_base}")
+    nome = f"exportar_{nome_base}"
+    chave = chave_tarefa(chave, formato, colunas, nome_aba)
+    tarefa = tarefas_sessao().obter(nome)
+    if tarefa is not None and tarefa.chave != chave:
+        tarefas_sessao().descartar(nome)
+        tarefa = None
+    if tarefa is None:
+        # Gerar a cada exibição ocuparia o pool compartilhado a cada filtro mudado
+        if not st.button("📦 Gerar arquivo para download", key=f"gerar_{nome_base}"):
+            return
+        tarefa = tarefas_sessao().submeter(nome, chave, exportar, df, formato=formato, colunas=colunas,
+                                           nome_aba=nome_aba)
+    arquivo = acompanhar(tarefa, "Erro ao gerar o arquivo")
+    if arquivo is not None:
+        st.download_button(
+            label=rotulo,
+            data=conteudo_download(arquivo),
+            file_name=nome_arquivo(nome_base, formato),
+            mime=tipo_mime(formato)
+        )
+
+
+def indice_resultado(df, nome_base, chave):
+    """Índice de consulta do resultado, montado uma vez por ``chave`` (guardado na sessão)."""
+    guardado = st.session_state.get(f"indice_{nome_base}")
+    if guardado is None or guardado[0] != chave:
+        guardado = (chave, IndiceResultado(df))
+        st.session_state[f"indice_{nome_base}"] = guardado
+    return guardado[1]
+
+
+def visualizador(df, nome_base, chave, colunas=None):
+    """Tabela do resultado com filtros por DR/Polo/Etapa/Sala, ordenação e páginas.
+
+    Só a página escolhida vai para o navegador; mudar filtro, ordem ou página
+    não refaz a análise. ``colunas`` limita as colunas exibidas. Retorna
+    (linhas filtradas, chave delas), para o download do subconjunto.
+    """
+    indice = indice_resultado(df, nome_base, chave)
+    exibidas = list(df.columns) if colunas is None else list(colunas)
+
+    filtros = {}
+    if indice.colunas:
+        campos = st.columns(len(indice.colunas))
+        for campo, coluna in zip(campos, indice.colunas):
+            chave_filtro = f"filtro_{nome_base}_{coluna}"
+            # As opções seguem os filtros à esquerda; o que já está marcado continua na lista
+            opcoes = indice.valores(coluna, filtros)
+            opcoes += [valor for valor in st.session_state.get(chave_filtro, []) if valor not in opcoes]
+            filtros[coluna] = campo.multiselect(coluna, opcoes, key=chave_filtro, placeholder="Todos")
+
+    campo_ordem, campo_sentido, campo_tamanho, campo_pagina = st.columns([3, 2, 2, 2])
+    ordenar_por = campo_ordem.selectbox(
+        "Ordenar por", [SEM_ORDENACAO] + exibidas, key=f"ordem_{nome_base}", format_func=str
+    )
+    decrescente = campo_sentido.radio(
+        "Sentido", ["Crescente", "Decrescente"], horizontal=True, key=f"sentido_{nome_base}"
+    ) == "Decrescente"
+    tamanho = campo_tamanho.selectbox("Linhas por página", TAMANHOS_PAGINA, index=1,
+                                      key=f"tamanho_{nome_base}")
+
+    linhas = indice.filtrar(filtros)
+    paginas = max(1, math.ceil(len(linhas) / tamanho))
+    chave_pagina = f"pagina_{nome_base}"
+    if st.session_state.get(chave_pagina, 1) > paginas:
+        st.session_state[chave_pagina] = paginas
+    numero = campo_pagina.number_input("Página", min_value=1, max_value=paginas, step=1, key=chave_pagina)
+
+    if ordenar_por != SEM_ORDENACAO:
+        linhas_ordenadas = indice.ordenar(linhas, ordenar_por, crescente=not decrescente)
+    else:
+        linhas_ordenadas = linhas[::-1] if decrescente else linhas
+    pagina = indice.pagina(linhas_ordenadas, int(numero), tamanho)
+    st.dataframe(pagina if colunas is None else pagina[exibidas])
+
+    ativos = {coluna: valores for coluna, valores in filtros.items() if valores}
+    legenda = f"{len(linhas)} de {len(df)} linha(s) — página {int(numero)} de {paginas}"
+    if ativos:
+        legenda += " — o download leva só as linhas filtradas"
+    st.caption(legenda)
+
+    if not ativos:
+        return df, chave
+    return df.iloc[linhas], chave_tarefa(chave, ativos)
+
+
+def mostrar_leitura(esquema):
+    """Decisões tomadas na leitura do arquivo (cabeçalho, coluna CH, avaliativas)."""
+    with st.expander("🔎 Como o arquivo foi lido"):
+        st.markdown("\n".join(f"- {decisao}" for decisao in esquema["decisoes"]))
+
+
+def botao_historico(nome_base, chave, funcao, *args):
+    """Data do relatório e botão que registra o resultado no histórico dos estudantes.
+
+    ``funcao(*args, caminho=..., data=..., progresso=...)`` roda em segundo
+    plano com o histórico do espaço de trabalho e retorna o resumo de
+    ``HistoricoAlunos.registrar``; ``chave`` identifica o resultado, e o
+    mesmo resultado na mesma data é registrado uma só vez.
+    """
+    data = st.date_input("Data do relatório", key=f"data_historico_{nome_base}")
+    nome = f"historico_{nome_base}"
+    caminho = caminho_historico()
+    chave = chave_tarefa(chave, caminho, data.isoformat())
+    if st.button("💾 Registrar no histórico", key=f"registrar_{nome_base}"):
+        tarefas_sessao().submeter(nome, chave, funcao, *args, caminho=caminho, data=data.isoformat())
+
+    tarefa = tarefas_sessao().obter(nome)
+    if tarefa is not None and tarefa.chave == chave:
+        registro = acompanhar(tarefa, "Erro ao registrar no histórico")
+        if registro is not None:
+            st.success(
+                f"✅ Registrado no histórico (execução {registro['execucao']}): {registro['alunos']} aluno(s), "
+                f"{registro['mudancas']} mudança(s) desde o registro anterior."
+            )
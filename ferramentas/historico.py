@@ -0,0 +1,90 @@
+"""Página "Histórico dos Estudantes": o que mudou entre os registros do histórico."""
+import streamlit as st
+
+from ferramentas import caminho_historico
+from ferramentas.comum import botao_download, visualizador
+from pedagogico.historico import HistoricoAlunos
+from pedagogico.tarefas import chave_tarefa
+
+# Nome base do resultado -> (título da aba, método do HistoricoAlunos, nome da aba no arquivo)
+CONSULTAS = {
+    "novos_pendentes": ("🆕 Novas pendências", "novos_pendentes", "Novas_Pendencias"),
+    "pendencias_resolvidas": ("✅ Pendências resolvidas", "resolvidos", "Resolvidas"),
+    "piora_risco": ("📉 Piora no risco", "piora_risco", "Piora_Risco"),
+}
+
+
+def consultar(historico, chave, desde, ate):
+    """Resultado de cada consulta entre os registros, calculado uma vez por ``chave`` (guardado na sessão)."""
+    guardado = st.session_state.get("consultas_historico")
+    if guardado is None or guardado[0] != chave:
+        resultados = {nome_base: getattr(historico, metodo)(desde, ate)
+                      for nome_base, (_, metodo, _) in CONSULTAS.items()}
+        guardado = (chave, resultados)
+        st.session_state["consultas_historico"] = guardado
+    return guardado[1]
+
+
+def pagina():
+    st.header("🕓 Histórico dos Estudantes")
+    st.info("Compara os registros do histórico: quem passou a ter pendências, quem as resolveu e quem "
+            "piorou na classificação de risco entre duas datas.")
+
+    # O histórico é o do espaço de trabalho da sessão (menu lateral)
+    historico = HistoricoAlunos(caminho_historico())
+    execucoes = historico.execucoes()
+    if execucoes.empty:
+        st.warning("O histórico está vazio. Registre um relatório pela Busca Ativa ou pelo Risco "
+                   "(\"Registrar no histórico dos estudantes\") ou pelo pipeline (--historico).")
+        return
+
+    with st.expander(f"🗂️ Registros no histórico ({len(execucoes)})"):
+        st.dataframe(execucoes, hide_index=True)
+        confirmado = st.checkbox(
+            f"Confirmo que quero apagar os {len(execucoes)} registro(s) deste histórico",
+            key="confirmar_limpar_historico"
+        )
+        if st.button("Limpar histórico", disabled=not confirmado):
+            historico.limpar()
+            del st.session_state["confirmar_limpar_historico"]
+            st.session_state.pop("consultas_historico", None)
+            st.rerun()
+
+    rotulos = {linha.execucao: f"{linha.data} — {linha.origem or 'sem origem'} (#{linha.execucao})"
+               for linha in execucoes.itertuples()}
+    ids = execucoes["execucao"].tolist()[::-1]
+    if len(ids) < 2:
+        st.info("Há um só registro: as mudanças aparecem a partir do segundo.")
+    else:
+        campo_desde, campo_ate = st.columns(2)
+        ate = campo_ate.selectbox("Até o registro", ids, format_func=rotulos.get)
+        anteriores = [execucao for execucao in ids if execucao < ate]
+        if not anteriores:
+            st.info("Escolha um registro posterior ao primeiro para comparar.")
+        else:
+            desde = campo_desde.selectbox("Desde o registro", anteriores, format_func=rotulos.get)
+            chave = chave_tarefa(historico.caminho, desde, ate, ids)
+            resultados = consultar(historico, chave, desde, ate)
+
+            abas = st.tabs([f"{titulo} ({len(resultados[nome_base])})"
+                            for nome_base, (titulo, _, _) in CONSULTAS.items()])
+            for aba, (nome_base, (_, _, nome_aba)) in zip(abas, CONSULTAS.items()):
+                with aba:
+                    df = resultados[nome_base]
+                    if df.empty:
+                        st.info("Nenhum estudante nesta situação entre os registros escolhidos.")
+                        continue
+                    filtrado, chave_filtrado = visualizador(df, nome_base, chave_tarefa(chave, nome_base))
+                    botao_download(filtrado, "⬇️ Baixar", nome_base, chave_filtrado, nome_aba=nome_aba)
+
+    st.subheader("🔎 Histórico de um estudante")
+    aluno = st.text_input("Aluno_ID do estudante", placeholder="Polo - Nome")
+    if aluno:
+        df = historico.historico_aluno(aluno.strip())
+        if df.empty:
+            st.warning("Nenhum registro para este estudante.")
+        else:
+            # Menções (texto) e tentativas (números) na mesma coluna: exibidas como texto
+            for col in ["Anterior", "Atual"]:
+                df[col] = df[col].map(lambda valor: valor if valor is None else str(valor))
+            st.dataframe(df, hide_index=True)
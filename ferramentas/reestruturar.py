@@ -0,0 +1,86 @@
+"""Página "Reestruturar Relatório": uma linha por aluno a partir do relatório compilado."""
+import streamlit as st
+
+from ferramentas import tarefas_sessao
+from ferramentas.comum import acompanhar, botao_download, mostrar_leitura, visualizador
+from pedagogico.atividades import CAMINHO_PADRAO, DicionarioAtividades
+from pedagogico.cache import cache_padrao
+from pedagogico.leitura import farejar_esquema, ler_planilha
+from pedagogico.reestruturacao import colunas_faltantes, colunas_leitura, reestruturar_relatorio
+from pedagogico.tarefas import chave_tarefa
+
+# Compartilhado pelas sessões: nomes, códigos e apelidos valem para os próximos envios
+dicionario = DicionarioAtividades(CAMINHO_PADRAO)
+
+
+def reestruturar_arquivo(conteudo, esquema, progresso):
+    progresso(0, 2, "Lendo o relatório")
+    df = cache_padrao.obter(conteudo, ler_planilha, cabecalho=esquema["linha_cabecalho"],
+                            colunas=colunas_leitura(esquema["colunas"]))
+    progresso(1, 2, "Reestruturando por aluno")
+    return reestruturar_relatorio(df.dropna(how='all'), dicionario)
+
+
+def editar_dicionario():
+    """Apelidos do dicionário de atividades: grafias diferentes que devem virar uma só coluna."""
+    with st.expander(f"📚 Dicionário de atividades ({len(dicionario)} atividade(s))"):
+        st.caption(
+            "Quando a mesma atividade aparece escrita de formas diferentes, cada grafia vira uma coluna. "
+            "Aponte a grafia errada para o nome correto e o relatório é refeito com uma coluna só."
+        )
+        nomes = sorted(dicionario.atividades()["nome"])
+        col1, col2 = st.columns(2)
+        variante = col1.selectbox("Grafia a corrigir", nomes, key="apelido_variante")
+        nome = col2.selectbox("Nome correto", nomes, key="apelido_nome")
+        if st.button("Adicionar apelido", disabled=not nomes):
+            try:
+                dicionario.apelidar(variante, nome)
+            except ValueError as e:
+                st.error(str(e))
+            else:
+                st.rerun()
+
+        apelidos = dicionario.apelidos()
+        if not apelidos.empty:
+            st.dataframe(apelidos, hide_index=True)
+            remover = st.selectbox("Apelido a remover", apelidos["variante"].tolist(), key="apelido_remover")
+            if st.button("Remover apelido"):
+                dicionario.remover_apelido(remover)
+                st.rerun()
+
+
+def pagina():
+    st.header("🔄 Reestruturar Relatório Pedagógico")
+    st.info("Processa o relatório compilado para formato de análise pedagógica.")
+
+    uploaded_file = st.file_uploader("Carregue o relatório compilado", type=["xlsx"])
+
+    if uploaded_file:
+        conteudo = uploaded_file.getvalue()
+        esquema = cache_padrao.obter(conteudo, farejar_esquema)
+        mostrar_leitura(esquema)
+
+        if not esquema["cabecalho_encontrado"]:
+            st.error("Não foi possível detectar o cabeçalho automaticamente.")
+        else:
+            faltantes = colunas_faltantes(esquema["colunas"])
+
+            if faltantes:
+                st.error(f"Colunas faltantes: {faltantes}")
+            else:
+                tarefa = tarefas_sessao().submeter(
+                    "reestruturar", chave_tarefa(conteudo, dicionario.assinatura()), reestruturar_arquivo,
+                    conteudo, esquema
+                )
+                resultado = acompanhar(tarefa)
+
+                if resultado is not None:
+                    st.subheader("📋 Resultado Processado")
+                    filtrado, chave_filtrado = visualizador(resultado, "relatorio_estruturado", tarefa.chave)
+
+                    botao_download(filtrado, "⬇️ Baixar Relatório Processado", "relatorio_estruturado",
+                                   chave_filtrado)
+
+                    st.success(f"✅ Processamento concluído! {len(resultado)} alunos processados.")
+
+                editar_dicionario()
@@ -0,0 +1,226 @@
+"""Página "Risco de Reprovação Presencial": classificação pela carga horária (CH)."""
+import datetime
+
+import numpy as np
+import pandas as pd
+import streamlit as st
+
+from ferramentas import tarefas_sessao
+from ferramentas.comum import acompanhar, botao_download, botao_historico, mostrar_leitura, visualizador
+from pedagogico.cache import cache_padrao
+from pedagogico.historico import HistoricoAlunos, retrato_risco
+from pedagogico.leitura import farejar_esquema, ler_planilha
+from pedagogico.risco import CLASSE_ATENCAO, CLASSE_IDEAL, CLASSE_RISCO, CLASSES, calcular_risco, projetar_risco
+from pedagogico.tarefas import chave_tarefa
+
+COLUNAS_IDENTIFICACAO = ["DR", "Polo", "Nome", "Etapa", "Sala", "Data último acesso"]
+
+
+def classificar_arquivo(conteudo, cabecalho, ch_col, carga_ideal, carga_ocorrida, progresso):
+    progresso(0, 2, "Lendo a planilha")
+    df = cache_padrao.obter(conteudo, ler_planilha, cabecalho=cabecalho)
+    progresso(1, 2, "Calculando o risco")
+    return calcular_risco(df, ch_col, carga_ideal, carga_ocorrida)
+
+
+def projetar_arquivo(conteudo, cabecalho, ch_col, cronograma, carga_ideal, progresso):
+    """Retorna (projeção por estudante, contagens por polo e mês)."""
+    progresso(0, 2, "Lendo a planilha")
+    df = cache_padrao.obter(conteudo, ler_planilha, cabecalho=cabecalho)
+    progresso(1, 2, "Projetando o risco mês a mês")
+    projecao = projetar_risco(df, ch_col, cronograma, carga_ideal)
+    colunas = [c for c in COLUNAS_IDENTIFICACAO if c in df.columns] + [ch_col]
+    return projecao.por_aluno(colunas), projecao.por_polo()
+
+
+def registrar_risco(df, caminho, data, progresso):
+    progresso(0, 1, "Comparando com o histórico")
+    return HistoricoAlunos(caminho).registrar([retrato_risco(df)], data=data, origem="risco")
+
+
+def cronograma_padrao(meses, inicio, carga_ocorrida, carga_ideal):
+    """Do mês ``inicio`` a dezembro, com a carga ocorrida crescendo por igual até a carga ideal."""
+    restantes = meses[inicio:]
+    horas = np.linspace(carga_ocorrida, max(carga_ideal, carga_ocorrida), len(restantes)).round()
+    return pd.DataFrame({"Mês": restantes, "Carga ocorrida acumulada (h)": horas})
+
+
+def secao_projecao(conteudo, cabecalho, ch_col, meses, mes_inicio, carga_ideal, carga_ocorrida):
+    """Seção da projeção do risco para vários meses."""
+    st.subheader("📈 Projeção mês a mês")
+    st.caption(
+        "Informe a carga horária ocorrida acumulada ao fim de cada mês. Para cada estudante e mês, o "
+        "percentual final possível é recalculado supondo que o estudante não realize mais horas além das "
+        "que constam no arquivo; o mês irrecuperável é o primeiro em que ele fica abaixo de 75%."
+    )
+    editado = st.data_editor(
+        cronograma_padrao(meses, mes_inicio, carga_ocorrida, carga_ideal),
+        num_rows="dynamic", hide_index=True, key="cronograma_risco"
+    )
+    editado = editado.dropna()
+    if editado.empty:
+        st.warning("Informe ao menos um mês no cronograma.")
+        return
+    cronograma = [(str(mes), float(horas)) for mes, horas in zip(editado.iloc[:, 0], editado.iloc[:, 1])]
+    if len({mes for mes, _ in cronograma}) < len(cronograma):
+        st.error("Cada mês deve aparecer uma única vez no cronograma.")
+        return
+
+    tarefa = tarefas_sessao().submeter(
+        "projecao_risco", chave_tarefa(conteudo, ch_col, cronograma, carga_ideal), projetar_arquivo,
+        conteudo, cabecalho, ch_col, cronograma, carga_ideal
+    )
+    resultado = acompanhar(tarefa, "Erro na projeção")
+    if resultado is None:
+        return
+    por_aluno, por_polo = resultado
+
+    st.markdown("**Estudantes por classificação em cada mês**")
+    totais = por_polo.groupby("Mes", observed=False)[CLASSES + ["Novos_Irrecuperaveis"]].sum()
+    totais.index = totais.index.astype(str)
+    st.dataframe(totais.T.rename(index={"Novos_Irrecuperaveis": "Ficam irrecuperáveis no mês"}))
+
+    st.markdown("**Por estudante**")
+    filtrado, chave_filtrado = visualizador(por_aluno, "projecao_risco_estudantes", tarefa.chave)
+    botao_download(
+        filtrado, "⬇️ Baixar Projeção por Estudante", "projecao_risco_estudantes", chave_filtrado,
+        nome_aba="Projecao_Estudantes"
+    )
+
+    st.markdown("**Por polo**")
+    filtrado, chave_filtrado = visualizador(por_polo, "projecao_risco_polos", tarefa.chave)
+    botao_download(
+        filtrado, "⬇️ Baixar Projeção por Polo", "projecao_risco_polos", chave_filtrado,
+        nome_aba="Projecao_Polos"
+    )
+
+
+def pagina():
+    st.header("⚠️ Identificar Estudantes em Risco de Reprovação Presencial")
+
+    st.info(
+        "Carregue uma planilha (.xlsx). O sistema detectará automaticamente a coluna com CH "
+        "(horas realizadas / horas totais) — normalmente na coluna E ou em uma coluna cujo cabeçalho contenha 'CH'. "
+        "O cálculo usa o denominador real presente no arquivo, respeitando variações individuais."
+    )
+
+    # ==============================
+    # PARÂMETROS DO USUÁRIO
+    # ==============================
+    meses = [
+        "Janeiro", "Fevereiro", "Março", "Abril", "Maio", "Junho",
+        "Julho", "Agosto", "Setembro", "Outubro", "Novembro", "Dezembro"
+    ]
+    hoje = datetime.datetime.now()
+    mes_default_index = hoje.month - 1
+
+    mes_selecionado = st.selectbox("Selecione o mês atual", meses, index=mes_default_index)
+    carga_ideal = st.number_input(
+        "Carga horária ideal (padrão para quem não possui denominador no arquivo)",
+        min_value=1, value=80, step=1
+    )
+    carga_ocorrida = st.number_input(
+        "Carga horária já ocorrida até o mês selecionado",
+        min_value=0, value=36, step=1
+    )
+
+    horas_restantes = max(carga_ideal - carga_ocorrida, 0)
+    st.write(f"Horas restantes possíveis no semestre (baseado na carga ideal): **{horas_restantes}h**")
+
+    # ==============================
+    # UPLOAD DE ARQUIVO
+    # ==============================
+    uploaded_file = st.file_uploader(
+        "Carregue a planilha (.xlsx) com a coluna CH (exemplo: '28/84')",
+        type=["xlsx"]
+    )
+
+    if uploaded_file:
+        conteudo = uploaded_file.getvalue()
+        try:
+            esquema = cache_padrao.obter(conteudo, farejar_esquema)
+        except Exception as e:
+            st.error(f"Erro ao ler o arquivo: {e}")
+            st.stop()
+
+        # ==============================
+        # DETECÇÃO AUTOMÁTICA DA COLUNA CH
+        # ==============================
+        mostrar_leitura(esquema)
+        ch_col, ch_pelo_nome = esquema["coluna_ch"], esquema["ch_pelo_nome"]
+
+        if ch_col is None:
+            st.error("Não foi possível localizar a coluna CH. Verifique se o arquivo possui uma coluna com valores como '28/84'.")
+            st.stop()
+        elif not ch_pelo_nome:
+            st.info(f"Coluna 'CH' não identificada pelo nome. Utilizando a coluna '{ch_col}' (ver \"Como o arquivo foi lido\").")
+
+        # ==============================
+        # CÁLCULOS E CLASSIFICAÇÃO DOS ESTUDANTES
+        # ==============================
+        tarefa = tarefas_sessao().submeter(
+            "risco", chave_tarefa(conteudo, ch_col, carga_ideal, carga_ocorrida), classificar_arquivo,
+            conteudo, esquema["linha_cabecalho"] or 0, ch_col, carga_ideal, carga_ocorrida
+        )
+        df = acompanhar(tarefa, "Erro ao ler o arquivo")
+
+        if df is not None:
+            # ==============================
+            # RESUMO
+            # ==============================
+            total_alunos = len(df)
+
+            # Contagem por categoria
+            risco_count = int((df['Classificacao'] == CLASSE_RISCO).sum())
+            atencao_count = int((df['Classificacao'] == CLASSE_ATENCAO).sum())
+            ideal_count = int((df['Classificacao'] == CLASSE_IDEAL).sum())
+
+            st.subheader("📋 Resultado — Classificação dos Estudantes")
+
+            col1, col2, col3, col4 = st.columns(4)
+            col1.metric("Total de estudantes", total_alunos)
+            col2.metric("🔴 Risco de Reprovação", risco_count)
+            col3.metric("🟡 Atenção necessária", atencao_count)
+            col4.metric("🟢 Situação Ideal", ideal_count)
+
+            st.write(f"**Mês:** {mes_selecionado} — **Carga ocorrida:** {carga_ocorrida}h — "
+                     f"**Denominador individual conforme arquivo.**")
+
+            # ==============================
+            # EXIBIÇÃO DA TABELA
+            # ==============================
+            cols_exibir = [c for c in COLUNAS_IDENTIFICACAO if c in df.columns]
+            cols_exibir += [
+                ch_col, 'Horas_Realizadas', 'Horas_Totais_Arquivo', 'Horas_Totais_Usadas',
+                'Percentual_Atual', 'Max_Horas_Possiveis', 'Percentual_Final_Possivel',
+                'Classificacao'
+            ]
+            cols_exibir = [c for c in cols_exibir if c in df.columns]
+
+            filtrado, chave_filtrado = visualizador(
+                df, "relatorio_classificacao_estudantes", tarefa.chave, colunas=cols_exibir
+            )
+
+            # ==============================
+            # EXPORTAÇÃO PARA EXCEL
+            # ==============================
+            apenas_exibidas = st.checkbox("Exportar apenas as colunas exibidas na tabela")
+            botao_download(
+                filtrado, "⬇️ Baixar Relatório com Classificação Completa", "relatorio_classificacao_estudantes",
+                chave_filtrado, nome_aba="Risco_Reprovacao", colunas=cols_exibir if apenas_exibidas else None
+            )
+
+            st.success("✅ Análise concluída com sucesso! Classificação aplicada a todos os estudantes.")
+
+            if "Aluno_ID" in df.columns or {"Polo", "Nome"} <= set(df.columns):
+                with st.expander("🕓 Registrar no histórico dos estudantes"):
+                    st.caption("Guarda os percentuais e a classificação de cada estudante para comparar com os "
+                               "próximos na página \"Histórico dos Estudantes\".")
+                    botao_historico("risco", tarefa.chave, registrar_risco, df)
+
+        # ==============================
+        # PROJEÇÃO PARA VÁRIOS MESES
+        # ==============================
+        if st.checkbox("📈 Projetar o risco para os próximos meses"):
+            secao_projecao(conteudo, esquema["linha_cabecalho"] or 0, ch_col, meses,
+                           meses.index(mes_selecionado), carga_ideal, carga_ocorrida)
@@ -0,0 +1,5 @@
+"""Núcleo de processamento do Sistema de Gestão Pedagógica.
+
+Cada módulo concentra a lógica de uma etapa, independente do Streamlit,
+para que a interface (app.py) e outros chamadores usem as mesmas funções.
+"""
@@ -0,0 +1,7 @@
+import sys
+
+from pedagogico.pipeline import main
+
+# Processos filhos criados por spawn importam este módulo sem rodar a CLI
+if __name__ == "__main__":
+    sys.exit(main())
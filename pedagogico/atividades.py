@@ -0,0 +1,171 @@
+"""Dicionário de atividades: nome canônico e código inteiro de cada atividade.
+
+O relatório compilado traz o nome da atividade dentro do texto da coluna de
+atividades (``"Avaliativa 1 - Matemática (1/3)"``), repetido em todas as
+linhas, mas com poucas centenas de valores distintos. O dicionário normaliza
+cada texto bruto uma única vez (sem acentos, minúsculo, espaços e travessões
+uniformes), guarda o resultado e dá a cada nome canônico um código inteiro
+estável; as linhas passam a carregar só o código.
+
+Apelidos juntam grafias diferentes da mesma atividade, que de outra forma
+virariam colunas separadas no relatório estruturado. Com um ``caminho``, os
+nomes, os códigos e os apelidos ficam num arquivo SQLite e valem para os
+próximos envios; sem ele, o dicionário vive só na memória.
+"""
+import contextlib
+import hashlib
+import os
+import re
+import sqlite3
+import threading
+import unicodedata
+
+import numpy as np
+import pandas as pd
+
+CAMINHO_PADRAO = os.environ.get("PEDAGOGICO_ATIVIDADES") or os.path.join(".pedagogico", "atividades.sqlite")
+
+_ESQUEMA = """
+CREATE TABLE IF NOT EXISTS atividades (
+    id INTEGER PRIMARY KEY,
+    nome TEXT NOT NULL UNIQUE
+);
+CREATE TABLE IF NOT EXISTS apelidos (
+    variante TEXT PRIMARY KEY,
+    nome TEXT NOT NULL
+);
+"""
+
+_ESPACOS = re.compile(r'\s+')
+_TRAVESSOES = re.compile(r'[‐‑‒–—―]')
+
+
+def normalizar_nome(nome):
+    """Nome sem acentos, em minúsculas, com espaços simples e travessões como hífen."""
+    if pd.isna(nome):
+        return nome
+    nome = ''.join(c for c in unicodedata.normalize('NFD', str(nome))
+                   if unicodedata.category(c) != 'Mn')
+    nome = _TRAVESSOES.sub('-', nome)
+    return _ESPACOS.sub(' ', nome).lower().strip()
+
+
+def nome_atividade(texto):
+    """Nome da atividade no texto da coluna de atividades: o que vem antes do "(" das tentativas."""
+    if pd.isna(texto):
+        return texto
+    return str(texto).split('(')[0].strip()
+
+
+class DicionarioAtividades:
+    """Nomes canônicos, códigos e apelidos das atividades (ver o módulo)."""
+
+    def __init__(self, caminho=None):
+        self.caminho = caminho
+        self._codigos = {}    # nome canônico -> código
+        self._nomes = {}      # código -> nome canônico
+        self._apelidos = {}   # variante normalizada -> nome canônico
+        self._memo = {}       # texto bruto -> código
+        self._trava = threading.RLock()
+        if caminho:
+            pasta = os.path.dirname(caminho)
+            if pasta:
+                os.makedirs(pasta, exist_ok=True)
+            with self._conectar() as conexao:
+                conexao.executescript(_ESQUEMA)
+                self._codigos = dict(conexao.execute("SELECT nome, id FROM atividades").fetchall())
+                self._apelidos = dict(conexao.execute("SELECT variante, nome FROM apelidos").fetchall())
+            self._nomes = {codigo: nome for nome, codigo in self._codigos.items()}
+
+    @contextlib.contextmanager
+    def _conectar(self):
+        conexao = sqlite3.connect(self.caminho)
+        try:
+            with conexao:
+                yield conexao
+        finally:
+            conexao.close()
+
+    def __len__(self):
+        return len(self._codigos)
+
+    def canonico(self, nome):
+        """Nome canônico de um nome bruto: normalizado e com os apelidos resolvidos."""
+        normalizado = normalizar_nome(nome)
+        return self._apelidos.get(normalizado, normalizado)
+
+    def _registrar(self, nomes):
+        novos = [nome for nome in dict.fromkeys(nomes) if nome not in self._codigos]
+        proximo = max(self._nomes, default=-1) + 1
+        for codigo, nome in enumerate(novos, start=proximo):
+            self._codigos[nome] = codigo
+            self._nomes[codigo] = nome
+        if novos and self.caminho:
+            with self._conectar() as conexao:
+                conexao.executemany("INSERT OR IGNORE INTO atividades (id, nome) VALUES (?, ?)",
+                                    [(self._codigos[nome], nome) for nome in novos])
+
+    def codificar(self, textos):
+        """Código de cada texto bruto (nome da atividade); -1 para vazio.
+
+        Cada texto distinto é normalizado uma só vez por dicionário; passe os
+        valores distintos da coluna e espalhe os códigos pelas linhas.
+        """
+        with self._trava:
+            faltantes = [texto for texto in dict.fromkeys(textos)
+                         if not pd.isna(texto) and texto not in self._memo]
+            canonicos = [self.canonico(texto) for texto in faltantes]
+            self._registrar(canonicos)
+            for texto, nome in zip(faltantes, canonicos):
+                self._memo[texto] = self._codigos[nome]
+            return np.array([-1 if pd.isna(texto) else self._memo[texto] for texto in textos], dtype=np.int64)
+
+    def nomes(self, codigos):
+        """Nome canônico de cada código."""
+        return [self._nomes[codigo] for codigo in codigos]
+
+    def apelidar(self, variante, nome):
+        """Faz ``variante`` (e as suas grafias equivalentes) valer como a atividade ``nome``."""
+        variante, nome = normalizar_nome(variante), self.canonico(nome)
+        if not variante or not nome:
+            raise ValueError("Variante e nome da atividade não podem ser vazios")
+        if variante == nome:
+            raise ValueError(f"'{variante}' já é o nome canônico")
+        with self._trava:
+            # Quem apontava para a variante passa a apontar para o novo nome
+            self._apelidos = {v: (nome if n == variante else n) for v, n in self._apelidos.items()}
+            self._apelidos[variante] = nome
+            self._registrar([nome])
+            self._memo.clear()
+            if self.caminho:
+                with self._conectar() as conexao:
+                    conexao.execute("UPDATE apelidos SET nome = ? WHERE nome = ?", (nome, variante))
+                    conexao.execute("INSERT OR REPLACE INTO apelidos (variante, nome) VALUES (?, ?)",
+                                    (variante, nome))
+
+    def remover_apelido(self, variante):
+        variante = normalizar_nome(variante)
+        with self._trava:
+            self._apelidos.pop(variante, None)
+            self._memo.clear()
+            if self.caminho:
+                with self._conectar() as conexao:
+                    conexao.execute("DELETE FROM apelidos WHERE variante = ?", (variante,))
+
+    def apelidos(self):
+        """DataFrame com as variantes e o nome canônico de cada uma."""
+        with self._trava:
+            linhas = sorted(self._apelidos.items())
+        return pd.DataFrame(linhas, columns=["variante", "nome"])
+
+    def atividades(self):
+        """DataFrame com o código e o nome canônico das atividades já vistas."""
+        with self._trava:
+            linhas = sorted(self._nomes.items())
+        return pd.DataFrame(linhas, columns=["codigo", "nome"])
+
+    def assinatura(self):
+        """Hash dos apelidos: muda quando o mesmo arquivo passaria a gerar outras colunas."""
+        with self._trava:
+            texto = "\n".join(f"{v}\t{n}" for v, n in sorted(self._apelidos.items()))
+        return hashlib.sha256(texto.encode("utf-8")).hexdigest()
@@ -0,0 +1,127 @@
+"""Busca ativa: alunos com pendências (``--``) nas colunas de avaliativas.
+
+A matriz de pendências (alunos x colunas de avaliativa) é montada uma única
+vez por aba. Cada coluna é fatorizada e o teste de pendência roda apenas
+sobre os seus valores distintos, que são poucos (menções e ``--``). Qualquer
+seleção de avaliativa, inclusive "Todos", vira uma redução NumPy sobre essa
+matriz, e as "Áreas com Pendência" são montadas uma vez por combinação
+distinta de áreas, não uma vez por aluno.
+"""
+import numpy as np
+import pandas as pd
+
+from pedagogico import perfil
+from pedagogico.leitura import coluna_avaliativa, farejar_esquema, ler_planilha
+from pedagogico.tipos import categorica
+
+COLUNAS_PADRAO = ["DR", "Polo", "Nome"]
+COLUNAS_ADICIONAIS = ["Etapa", "Sala", "Data último acesso"]
+COLUNA_AREAS = "Áreas com Pendência"
+
+
+def _area(coluna, avaliativa):
+    # Nome da área a partir do cabeçalho, ex.: "Avaliativa 1 - Matemática" -> "Matemática"
+    area = str(coluna).replace(f"Avaliativa {avaliativa}", "").strip()
+    if area.startswith(('-', '–', '—', ':')):
+        area = area[1:].strip()
+    return area
+
+
+def _testar_coluna(serie):
+    """Retorna (contém "--", é exatamente "--") para cada linha da coluna."""
+    if categorica(serie):
+        # Coluna compacta: o teste roda sobre a tabela de categorias
+        codigos, unicos = serie.cat.codes.to_numpy(), serie.cat.categories
+    else:
+        codigos, unicos = pd.factorize(serie)
+    textos = [str(valor) for valor in unicos]
+    contem = np.array([False] + ["--" in texto for texto in textos])
+    exata = np.array([False] + [texto.strip() == "--" for texto in textos])
+    # Código -1 (vazio) aponta para a posição 0, que é sempre False
+    return contem[codigos + 1], exata[codigos + 1]
+
+
+class MatrizPendencias:
+    """Pendências pré-calculadas de uma aba do relatório estruturado.
+
+    ``esquema`` guarda, quando houver, o resultado de ``farejar_esquema`` da leitura.
+    """
+
+    def __init__(self, df, esquema=None):
+        self.df = df
+        self.esquema = esquema
+        self.colunas = [col for col in df.columns if coluna_avaliativa(col)]
+        self._posicao = {col: i for i, col in enumerate(self.colunas)}
+        n = len(df)
+        with perfil.etapa("matriz_pendencias", entrada=df) as medida:
+            self.contem = np.zeros((n, len(self.colunas)), dtype=bool)
+            self.exata = np.zeros((n, len(self.colunas)), dtype=bool)
+            for i, col in enumerate(self.colunas):
+                self.contem[:, i], self.exata[:, i] = _testar_coluna(df[col])
+            medida.saida(self.contem)
+
+    def __sizeof__(self):
+        return int(self.df.memory_usage(deep=True).sum()) + self.contem.nbytes + self.exata.nbytes
+
+    def colunas_da_avaliativa(self, avaliativa):
+        return [col for col in self.colunas if f"avaliativa {avaliativa}" in str(col).lower()]
+
+    def colunas_exibicao(self):
+        return COLUNAS_PADRAO + [col for col in COLUNAS_ADICIONAIS if col in self.df.columns]
+
+    def pendentes(self, avaliativa):
+        """Alunos com pendência na avaliativa escolhida (1 a 4) ou em todas ("Todos").
+
+        Para uma avaliativa, entra quem tem ao menos uma coluna exatamente
+        ``--``, com a lista dessas áreas. Em "Todos", entra quem não tem
+        nenhuma entrega em nenhuma coluna de avaliativa.
+        """
+        with perfil.etapa("pendentes", entrada=self.df) as medida:
+            medida.anotar(avaliativa=avaliativa)
+            return medida.saida(self._pendentes(avaliativa))
+
+    def _pendentes(self, avaliativa):
+        if avaliativa == "Todos":
+            colunas = self.colunas
+            mask = self.contem.all(axis=1) if colunas else np.zeros(len(self.df), dtype=bool)
+            resultado = self.df.loc[mask, self.colunas_exibicao() + colunas].copy()
+            resultado[COLUNA_AREAS] = "Todas"
+            return resultado
+
+        colunas = self.colunas_da_avaliativa(avaliativa)
+        indices = [self._posicao[col] for col in colunas]
+        areas = np.array([_area(col, avaliativa) for col in colunas], dtype=object)
+
+        # Só contam colunas cujo nome gera uma área; sem nenhuma, o aluno fica de fora
+        exata = self.exata[:, indices][:, areas != ""]
+        areas = areas[areas != ""]
+        mask = exata.any(axis=1)
+
+        resultado = self.df.loc[mask, self.colunas_exibicao() + colunas].copy()
+        resultado[COLUNA_AREAS] = _juntar_areas(exata[mask], areas)
+        return resultado
+
+
+def _juntar_areas(exata, areas):
+    """Une os nomes das áreas marcadas em cada linha, calculando cada combinação uma só vez."""
+    if len(exata) == 0:
+        return np.array([], dtype=object)
+    combinacoes, inverso = np.unique(np.packbits(exata, axis=1), axis=0, return_inverse=True)
+    textos = np.array([
+        ", ".join(areas[np.unpackbits(combinacao, count=len(areas)).astype(bool)])
+        for combinacao in combinacoes
+    ], dtype=object)
+    return textos[inverso.reshape(-1)]
+
+
+def montar_matriz_pendencias(conteudo, sheet_name=0):
+    """Lê a aba e monta a sua matriz de pendências (usado com o cache de leitura).
+
+    Só as colunas exibidas e as de avaliativas são decodificadas; as de
+    tentativas, metade do relatório estruturado, ficam de fora.
+    """
+    esquema = farejar_esquema(conteudo, sheet_name)
+    colunas = [col for col in esquema["colunas"]
+               if col in COLUNAS_PADRAO + COLUNAS_ADICIONAIS or coluna_avaliativa(col)]
+    df = ler_planilha(conteudo, sheet_name, esquema["linha_cabecalho"] or 0, colunas)
+    return MatrizPendencias(df, esquema)
@@ -0,0 +1,167 @@
+"""Cache das planilhas já lidas, indexado pelo conteúdo do arquivo.
+
+O Streamlit reexecuta o app.py a cada interação com um widget; sem cache, o
+mesmo .xlsx seria decodificado de novo a cada clique. A chave é o SHA-256 dos
+bytes enviados somado às opções de leitura (aba, linha do cabeçalho...), então
+o mesmo arquivo lido de formas diferentes gera entradas distintas.
+
+A memória é limitada pelo tamanho total das entradas, com descarte da menos
+usada recentemente (LRU). Opcionalmente, as entradas também são gravadas em
+disco e recuperadas de lá quando já saíram da memória.
+"""
+import hashlib
+import io
+import json
+import os
+import pickle
+import sys
+import threading
+from collections import OrderedDict
+
+import pandas as pd
+
+from pedagogico import perfil
+
+LIMITE_PADRAO_MB = int(os.environ.get("PEDAGOGICO_CACHE_MB", "512"))
+DIRETORIO_PADRAO = os.environ.get("PEDAGOGICO_CACHE_DIR") or None
+
+
+def ler_abas(conteudo):
+    """Nomes das abas da pasta de trabalho, na ordem do arquivo."""
+    with perfil.etapa("ler_abas", entrada=conteudo) as medida, pd.ExcelFile(io.BytesIO(conteudo)) as xls:
+        return medida.saida(list(xls.sheet_names))
+
+
+def _tamanho(valor):
+    if isinstance(valor, (pd.DataFrame, pd.Series)):
+        return int(valor.memory_usage(deep=True).sum())
+    return sys.getsizeof(valor)
+
+
+def _copia_na_escrita():
+    # Sempre ligada no pandas 3 (onde ler a opção só gera aviso); no 2.x, só se a opção estiver ligada
+    if int(pd.__version__.split(".")[0]) >= 3:
+        return True
+    return pd.get_option("mode.copy_on_write") is True
+
+
+def _copiar(valor):
+    # Quem chama costuma acrescentar colunas ao DataFrame; a entrada do cache não pode mudar.
+    # Com copy-on-write, uma cópia rasa basta: os dados só são copiados se alguém os alterar.
+    if isinstance(valor, (pd.DataFrame, pd.Series)):
+        return valor.copy(deep=not _copia_na_escrita())
+    return valor
+
+
+class CacheLeitura:
+    """Cache LRU de leituras de planilhas, limitado pelo total de bytes."""
+
+    def __init__(self, limite_bytes=LIMITE_PADRAO_MB * 1024 * 1024, diretorio=DIRETORIO_PADRAO):
+        self.limite_bytes = limite_bytes
+        self.diretorio = diretorio
+        self.acertos = 0
+        self.acertos_disco = 0
+        self.falhas = 0
+        self._entradas = OrderedDict()  # chave -> (valor, tamanho)
+        self._total_bytes = 0
+        self._trava = threading.Lock()
+        if diretorio:
+            os.makedirs(diretorio, exist_ok=True)
+
+    @staticmethod
+    def chave(conteudo, leitor, **opcoes):
+        digest = hashlib.sha256(conteudo).hexdigest()
+        opcoes_txt = json.dumps(opcoes, sort_keys=True, default=str)
+        return f"{digest}:{leitor.__module__}.{leitor.__qualname__}:{opcoes_txt}"
+
+    def obter(self, conteudo, leitor, **opcoes):
+        """Retorna ``leitor(conteudo, **opcoes)``, lendo o arquivo só na primeira vez."""
+        chave = self.chave(conteudo, leitor, **opcoes)
+        valor = self.consultar(chave)
+        if valor is None:
+            valor = leitor(conteudo, **opcoes)
+            self.guardar(chave, valor)
+            valor = _copiar(valor)
+        return valor
+
+    def consultar(self, chave):
+        """Valor guardado sob ``chave`` (em memória ou em disco), ou None se não houver."""
+        with self._trava:
+            if chave in self._entradas:
+                self._entradas.move_to_end(chave)
+                self.acertos += 1
+                return _copiar(self._entradas[chave][0])
+
+        valor = self._ler_disco(chave)
+        with self._trava:
+            if valor is None:
+                self.falhas += 1
+                return None
+            self.acertos_disco += 1
+        self._guardar_memoria(chave, valor)
+        return _copiar(valor)
+
+    def guardar(self, chave, valor):
+        self._guardar_memoria(chave, valor)
+        self._gravar_disco(chave, valor)
+
+    def _guardar_memoria(self, chave, valor):
+        tamanho = _tamanho(valor)
+        if tamanho > self.limite_bytes:
+            return
+        with self._trava:
+            if chave in self._entradas:
+                self._total_bytes -= self._entradas.pop(chave)[1]
+            self._entradas[chave] = (valor, tamanho)
+            self._total_bytes += tamanho
+            while self._total_bytes > self.limite_bytes:
+                _, (_, removido) = self._entradas.popitem(last=False)
+                self._total_bytes -= removido
+
+    def _caminho(self, chave):
+        nome = hashlib.sha256(chave.encode("utf-8")).hexdigest()
+        return os.path.join(self.diretorio, f"{nome}.pkl")
+
+    def _ler_disco(self, chave):
+        if not self.diretorio:
+            return None
+        caminho = self._caminho(chave)
+        if not os.path.exists(caminho):
+            return None
+        try:
+            with open(caminho, "rb") as f:
+                return pickle.load(f)
+        except (OSError, pickle.UnpicklingError, EOFError):
+            return None
+
+    def _gravar_disco(self, chave, valor):
+        if not self.diretorio:
+            return
+        caminho = self._caminho(chave)
+        temporario = f"{caminho}.{os.getpid()}.tmp"
+        try:
+            with open(temporario, "wb") as f:
+                pickle.dump(valor, f, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(temporario, caminho)
+        except OSError:
+            if os.path.exists(temporario):
+                os.remove(temporario)
+
+    def estatisticas(self):
+        with self._trava:
+            return {
+                "acertos": self.acertos,
+                "acertos_disco": self.acertos_disco,
+                "falhas": self.falhas,
+                "entradas": len(self._entradas),
+                "bytes": self._total_bytes,
+            }
+
+    def limpar(self):
+        with self._trava:
+            self._entradas.clear()
+            self._total_bytes = 0
+
+
+# Instância compartilhada pelas ferramentas do app; sobrevive às reexecuções do script
+cache_padrao = CacheLeitura()
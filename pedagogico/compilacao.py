@@ -0,0 +1,544 @@
+"""Compilação de várias planilhas de polo em um único DataFrame.
+
+As planilhas são lidas em paralelo, num pool de processos, com o openpyxl em
+modo somente leitura (as linhas são percorridas em fluxo, sem montar o modelo
+completo da pasta de trabalho). Os resultados entram na compilação na ordem
+de upload, então o arquivo final é idêntico ao da leitura sequencial.
+
+A junção monta antes um esquema único de colunas: cabeçalhos que só diferem
+em acentos, maiúsculas ou espaços viram a mesma coluna, colunas repetidas
+numa planilha são unidas (vale o primeiro valor preenchido) e cada coluna
+recebe um tipo só, com o texto numérico convertido quando a coluna é número
+nas outras planilhas. Colunas de número e data são alocadas uma vez no tipo
+final e cada planilha copia a sua faixa; texto no mesmo tipo do pandas é
+juntado numa só operação, sem passar por objeto. As linhas idênticas a uma
+de outra planilha que veio antes (o mesmo arquivo enviado duas vezes) são
+removidas pelo hash da linha e contadas no resumo; linhas repetidas dentro
+da mesma planilha e linhas vazias ficam como estão.
+
+As planilhas lidas não ficam todas guardadas até o fim: quando as que ainda
+não entraram no compilado passam do teto de memória, elas são juntadas ao
+compilado parcial (pelo mesmo esquema único) e descartadas. As duplicadas
+saem uma vez só, no fim, sobre o compilado inteiro.
+"""
+import io
+import multiprocessing
+import os
+import re
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+
+import numpy as np
+import pandas as pd
+from openpyxl import load_workbook
+from openpyxl.cell.cell import TYPE_ERROR, TYPE_NUMERIC
+from pandas.io.parsers import TextParser
+
+from pedagogico import perfil
+from pedagogico.atividades import normalizar_nome
+from pedagogico.tipos import (COLUNAS_MENCAO, LIMITE_CARDINALIDADE, MENCOES, categorica, compactar, sem_categoria,
+                              tipo_mencao)
+
+# Texto de célula no padrão OOXML: _xHHHH_ é o caractere de código HHHH (assim o Excel e a
+# exportação gravam os caracteres de controle, e "_x005F_" é um "_" literal); o openpyxl não desfaz
+_DESESCAPAR_OOXML = re.compile(r"_x([0-9A-Fa-f]{4})_")
+
+# Quanto um .xlsx (XML compactado) costuma crescer ao virar DataFrame
+FATOR_EXPANSAO = 10
+LIMITE_MEMORIA_PADRAO_MB = 1024
+
+
+def contexto_processos():
+    """Contexto dos pools de processos do pacote, sem ``fork``.
+
+    O app chama os pools a partir de threads (ver pedagogico.tarefas), e um
+    ``fork`` de processo com threads copia travas que podem estar tomadas
+    (logging, pandas) e o filho trava. Com ``forkserver``, os processos saem
+    de um servidor sem threads que já importou o pacote; onde ele não existe
+    (Windows), ``spawn``.
+    """
+    if "forkserver" not in multiprocessing.get_all_start_methods():
+        return multiprocessing.get_context("spawn")
+    contexto = multiprocessing.get_context("forkserver")
+    # Só vale antes de o servidor subir; o __main__ (o Streamlit, a CLI) fica de fora
+    contexto.set_forkserver_preload(["pedagogico.compilacao", "pedagogico.pipeline"])
+    return contexto
+
+
+def pool_processos(max_workers=None):
+    return ProcessPoolExecutor(max_workers=max_workers, mp_context=contexto_processos())
+
+
+def conteudo_arquivo(arquivo):
+    """Retorna os bytes de um upload do Streamlit, de um caminho ou de bytes já lidos."""
+    if isinstance(arquivo, (bytes, bytearray)):
+        return bytes(arquivo)
+    if hasattr(arquivo, "getvalue"):
+        return arquivo.getvalue()
+    if hasattr(arquivo, "read"):
+        return arquivo.read()
+    with open(arquivo, "rb") as f:
+        return f.read()
+
+
+def _converter_celula(cell):
+    # Mesmas regras do leitor openpyxl do pandas, para o resultado bater com pd.read_excel
+    if cell.value is None:
+        return ""
+    if cell.data_type == TYPE_ERROR:
+        return float("nan")
+    if cell.data_type == TYPE_NUMERIC:
+        valor = int(cell.value)
+        if valor == cell.value:
+            return valor
+        return float(cell.value)
+    if isinstance(cell.value, str) and "_x" in cell.value:
+        return _DESESCAPAR_OOXML.sub(lambda achado: chr(int(achado.group(1), 16)), cell.value)
+    return cell.value
+
+
+def ler_linhas(conteudo, aba=0, limite=None, colunas=None):
+    """Lê as linhas de uma aba em modo somente leitura, já convertidas e alinhadas.
+
+    ``aba`` é o índice ou o nome da aba, como o ``sheet_name`` do read_excel;
+    com ``limite``, só as primeiras linhas são lidas. Com ``colunas``
+    (posições, em ordem crescente), cada linha traz só essas células e as
+    demais nem são convertidas; as linhas vazias do fim continuam sendo as
+    sem nenhuma célula preenchida, em qualquer coluna.
+    """
+    wb = load_workbook(io.BytesIO(conteudo), read_only=True, data_only=True, keep_links=False)
+    try:
+        ws = wb.worksheets[aba] if isinstance(aba, int) else wb[aba]
+        ws.reset_dimensions()
+        linhas = []
+        ultima_com_dados = -1
+        for numero, row in enumerate(ws.rows):
+            if limite is not None and numero >= limite:
+                break
+            if colunas is None:
+                linha = [_converter_celula(cell) for cell in row]
+                while linha and linha[-1] == "":
+                    linha.pop()
+                preenchida = bool(linha)
+            else:
+                linha = [_converter_celula(row[i]) if i < len(row) else "" for i in colunas]
+                # Só as linhas sem nada nas colunas pedidas olham as outras células
+                preenchida = (any(valor != "" for valor in linha)
+                              or any(cell.value is not None and cell.value != "" for cell in row))
+            if preenchida:
+                ultima_com_dados = numero
+            linhas.append(linha)
+    finally:
+        wb.close()
+
+    linhas = linhas[:ultima_com_dados + 1]
+    if linhas and colunas is None:
+        largura = max(len(linha) for linha in linhas)
+        linhas = [linha + [""] * (largura - len(linha)) for linha in linhas]
+    return linhas
+
+
+def processar_planilha(conteudo):
+    """Lê uma planilha de polo: descarta a linha de título e usa a seguinte como cabeçalho."""
+    linhas = ler_linhas(conteudo)
+    if not linhas:
+        return pd.DataFrame()
+    df = TextParser(linhas, header=None, skip_blank_lines=False).read()
+    # Os valores da linha 1 viram os nomes das colunas; as repetidas são unidas na junção
+    cabecalho = df.iloc[1]
+    df = df.iloc[2:].reset_index(drop=True)
+    df.columns = pd.Index(cabecalho.to_numpy(), name=0)
+    return df
+
+
+def _limpar_cabecalho(nome):
+    return " ".join(nome.split()) if isinstance(nome, str) else nome
+
+
+def _chave_cabecalho(nome):
+    # Cabeçalho vazio (NaN) vira uma chave só; texto é comparado sem acentos, maiúsculas e espaços extras
+    if not isinstance(nome, str):
+        return None if pd.isna(nome) else nome
+    return normalizar_nome(nome)
+
+
+def _tipo_de(serie):
+    if pd.api.types.is_bool_dtype(serie.dtype):
+        return "texto"
+    if pd.api.types.is_numeric_dtype(serie.dtype):
+        return "numero"
+    if pd.api.types.is_datetime64_dtype(serie.dtype):
+        return "data"
+    return "texto"
+
+
+def _tipo_coluna(pedacos, completa):
+    """Tipo final de uma coluna a partir das suas partes: (dtype, partes, se o texto virou número).
+
+    ``completa`` diz se todas as planilhas têm a coluna (senão, faltam valores).
+    """
+    tipos = {_tipo_de(serie) for serie in pedacos}
+    convertida = False
+    if (tipos == {"texto"} and any(categorica(serie) for serie in pedacos)
+            and all(categorica(serie) or pd.api.types.infer_dtype(serie, skipna=True) in ("string", "empty")
+                    for serie in pedacos)):
+        # Compilado parcial (já compacto) com planilhas novas só de texto: as categorias são unidas
+        categorias = pd.unique(np.concatenate([
+            serie.cat.categories.to_numpy(dtype=object) if categorica(serie)
+            else serie.dropna().to_numpy(dtype=object)
+            for serie in pedacos
+        ]))
+        if list(categorias[:len(MENCOES)]) == MENCOES:
+            tipo = tipo_mencao(categorias)
+        else:
+            # Mesma ordem do astype("category") do compactar
+            tipo = pd.CategoricalDtype(sorted(categorias))
+        return tipo, [serie.astype(tipo) for serie in pedacos], False
+    if tipos == {"data", "texto"} and all(
+            _tipo_de(serie) == "data" or pd.api.types.infer_dtype(serie, skipna=True) in ("datetime", "datetime64")
+            for serie in pedacos):
+        # Datas ainda em objetos (planilha nova) numa coluna que já é datetime64 (compilado parcial)
+        pedacos = [pd.to_datetime(serie) if _tipo_de(serie) == "texto" else serie for serie in pedacos]
+        tipos = {"data"}
+    if tipos == {"numero", "texto"}:
+        # Texto numérico numa coluna que é número nas outras planilhas vira número
+        convertidos = [pd.to_numeric(serie, errors="coerce") if _tipo_de(serie) == "texto" else serie
+                       for serie in pedacos]
+        if all(convertido.isna().sum() == serie.isna().sum() for convertido, serie in zip(convertidos, pedacos)):
+            # Uma parte de texto toda vazia não conta como conversão
+            convertida = any(_tipo_de(serie) == "texto" and serie.notna().any() for serie in pedacos)
+            pedacos, tipos = convertidos, {"numero"}
+
+    if tipos == {"numero"}:
+        tipo = np.result_type(*[serie.dtype for serie in pedacos])
+        if not completa or any(serie.hasnans for serie in pedacos):
+            tipo = np.result_type(tipo, np.float64)
+        return tipo, pedacos, convertida
+    if tipos == {"data"}:
+        return np.result_type(*[serie.dtype for serie in pedacos]), pedacos, False
+    dtypes = {serie.dtype for serie in pedacos}
+    if completa and len(dtypes) == 1:
+        # Todas as partes no mesmo tipo de texto do pandas (ou categoria): ele é mantido
+        return dtypes.pop(), pedacos, False
+    return np.dtype(object), pedacos, False
+
+
+def linhas_duplicadas(df, origem, hashes=None):
+    """Máscara das linhas idênticas a uma de outra planilha, que veio antes.
+
+    ``origem`` é a planilha de cada linha (códigos crescentes na ordem das
+    linhas). As linhas são comparadas pelo hash de todas as colunas
+    (``hashes``, se já calculados com ``hash_linhas``); as candidatas são
+    conferidas valor a valor com a primeira linha de mesmo hash, e só contam
+    se ela for de outra planilha. Linhas repetidas na mesma planilha e
+    linhas vazias não entram na máscara.
+    """
+    if hashes is None:
+        hashes = hash_linhas(df)
+    codigos, _ = pd.factorize(hashes)
+    _, primeira = np.unique(codigos, return_index=True)
+    origem = np.asarray(origem)
+    candidatas = np.flatnonzero(origem[primeira[codigos]] != origem)
+    iguais = np.ones(len(candidatas), dtype=bool)
+    vazias = np.ones(len(candidatas), dtype=bool)
+    originais = primeira[codigos[candidatas]]
+    for i in range(len(df.columns)):
+        coluna = df.iloc[:, i]
+        a = coluna.iloc[candidatas].to_numpy()
+        b = coluna.iloc[originais].to_numpy()
+        iguais &= (a == b) | (pd.isna(a) & pd.isna(b))
+        vazias &= pd.isna(a)
+    mascara = np.zeros(len(df), dtype=bool)
+    mascara[candidatas[iguais & ~vazias]] = True
+    return mascara
+
+
+def hash_linhas(df):
+    """Hash (uint64) de cada linha, pelos valores de todas as colunas."""
+    return pd.util.hash_pandas_object(df, index=False).to_numpy()
+
+
+def _com_lacunas(pedacos, faixas, total, tipo):
+    # Categorias vazias nas faixas das planilhas que não têm a coluna
+    completos, fim_anterior = [], 0
+    for serie, (inicio, fim) in zip(pedacos, faixas):
+        if inicio > fim_anterior:
+            completos.append(pd.Series(pd.Categorical.from_codes(np.full(inicio - fim_anterior, -1), dtype=tipo)))
+        completos.append(serie)
+        fim_anterior = fim
+    if total > fim_anterior:
+        completos.append(pd.Series(pd.Categorical.from_codes(np.full(total - fim_anterior, -1), dtype=tipo)))
+    return completos
+
+
+def juntar_planilhas(partes):
+    """Junta os DataFrames das planilhas num esquema único de colunas (ver o módulo).
+
+    Retorna (DataFrame compactado, resumo). O resumo traz ``linhas_duplicadas``
+    (removidas, ver ``linhas_duplicadas``), ``cabecalhos_unificados`` (cabeçalho original -> coluna),
+    ``colunas_repetidas`` (unidas dentro de uma planilha) e
+    ``colunas_convertidas`` (texto numérico que virou número).
+    """
+    partes = [parte for parte in partes if len(parte.columns)]
+    with perfil.etapa("juncao", entrada=partes) as medida:
+        compilado, resumo = unificar_planilhas(partes)
+        if compilado.columns.empty:
+            return compilado, resumo
+        compilado = sem_duplicadas(compilado, resumo, origem_linhas([len(parte) for parte in partes]))
+        medida.anotar(duplicadas=resumo["linhas_duplicadas"], colunas=len(compilado.columns))
+        return medida.saida(compilado), resumo
+
+
+def origem_linhas(tamanhos):
+    """Código da planilha de cada linha, a partir do número de linhas de cada uma, em ordem."""
+    return np.repeat(np.arange(len(tamanhos), dtype=np.int32), tamanhos)
+
+
+def sem_duplicadas(compilado, resumo, origem, hashes=None):
+    """O compilado sem as linhas duplicadas, contadas em ``resumo["linhas_duplicadas"]``."""
+    duplicadas = linhas_duplicadas(compilado, origem, hashes)
+    resumo["linhas_duplicadas"] = int(duplicadas.sum())
+    if resumo["linhas_duplicadas"]:
+        compilado = compilado[~duplicadas].reset_index(drop=True)
+    return compilado
+
+
+def unificar_planilhas(partes):
+    """Como ``juntar_planilhas``, mas sem remover as linhas duplicadas.
+
+    As linhas saem na ordem das partes, todas elas; ``resumo["linhas_duplicadas"]``
+    fica em zero.
+    """
+    resumo = {"linhas_duplicadas": 0, "cabecalhos_unificados": {}, "colunas_repetidas": [],
+              "colunas_convertidas": []}
+    partes = [parte for parte in partes if len(parte.columns)]
+    if not partes:
+        return pd.DataFrame(), resumo
+
+    nomes = {}      # chave do cabeçalho -> nome da coluna no compilado
+    posicoes = []   # por parte: chave -> posições das colunas com esse cabeçalho
+    for parte in partes:
+        grupos = {}
+        for i, nome in enumerate(parte.columns):
+            chave = _chave_cabecalho(nome)
+            nomes.setdefault(chave, _limpar_cabecalho(nome))
+            if isinstance(nome, str) and nome != nomes[chave]:
+                resumo["cabecalhos_unificados"][nome] = nomes[chave]
+            grupos.setdefault(chave, []).append(i)
+        posicoes.append(grupos)
+
+    inicios = np.cumsum([0] + [len(parte) for parte in partes])
+    colunas = []
+    for chave, nome in nomes.items():
+        pedacos, faixas = [], []
+        for parte, grupos, inicio, fim in zip(partes, posicoes, inicios[:-1], inicios[1:]):
+            if chave not in grupos:
+                continue
+            serie = parte.iloc[:, grupos[chave][0]]
+            for repetida in grupos[chave][1:]:
+                serie = serie.where(serie.notna(), parte.iloc[:, repetida])
+                if nome not in resumo["colunas_repetidas"]:
+                    resumo["colunas_repetidas"].append(nome)
+            pedacos.append(serie)
+            faixas.append((inicio, fim))
+        completa = len(pedacos) == len(partes)
+        tipo, pedacos, convertida = _tipo_coluna(pedacos, completa)
+        if convertida:
+            resumo["colunas_convertidas"].append(nome)
+
+        if not isinstance(tipo, np.dtype):
+            # Mesmo tipo do pandas (texto, categoria) em todas as planilhas: uma junção tipada só
+            if not completa:
+                pedacos = _com_lacunas(pedacos, faixas, inicios[-1], tipo)
+            colunas.append(pd.concat(pedacos, ignore_index=True).array)
+            continue
+        # Coluna alocada uma vez no tipo final; cada planilha copia a sua faixa
+        if completa:
+            valores = np.empty(inicios[-1], dtype=tipo)
+        else:
+            valores = np.full(inicios[-1], np.datetime64("NaT") if tipo.kind == "M" else np.nan, dtype=tipo)
+        for serie, (inicio, fim) in zip(pedacos, faixas):
+            if tipo.kind == "f":
+                valores[inicio:fim] = serie.to_numpy(dtype=tipo, na_value=np.nan)
+            elif tipo.kind == "M":
+                # A unidade (us, ns) é convertida pelo numpy; o to_numpy(dtype=) iria valor a valor
+                valores[inicio:fim] = serie.to_numpy()
+            else:
+                valores[inicio:fim] = serie.to_numpy(dtype=tipo)
+        colunas.append(valores)
+
+    compilado = pd.DataFrame(dict(enumerate(colunas)), copy=False)
+    compilado.columns = pd.Index(list(nomes.values()), name=0)
+    return compactar(compilado), resumo
+
+
+def acumular_resumo(resumo, parcial):
+    """Soma ao ``resumo`` de uma junção o de outra (as listas sem repetir nomes)."""
+    resumo["linhas_duplicadas"] += parcial["linhas_duplicadas"]
+    resumo["cabecalhos_unificados"].update(parcial["cabecalhos_unificados"])
+    for chave in ("colunas_repetidas", "colunas_convertidas"):
+        resumo[chave] += [nome for nome in parcial[chave] if nome not in resumo[chave]]
+
+
+def unificar_em_lotes(partes, limite_memoria_mb=LIMITE_MEMORIA_PADRAO_MB):
+    """Unifica as ``partes`` à medida que chegam, sem guardar todas até o fim.
+
+    Quando as partes ainda fora do compilado passam de ``limite_memoria_mb``,
+    elas são unificadas ao compilado parcial e descartadas. O resultado é o
+    de ``unificar_planilhas`` com todas as partes de uma vez.
+    """
+    limite = limite_memoria_mb * 1024 * 1024
+    compilado, resumo = unificar_planilhas([])
+    lote, custo, juncoes = [], 0, 0
+
+    def incorporar():
+        with perfil.etapa("juncao", entrada=[compilado, *lote]) as medida:
+            juntado, parcial = unificar_planilhas([compilado, *lote])
+            acumular_resumo(resumo, parcial)
+            return medida.saida(juntado)
+
+    for parte in partes:
+        lote.append(parte)
+        custo += int(parte.memory_usage(deep=True).sum())
+        if custo > limite:
+            compilado = incorporar()
+            lote, custo = [], 0
+            juncoes += 1
+    if lote:
+        compilado = incorporar()
+        juncoes += 1
+    if juncoes > 1:
+        compilado = sem_categorias_excedentes(compilado)
+    return compilado, resumo
+
+
+def sem_categorias_excedentes(compilado):
+    """Volta a texto as categorias que passaram do limite de valores distintos.
+
+    Acontece quando uma coluna virou categoria num compilado parcial e as
+    partes unificadas depois trouxeram valores novos demais.
+    """
+    compilado = compilado.copy(deep=False)
+    for i, nome in enumerate(compilado.columns):
+        serie = compilado.iloc[:, i]
+        if (categorica(serie) and nome not in COLUNAS_MENCAO
+                and serie.nunique() > LIMITE_CARDINALIDADE * len(serie)):
+            compilado.isetitem(i, sem_categoria(serie))
+    return compilado
+
+
+def juntar_em_lotes(partes, limite_memoria_mb=LIMITE_MEMORIA_PADRAO_MB):
+    """Junta as ``partes`` à medida que chegam (ver ``unificar_em_lotes``).
+
+    As linhas duplicadas saem no fim, sobre o compilado inteiro; o resultado
+    é o de ``juntar_planilhas`` com todas as partes de uma vez.
+    """
+    tamanhos = []
+
+    def contadas():
+        for parte in partes:
+            if len(parte.columns):
+                tamanhos.append(len(parte))
+            yield parte
+
+    compilado, resumo = unificar_em_lotes(contadas(), limite_memoria_mb)
+    if compilado.columns.empty:
+        return compilado, resumo
+    with perfil.etapa("duplicadas", entrada=compilado) as medida:
+        compilado = sem_duplicadas(compilado, resumo, origem_linhas(tamanhos))
+        medida.anotar(duplicadas=resumo["linhas_duplicadas"])
+        return medida.saida(compilado), resumo
+
+
+def compilar_planilhas(arquivos, max_workers=None, limite_memoria_mb=LIMITE_MEMORIA_PADRAO_MB,
+                       cache=None, progresso=None):
+    """Compila as planilhas na ordem recebida.
+
+    ``max_workers`` define o número de processos (padrão: um por núcleo, até o
+    número de arquivos). ``limite_memoria_mb`` é dividido em duas metades: uma
+    limita a memória estimada das planilhas em leitura ou aguardando a vez
+    (quando o teto é atingido, novos arquivos só são enviados ao pool depois
+    que os anteriores forem entregues); a outra, as planilhas já lidas que
+    ainda não entraram no compilado (ver ``juntar_em_lotes``). Só o próprio
+    compilado, compacto, fica fora do teto. Com um ``cache`` (ver
+    pedagogico.cache), planilhas já lidas antes não voltam ao pool. Retorna
+    (compilado, resumo), como ``juntar_planilhas``: o compilado sai
+    compactado (ver pedagogico.tipos) e sem linhas duplicadas.
+    ``progresso(feitos, total, mensagem)``, se dado, é chamado a cada
+    planilha lida.
+    """
+    arquivos = list(arquivos)
+
+    def lidas():
+        for feitos, df in enumerate(ler_planilhas(arquivos, max_workers, limite_memoria_mb / 2, cache), start=1):
+            if progresso is not None:
+                progresso(feitos, len(arquivos), f"{feitos} de {len(arquivos)} planilha(s) lida(s)")
+            yield df
+
+    with perfil.etapa("compilacao", entrada=arquivos) as medida:
+        compilado, resumo = juntar_em_lotes(lidas(), limite_memoria_mb / 2)
+        medida.saida(compilado)
+        return compilado, resumo
+
+
+def ler_planilhas(arquivos, max_workers=None, limite_memoria_mb=LIMITE_MEMORIA_PADRAO_MB, cache=None):
+    """Gera o DataFrame de cada planilha, na ordem recebida (ver ``compilar_planilhas``)."""
+    arquivos = list(arquivos)
+    if not arquivos:
+        return
+
+    if max_workers is None:
+        max_workers = os.cpu_count() or 1
+    max_workers = max(1, min(max_workers, len(arquivos)))
+
+    if max_workers == 1:
+        for arquivo in arquivos:
+            conteudo = conteudo_arquivo(arquivo)
+            if cache is None:
+                yield processar_planilha(conteudo)
+            else:
+                yield cache.obter(conteudo, processar_planilha)
+        return
+
+    limite = limite_memoria_mb * 1024 * 1024
+    prontos = {}      # índice -> (DataFrame, custo) aguardando a vez na ordem de upload
+    em_leitura = {}   # future -> (índice, custo, chave do cache)
+    custo_total = 0
+    proximo = 0
+    fila = enumerate(arquivos)
+    pendente = next(fila, None)
+
+    with pool_processos(max_workers) as pool:
+        while pendente is not None or em_leitura:
+            while pendente is not None and len(em_leitura) < max_workers:
+                indice, arquivo = pendente
+                conteudo = conteudo_arquivo(arquivo)
+                chave = None
+                if cache is not None:
+                    chave = cache.chave(conteudo, processar_planilha)
+                    df = cache.consultar(chave)
+                    if df is not None:
+                        prontos[indice] = (df, 0)
+                        pendente = next(fila, None)
+                        continue
+                custo = len(conteudo) * FATOR_EXPANSAO
+                # Sempre há ao menos um arquivo em andamento, mesmo acima do teto
+                if (em_leitura or prontos) and custo_total + custo > limite:
+                    break
+                em_leitura[pool.submit(processar_planilha, conteudo)] = (indice, custo, chave)
+                custo_total += custo
+                pendente = next(fila, None)
+
+            if em_leitura:
+                concluidos, _ = wait(em_leitura, return_when=FIRST_COMPLETED)
+                for futuro in concluidos:
+                    indice, custo, chave = em_leitura.pop(futuro)
+                    df = futuro.result()
+                    if chave is not None:
+                        cache.guardar(chave, df)
+                    prontos[indice] = (df, custo)
+
+            while proximo in prontos:
+                df, custo = prontos.pop(proximo)
+                yield df
+                custo_total -= custo
+                proximo += 1
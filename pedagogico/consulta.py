@@ -0,0 +1,92 @@
+"""Consulta aos resultados: filtros por DR, Polo, Etapa e Sala, ordenação e páginas.
+
+O ``IndiceResultado`` é montado uma vez por resultado. Cada coluna de filtro
+é fatorizada e as linhas são agrupadas por valor (posições ordenadas pelo
+código), de modo que filtrar é juntar as posições dos valores escolhidos,
+sem varrer o texto. A ordem de cada coluna é calculada na primeira vez em
+que ela é usada para ordenar e guardada como o posto de cada linha;
+ordenar um subconjunto é só ordenar esses postos. Só a página pedida vira
+um DataFrame novo, e o resultado de origem nunca é recalculado.
+"""
+import numpy as np
+import pandas as pd
+
+from pedagogico import perfil
+
+COLUNAS_FILTRO = ["DR", "Polo", "Etapa", "Sala"]
+
+
+def _ordenar(serie, crescente):
+    try:
+        return serie.sort_values(ascending=crescente, kind="stable", na_position="last")
+    except TypeError:
+        # Colunas com tipos misturados (texto e número) são ordenadas como texto
+        return serie.sort_values(ascending=crescente, kind="stable", na_position="last",
+                                 key=lambda valores: valores.astype(str).where(valores.notna()))
+
+
+class IndiceResultado:
+    """Grupos de linhas por valor das colunas de filtro de um DataFrame."""
+
+    def __init__(self, df, colunas=COLUNAS_FILTRO):
+        self.df = df
+        self.colunas = [col for col in colunas if col in df.columns]
+        self._grupos = {}   # coluna -> (valores, código de cada linha, linhas por código, limites)
+        self._postos = {}   # (coluna, crescente) -> posto de cada linha
+        with perfil.etapa("indice_resultado", entrada=df):
+            for col in self.colunas:
+                try:
+                    codigos, valores = pd.factorize(df[col], sort=True)
+                except TypeError:
+                    codigos, valores = pd.factorize(df[col])
+                ordem = np.argsort(codigos, kind="stable")
+                # Linhas do código c: ordem[limites[c]:limites[c + 1]] (vazios, -1, ficam antes)
+                limites = np.searchsorted(codigos[ordem], np.arange(len(valores) + 1))
+                self._grupos[col] = (pd.Index(valores), codigos, ordem, limites)
+
+    def __len__(self):
+        return len(self.df)
+
+    def filtrar(self, filtros):
+        """Posições, em ordem, das linhas que passam em todos os filtros.
+
+        ``filtros`` é um dicionário coluna -> valores aceitos; lista vazia
+        (ou coluna ausente do índice) não filtra.
+        """
+        mascara = None
+        for col, aceitos in filtros.items():
+            if not aceitos or col not in self._grupos:
+                continue
+            valores, _, ordem, limites = self._grupos[col]
+            selecionada = np.zeros(len(self.df), dtype=bool)
+            for codigo in valores.get_indexer(list(aceitos)):
+                if codigo >= 0:
+                    selecionada[ordem[limites[codigo]:limites[codigo + 1]]] = True
+            mascara = selecionada if mascara is None else mascara & selecionada
+        if mascara is None:
+            return np.arange(len(self.df))
+        return np.flatnonzero(mascara)
+
+    def valores(self, coluna, filtros=None):
+        """Valores de ``coluna`` presentes nas linhas que passam pelos filtros das outras colunas."""
+        valores, codigos, _, _ = self._grupos[coluna]
+        outros = {col: aceitos for col, aceitos in (filtros or {}).items() if col != coluna}
+        presentes = np.unique(codigos[self.filtrar(outros)])
+        return valores[presentes[presentes >= 0]].tolist()
+
+    def ordenar(self, linhas, coluna, crescente=True):
+        """As ``linhas`` na ordem de ``coluna`` (vazios por último; empates na ordem original)."""
+        chave = (coluna, crescente)
+        if chave not in self._postos:
+            # Índice posicional: o do resultado pode ter rótulos repetidos ou fora de ordem
+            serie = self.df[coluna].reset_index(drop=True)
+            ordem = _ordenar(serie, crescente).index.to_numpy()
+            posto = np.empty(len(self.df), dtype=np.int64)
+            posto[ordem] = np.arange(len(self.df))
+            self._postos[chave] = posto
+        return linhas[np.argsort(self._postos[chave][linhas], kind="stable")]
+
+    def pagina(self, linhas, numero, tamanho):
+        """DataFrame da página ``numero`` (a partir de 1) com ``tamanho`` linhas."""
+        inicio = (numero - 1) * tamanho
+        return self.df.iloc[linhas[inicio:inicio + tamanho]]
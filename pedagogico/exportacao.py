@@ -0,0 +1,328 @@
+"""Exportação dos resultados para download, com memória constante.
+
+O ``to_excel`` do pandas monta o modelo de objetos completo do openpyxl antes
+de gravar, o que ocupa várias vezes o tamanho dos dados e serializa célula por
+célula. Aqui o XML da planilha é gerado em blocos de linhas, coluna a coluna,
+e gravado direto no zip do .xlsx; o CSV (opcionalmente com gzip) também é
+escrito em blocos. O arquivo é montado num arquivo temporário (em disco
+quando passa de ``LIMITE_SPOOL``) e devolvido aberto, sem ser lido de volta
+para a memória: quem chama copia os blocos para o destino (``copiar``).
+"""
+import codecs
+import datetime
+import gzip
+import numbers
+import re
+import shutil
+import tempfile
+import zipfile
+from xml.sax.saxutils import escape, quoteattr
+
+import numpy as np
+import pandas as pd
+
+from pedagogico import perfil
+
+MIME_XLSX = "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+
+# formato -> (extensão, tipo MIME)
+FORMATOS = {
+    "xlsx": ("xlsx", MIME_XLSX),
+    "csv": ("csv", "text/csv"),
+    "csv.gz": ("csv.gz", "application/gzip"),
+}
+
+TAMANHO_BLOCO = 10_000
+# Até este tamanho o arquivo temporário fica em memória
+LIMITE_SPOOL = 16 * 1024 * 1024
+
+# CSV no padrão do Excel em português: ponto e vírgula, vírgula decimal e BOM UTF-8
+OPCOES_CSV = {"sep": ";", "decimal": ",", "index": False, "encoding": "utf-8", "mode": "wb"}
+
+# Índices de estilo definidos em _ESTILOS
+_ESTILO_CABECALHO = 1
+_ESTILO_DATA_HORA = 2
+_ESTILO_DATA = 3
+
+_EPOCA_EXCEL = datetime.datetime(1899, 12, 30)
+_EPOCA_EXCEL_NS = np.datetime64("1899-12-30", "ns")
+_NS_POR_DIA = 86_400 * 10**9
+
+# Caracteres de controle não são permitidos em XML
+_CARACTERES_INVALIDOS = re.compile(r"[\x00-\x08\x0b\x0c\x0e-\x1f]")
+# No texto das células eles vão como _xHHHH_ (OOXML), e um "_xHHHH_" literal tem o "_" escapado
+_ESCAPAR_OOXML = re.compile(r"[\x00-\x08\x0b\x0c\x0e-\x1f]|_(?=x[0-9A-Fa-f]{4}_)")
+
+_NS_MAIN = "http://schemas.openxmlformats.org/spreadsheetml/2006/main"
+_NS_REL = "http://schemas.openxmlformats.org/officeDocument/2006/relationships"
+_NS_PKG_REL = "http://schemas.openxmlformats.org/package/2006/relationships"
+
+_CONTENT_TYPES = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+    '<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">'
+    '<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>'
+    '<Default Extension="xml" ContentType="application/xml"/>'
+    '<Override PartName="/xl/workbook.xml" '
+    'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet.main+xml"/>'
+    '<Override PartName="/xl/worksheets/sheet1.xml" '
+    'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.worksheet+xml"/>'
+    '<Override PartName="/xl/styles.xml" '
+    'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.styles+xml"/>'
+    '</Types>'
+)
+_RELS = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+    f'<Relationships xmlns="{_NS_PKG_REL}">'
+    f'<Relationship Id="rId1" Type="{_NS_REL}/officeDocument" Target="xl/workbook.xml"/>'
+    '</Relationships>'
+)
+_WORKBOOK_RELS = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+    f'<Relationships xmlns="{_NS_PKG_REL}">'
+    f'<Relationship Id="rId1" Type="{_NS_REL}/worksheet" Target="worksheets/sheet1.xml"/>'
+    f'<Relationship Id="rId2" Type="{_NS_REL}/styles" Target="styles.xml"/>'
+    '</Relationships>'
+)
+# Cabeçalho em negrito, com borda fina e centralizado, como no to_excel do pandas
+_ESTILOS = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+    f'<styleSheet xmlns="{_NS_MAIN}">'
+    '<numFmts count="2"><numFmt numFmtId="164" formatCode="yyyy-mm-dd h:mm:ss"/>'
+    '<numFmt numFmtId="165" formatCode="yyyy-mm-dd"/></numFmts>'
+    '<fonts count="2"><font><sz val="11"/><name val="Calibri"/></font>'
+    '<font><b/><sz val="11"/><name val="Calibri"/></font></fonts>'
+    '<fills count="2"><fill><patternFill patternType="none"/></fill>'
+    '<fill><patternFill patternType="gray125"/></fill></fills>'
+    '<borders count="2"><border><left/><right/><top/><bottom/><diagonal/></border>'
+    '<border><left style="thin"/><right style="thin"/><top style="thin"/><bottom style="thin"/>'
+    '<diagonal/></border></borders>'
+    '<cellStyleXfs count="1"><xf numFmtId="0" fontId="0" fillId="0" borderId="0"/></cellStyleXfs>'
+    '<cellXfs count="4"><xf numFmtId="0" fontId="0" fillId="0" borderId="0" xfId="0"/>'
+    '<xf numFmtId="0" fontId="1" fillId="0" borderId="1" xfId="0" applyFont="1" applyBorder="1" '
+    'applyAlignment="1"><alignment horizontal="center" vertical="top"/></xf>'
+    '<xf numFmtId="164" fontId="0" fillId="0" borderId="0" xfId="0" applyNumberFormat="1"/>'
+    '<xf numFmtId="165" fontId="0" fillId="0" borderId="0" xfId="0" applyNumberFormat="1"/>'
+    '</cellXfs><cellStyles count="1"><cellStyle name="Normal" xfId="0" builtinId="0"/></cellStyles>'
+    '</styleSheet>'
+)
+
+
+def _blocos(df, tamanho_bloco):
+    for inicio in range(0, len(df), tamanho_bloco):
+        yield df.iloc[inicio:inicio + tamanho_bloco]
+
+
+def _informar(progresso, escritas, total):
+    if progresso is not None:
+        progresso(escritas, total, f"{escritas} de {total} linha(s) gravada(s)")
+
+
+def _letra_coluna(indice):
+    letras = ""
+    indice += 1
+    while indice:
+        indice, resto = divmod(indice - 1, 26)
+        letras = chr(65 + resto) + letras
+    return letras
+
+
+def _escapar_ooxml(texto):
+    return _ESCAPAR_OOXML.sub(lambda achado: f"_x{ord(achado.group()):04X}_", texto)
+
+
+def _texto(valor):
+    texto = escape(_escapar_ooxml(str(valor)))
+    return f' t="inlineStr"><is><t xml:space="preserve">{texto}</t></is></c>'
+
+
+def _numero(valor):
+    if np.isnan(valor):
+        return ""
+    if np.isinf(valor):
+        # O to_excel grava infinitos como texto
+        return _texto("inf" if valor > 0 else "-inf")
+    return f"><v>{valor!r}</v></c>"
+
+
+def _celula(valor):
+    """Corpo da tag <c> para um valor qualquer ('' quando a célula fica vazia)."""
+    if valor is None or valor is pd.NaT:
+        return ""
+    if isinstance(valor, (bool, np.bool_)):
+        return f' t="b"><v>{int(valor)}</v></c>'
+    if isinstance(valor, numbers.Integral):
+        return f"><v>{int(valor)}</v></c>"
+    if isinstance(valor, numbers.Real):
+        return _numero(float(valor))
+    if isinstance(valor, datetime.datetime):
+        serial = (valor.replace(tzinfo=None) - _EPOCA_EXCEL) / datetime.timedelta(days=1)
+        return f' s="{_ESTILO_DATA_HORA}"><v>{serial!r}</v></c>'
+    if isinstance(valor, datetime.date):
+        serial = (valor - _EPOCA_EXCEL.date()).days
+        return f' s="{_ESTILO_DATA}"><v>{serial}</v></c>'
+    if isinstance(valor, np.datetime64):
+        return _celula(pd.Timestamp(valor))
+    return _texto(valor)
+
+
+def _corpos_coluna(serie):
+    """Corpos das células de uma coluna do bloco, vetorizado pelo tipo da coluna."""
+    if isinstance(serie.dtype, pd.CategoricalDtype):
+        # Coluna compacta: formata cada categoria uma vez e espalha pelos códigos
+        formatados = np.array([_celula(v) for v in serie.cat.categories] + [""], dtype=object)
+        return formatados[serie.cat.codes.to_numpy()]
+    valores = serie.to_numpy()
+    if serie.dtype.kind == "b":
+        return np.where(valores, ' t="b"><v>1</v></c>', ' t="b"><v>0</v></c>')
+    if serie.dtype.kind in "iu":
+        return ("><v>" + serie.astype(str) + "</v></c>").to_numpy(dtype=object)
+    if serie.dtype.kind == "f":
+        corpos = np.array([repr(float(v)) for v in valores], dtype=object)
+        corpos = "><v>" + corpos + "</v></c>"
+        especiais = ~np.isfinite(valores)
+        corpos[especiais] = [_numero(v) for v in valores[especiais]]
+        return corpos
+    if serie.dtype.kind == "M" and getattr(serie.dtype, "tz", None) is None:
+        serial = (valores.astype("datetime64[ns]") - _EPOCA_EXCEL_NS).astype(np.int64) / _NS_POR_DIA
+        corpos = np.array([f' s="{_ESTILO_DATA_HORA}"><v>{v!r}</v></c>' for v in serial.tolist()],
+                          dtype=object)
+        corpos[pd.isna(valores)] = ""
+        return corpos
+    # Texto e colunas mistas: cada valor distinto é formatado uma única vez
+    codigos, unicos = pd.factorize(serie)
+    formatados = np.array([_celula(v) for v in unicos] + [""], dtype=object)
+    return formatados[codigos]
+
+
+def _celula_cabecalho(referencia, valor):
+    corpo = _celula(valor)
+    if not corpo or ' s="' in corpo:
+        # Rótulos vazios ou datas: o cabeçalho tem estilo próprio, então vai como texto
+        corpo = _texto("" if not corpo else valor)
+    return f'<c r="{referencia}" s="{_ESTILO_CABECALHO}"{corpo}'
+
+
+def escrever_xlsx(df, destino, nome_aba="Sheet1", tamanho_bloco=TAMANHO_BLOCO, titulo=None, progresso=None):
+    """Grava o DataFrame como .xlsx; ``titulo`` vira uma linha acima do cabeçalho.
+
+    Caracteres de controle no texto das células são gravados como ``_xHHHH_``,
+    que o Excel mostra como o caractere original (e a leitura do app, em
+    ``compilacao.ler_linhas``, também desfaz); no nome da aba, eles levantam
+    ValueError.
+    """
+    letras = [_letra_coluna(i) for i in range(df.shape[1])]
+    if _CARACTERES_INVALIDOS.search(str(nome_aba)):
+        raise ValueError(f"Nome de aba com caracteres de controle: {nome_aba!r}")
+    nome_aba = quoteattr(str(nome_aba)[:31])
+
+    with zipfile.ZipFile(destino, "w", compression=zipfile.ZIP_DEFLATED) as pacote:
+        pacote.writestr("[Content_Types].xml", _CONTENT_TYPES)
+        pacote.writestr("_rels/.rels", _RELS)
+        pacote.writestr("xl/_rels/workbook.xml.rels", _WORKBOOK_RELS)
+        pacote.writestr("xl/styles.xml", _ESTILOS)
+        pacote.writestr(
+            "xl/workbook.xml",
+            '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+            f'<workbook xmlns="{_NS_MAIN}" xmlns:r="{_NS_REL}"><sheets>'
+            f'<sheet name={nome_aba} sheetId="1" r:id="rId1"/></sheets></workbook>'
+        )
+
+        with pacote.open("xl/worksheets/sheet1.xml", "w") as planilha:
+            planilha.write((
+                '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+                f'<worksheet xmlns="{_NS_MAIN}"><sheetData>'
+            ).encode("utf-8"))
+
+            numero_linha = 1
+            if titulo is not None:
+                planilha.write(f'<row r="1"><c r="A1"{_texto(titulo)}</row>'.encode("utf-8"))
+                numero_linha = 2
+
+            cabecalho = "".join(
+                _celula_cabecalho(f"{letra}{numero_linha}", col) for letra, col in zip(letras, df.columns)
+            )
+            planilha.write(f'<row r="{numero_linha}">{cabecalho}</row>'.encode("utf-8"))
+            numero_linha += 1
+            primeira_linha = numero_linha
+
+            for bloco in _blocos(df, tamanho_bloco):
+                colunas = [_corpos_coluna(bloco.iloc[:, i]) for i in range(bloco.shape[1])]
+                linhas = []
+                for corpos in zip(*colunas):
+                    celulas = "".join(
+                        f'<c r="{letra}{numero_linha}"{corpo}'
+                        for letra, corpo in zip(letras, corpos) if corpo
+                    )
+                    linhas.append(f'<row r="{numero_linha}">{celulas}</row>')
+                    numero_linha += 1
+                planilha.write("".join(linhas).encode("utf-8"))
+                _informar(progresso, numero_linha - primeira_linha, len(df))
+
+            planilha.write(b"</sheetData></worksheet>")
+
+
+def escrever_csv(df, destino, tamanho_bloco=TAMANHO_BLOCO, progresso=None):
+    destino.write(codecs.BOM_UTF8)
+    if len(df) == 0:
+        df.to_csv(destino, **OPCOES_CSV)
+    escritas = 0
+    for i, bloco in enumerate(_blocos(df, tamanho_bloco)):
+        bloco.to_csv(destino, header=(i == 0), **OPCOES_CSV)
+        escritas += len(bloco)
+        _informar(progresso, escritas, len(df))
+
+
+def exportar(df, formato="xlsx", colunas=None, nome_aba="Sheet1", tamanho_bloco=TAMANHO_BLOCO, progresso=None):
+    """Gera o arquivo de download e o retorna aberto, posicionado no início.
+
+    O retorno é um ``SpooledTemporaryFile`` (em disco acima de
+    ``LIMITE_SPOOL``), que quem chama deve fechar. ``colunas`` restringe (e
+    ordena) as colunas exportadas; ``formato`` é uma das chaves de
+    ``FORMATOS``. ``progresso(feitos, total, mensagem)`` é chamado a cada
+    bloco gravado.
+    """
+    if formato not in FORMATOS:
+        raise ValueError(f"Formato de exportação desconhecido: {formato}")
+    if colunas is not None:
+        df = df[list(colunas)]
+
+    arquivo = tempfile.SpooledTemporaryFile(max_size=LIMITE_SPOOL)
+    try:
+        with perfil.etapa("exportacao", entrada=df) as medida:
+            medida.anotar(formato=formato)
+            if formato == "xlsx":
+                escrever_xlsx(df, arquivo, nome_aba=nome_aba, tamanho_bloco=tamanho_bloco, progresso=progresso)
+            elif formato == "csv":
+                escrever_csv(df, arquivo, tamanho_bloco=tamanho_bloco, progresso=progresso)
+            else:
+                with gzip.GzipFile(fileobj=arquivo, mode="wb", compresslevel=6) as compactado:
+                    escrever_csv(df, compactado, tamanho_bloco=tamanho_bloco, progresso=progresso)
+            medida.anotar(bytes_saida=arquivo.tell())
+    except BaseException:
+        arquivo.close()
+        raise
+    arquivo.seek(0)
+    return arquivo
+
+
+def tamanho(arquivo):
+    """Tamanho em bytes de um arquivo retornado por ``exportar``."""
+    posicao = arquivo.tell()
+    arquivo.seek(0, 2)
+    total = arquivo.tell()
+    arquivo.seek(posicao)
+    return total
+
+
+def copiar(arquivo, destino):
+    """Copia o arquivo exportado para ``destino`` (aberto em modo binário), em blocos, do início."""
+    arquivo.seek(0)
+    shutil.copyfileobj(arquivo, destino)
+
+
+def nome_arquivo(base, formato):
+    return f"{base}.{FORMATOS[formato][0]}"
+
+
+def tipo_mime(formato):
+    return FORMATOS[formato][1]
@@ -0,0 +1,537 @@
+"""Histórico dos estudantes: retratos sucessivos guardados como mudanças.
+
+Cada registro (uma execução da Busca Ativa, do risco ou do pipeline) é um
+retrato, por ``Aluno_ID``, das menções e tentativas de cada atividade e dos
+percentuais de CH e da classificação de risco. A base SQLite guarda o
+estado atual de cada (aluno, campo) e, por execução, só os valores que
+mudaram em relação a ele. Uma assinatura (hash) por aluno e tipo de campo
+separa os alunos cujo retrato não mudou; só os demais são comparados ao
+estado, e apenas as diferenças são gravadas. Índices por aluno e por DR/Polo
+atendem as consultas de um estudante ou de um polo sem varrer a base.
+
+"Quem ficou pendente desde a semana passada" sai das mudanças entre duas
+execuções (o valor antes da primeira e o depois da última), sem reabrir
+planilhas antigas. Os retratos devem ser registrados em ordem de data.
+"""
+import contextlib
+import datetime
+import hashlib
+import os
+import sqlite3
+
+import numpy as np
+import pandas as pd
+
+from pedagogico import perfil
+from pedagogico.leitura import coluna_avaliativa, coluna_tentativas
+from pedagogico.reestruturacao import COLUNAS_ALUNO, aluno_id
+from pedagogico.risco import CLASSES
+
+CAMINHO_PADRAO = os.environ.get("PEDAGOGICO_HISTORICO") or os.path.join(".pedagogico", "historico.sqlite")
+
+TIPO_MENCAO = "mencao"
+TIPO_TENTATIVAS = "tentativas"
+TIPO_RISCO = "risco"
+CAMPOS_RISCO = ["Percentual_Atual", "Percentual_Final_Possivel", "Classificacao"]
+SUFIXO_TENTATIVAS = "_Tentativas"
+PENDENTE = "--"
+
+_ESQUEMA = """
+CREATE TABLE IF NOT EXISTS execucoes (
+    id INTEGER PRIMARY KEY,
+    data TEXT NOT NULL,
+    origem TEXT NOT NULL,
+    alunos INTEGER NOT NULL,
+    mudancas INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS alunos (
+    id INTEGER PRIMARY KEY,
+    aluno_id TEXT NOT NULL UNIQUE,
+    dr TEXT,
+    polo TEXT,
+    nome TEXT
+);
+CREATE INDEX IF NOT EXISTS alunos_polo ON alunos (polo, dr);
+CREATE TABLE IF NOT EXISTS campos (
+    id INTEGER PRIMARY KEY,
+    tipo TEXT NOT NULL,
+    nome TEXT NOT NULL,
+    UNIQUE (tipo, nome)
+);
+CREATE TABLE IF NOT EXISTS estado (
+    aluno INTEGER NOT NULL REFERENCES alunos(id),
+    campo INTEGER NOT NULL REFERENCES campos(id),
+    valor NOT NULL,
+    execucao INTEGER NOT NULL,
+    PRIMARY KEY (aluno, campo)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS mudancas (
+    execucao INTEGER NOT NULL REFERENCES execucoes(id) ON DELETE CASCADE,
+    aluno INTEGER NOT NULL REFERENCES alunos(id),
+    campo INTEGER NOT NULL REFERENCES campos(id),
+    anterior,
+    valor,
+    PRIMARY KEY (execucao, aluno, campo)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS mudancas_aluno ON mudancas (aluno, execucao);
+CREATE TABLE IF NOT EXISTS assinaturas (
+    aluno INTEGER NOT NULL REFERENCES alunos(id),
+    tipo TEXT NOT NULL,
+    conjunto INTEGER NOT NULL,
+    hash INTEGER NOT NULL,
+    PRIMARY KEY (aluno, tipo)
+) WITHOUT ROWID;
+"""
+
+
+def _alunos(df):
+    """Aluno_ID, DR, Polo e Nome, uma linha por aluno (a primeira em que ele aparece)."""
+    ids = aluno_id(df)
+    unicos = ids.notna().to_numpy() & ~ids.duplicated().to_numpy()
+    alunos = pd.DataFrame({"Aluno_ID": ids[unicos].astype(str)})
+    for col in ["DR", "Polo", "Nome"]:
+        serie = df[col][unicos] if col in df.columns else pd.Series(np.nan, index=alunos.index)
+        alunos[col] = serie.astype(object).where(serie.notna(), None).to_numpy()
+    return alunos.reset_index(drop=True), unicos
+
+
+def _valores(serie, tipo):
+    """Posições (alunos) e valores preenchidos de uma coluna do retrato."""
+    preenchidos = serie.notna().to_numpy()
+    if tipo == TIPO_TENTATIVAS:
+        # Nenhuma tentativa é o mesmo que nenhum registro: não ocupa a base
+        preenchidos = preenchidos & (serie != 0).to_numpy()
+    valores = serie[preenchidos]
+    if tipo == TIPO_TENTATIVAS:
+        # Inteiro sempre, lido da planilha (float) ou vindo da reestruturação
+        valores = valores.astype(np.int64)
+    elif isinstance(valores.dtype, pd.CategoricalDtype) or valores.dtype == object:
+        valores = valores.astype(str)
+    # astype(object) devolve escalares do Python, que o sqlite3 sabe gravar
+    return np.flatnonzero(preenchidos), valores.astype(object).to_numpy()
+
+
+def _retrato(alunos, colunas):
+    """Monta o retrato a partir de (tipo, campo, série por aluno) de cada coluna.
+
+    O retrato é um dicionário com ``alunos`` (Aluno_ID, DR, Polo, Nome),
+    ``campos`` (tipo, campo) e ``valores``, no formato longo, em que
+    ``aluno`` e ``campo`` são as posições nas duas primeiras tabelas.
+    """
+    posicoes, valores = [], []
+    for tipo, _, serie in colunas:
+        posicao, valor = _valores(serie, tipo)
+        posicoes.append(posicao)
+        valores.append(valor)
+    tamanhos = [len(posicao) for posicao in posicoes]
+    return {
+        "alunos": alunos,
+        "campos": pd.DataFrame([(tipo, campo) for tipo, campo, _ in colunas], columns=["tipo", "campo"]),
+        "valores": pd.DataFrame({
+            "aluno": np.concatenate(posicoes) if posicoes else np.array([], dtype=np.int64),
+            "campo": np.repeat(np.arange(len(colunas)), tamanhos),
+            "valor": np.concatenate(valores) if valores else np.array([], dtype=object),
+        }),
+    }
+
+
+def retrato_relatorio(df):
+    """Retrato do relatório estruturado: menção e tentativas de cada atividade, por aluno.
+
+    As colunas ``<atividade>_Tentativas`` são as tentativas; as demais, fora
+    das colunas do aluno, são as menções.
+    """
+    alunos, unicos = _alunos(df)
+    colunas = []
+    for col in df.columns:
+        if col in COLUNAS_ALUNO:
+            continue
+        serie = df[col][unicos].reset_index(drop=True)
+        if coluna_tentativas(col):
+            nome = str(col)[:-len(SUFIXO_TENTATIVAS)] if str(col).endswith(SUFIXO_TENTATIVAS) else str(col)
+            colunas.append((TIPO_TENTATIVAS, nome, pd.to_numeric(serie, errors="coerce")))
+        else:
+            colunas.append((TIPO_MENCAO, str(col), serie))
+    return _retrato(alunos, colunas)
+
+
+def retrato_risco(df):
+    """Retrato do resultado do risco: percentuais e classificação, por aluno."""
+    alunos, unicos = _alunos(df)
+    colunas = [(TIPO_RISCO, col, df[col][unicos].reset_index(drop=True))
+               for col in CAMPOS_RISCO if col in df.columns]
+    return _retrato(alunos, colunas)
+
+
+def _juntar_retratos(retratos):
+    """Um só retrato: alunos e campos repetidos entre os retratos viram uma linha (vale o último)."""
+    if not retratos:
+        raise ValueError("Nenhum retrato para registrar")
+    alunos = pd.concat([r["alunos"] for r in retratos], ignore_index=True)
+    campos = pd.concat([r["campos"] for r in retratos], ignore_index=True)
+    codigo_aluno, ids = pd.factorize(alunos["Aluno_ID"])
+    codigo_campo, _ = pd.MultiIndex.from_frame(campos).factorize()
+    inicio_aluno = np.cumsum([0] + [len(r["alunos"]) for r in retratos])
+    inicio_campo = np.cumsum([0] + [len(r["campos"]) for r in retratos])
+    valores = pd.DataFrame({
+        "aluno": np.concatenate([codigo_aluno[inicio + r["valores"]["aluno"].to_numpy()]
+                                 for inicio, r in zip(inicio_aluno, retratos)]),
+        "campo": np.concatenate([codigo_campo[inicio + r["valores"]["campo"].to_numpy()]
+                                 for inicio, r in zip(inicio_campo, retratos)]),
+        "valor": np.concatenate([r["valores"]["valor"].to_numpy() for r in retratos]),
+    })
+    ultimo_aluno = pd.Series(np.arange(len(alunos))).groupby(codigo_aluno).last().to_numpy()
+    ultimo_campo = pd.Series(np.arange(len(campos))).groupby(codigo_campo).last().to_numpy()
+    valores = valores.drop_duplicates(["aluno", "campo"], keep="last")
+    return (alunos.iloc[ultimo_aluno].reset_index(drop=True), campos.iloc[ultimo_campo].reset_index(drop=True),
+            valores)
+
+
+def _assinaturas(posicao, campo, codigo_tipo, valor, n_alunos, n_tipos):
+    """Hash dos pares (campo, valor) de cada aluno e tipo: matriz int64 (alunos × tipos).
+
+    A soma dos hashes dos pares não depende da ordem das linhas; o hash de
+    cada valor é o do pandas (estável entre execuções) e o campo entra pelo
+    seu código na base.
+    """
+    with np.errstate(over="ignore"):
+        par = pd.util.hash_pandas_object(pd.Series(valor, dtype=object), index=False, categorize=True).to_numpy()
+        par = par + campo.astype(np.uint64) * np.uint64(0x9E3779B97F4A7C15)
+        par = (par ^ (par >> np.uint64(31))) * np.uint64(0xBF58476D1CE4E5B9)
+        par ^= par >> np.uint64(29)
+        hashes = np.zeros((n_alunos, n_tipos), dtype=np.uint64)
+        np.add.at(hashes, (posicao, codigo_tipo), par)
+    return hashes.view(np.int64)
+
+
+def _conjunto(campos):
+    """Identifica o conjunto de campos de um tipo no retrato (inteiro de 64 bits)."""
+    texto = ",".join(str(campo) for campo in np.unique(campos))
+    return int.from_bytes(hashlib.sha256(texto.encode("ascii")).digest()[:8], "big", signed=True)
+
+
+def data_iso(data=None):
+    """A data no formato AAAA-MM-DD (padrão: hoje); ValueError se não for uma data válida.
+
+    Aceita texto ISO ou ``datetime.date``. As datas são comparadas como texto
+    na base, então só o formato normalizado garante a ordem certa.
+    """
+    if data is None:
+        return datetime.date.today().isoformat()
+    if isinstance(data, datetime.datetime):
+        data = data.date()
+    if isinstance(data, datetime.date):
+        return data.isoformat()
+    try:
+        return datetime.date.fromisoformat(str(data).strip()).isoformat()
+    except ValueError:
+        raise ValueError(f"Data inválida: {data!r} (use AAAA-MM-DD)") from None
+
+
+class HistoricoAlunos:
+    """Estado atual e mudanças de cada aluno, num arquivo SQLite (ver o módulo)."""
+
+    def __init__(self, caminho=CAMINHO_PADRAO):
+        self.caminho = caminho
+        pasta = os.path.dirname(caminho)
+        if pasta:
+            os.makedirs(pasta, exist_ok=True)
+        with self._conectar() as conexao:
+            conexao.executescript(_ESQUEMA)
+
+    @contextlib.contextmanager
+    def _conectar(self):
+        # Uma conexão por operação: o Streamlit atende cada sessão numa thread
+        conexao = sqlite3.connect(self.caminho)
+        try:
+            conexao.execute("PRAGMA foreign_keys = ON")
+            conexao.execute("PRAGMA temp_store = MEMORY")
+            conexao.execute("PRAGMA cache_size = -65536")
+            with conexao:
+                yield conexao
+        finally:
+            conexao.close()
+
+    def registrar(self, retratos, data=None, origem=""):
+        """Grava os ``retratos`` (de ``retrato_relatorio``/``retrato_risco``) como uma execução.
+
+        ``data`` é a data do relatório (AAAA-MM-DD, normalizada por
+        ``data_iso``; padrão: hoje) e não pode ser anterior à do último registro. Retorna um dicionário com
+        ``execucao``, ``alunos`` e ``mudancas``.
+        """
+        data = data_iso(data)
+        alunos, campos, valores = _juntar_retratos(retratos)
+        with perfil.etapa("historico", entrada=valores) as medida, self._conectar() as conexao:
+            ultima = conexao.execute("SELECT MAX(data) FROM execucoes").fetchone()[0]
+            if ultima is not None and data < ultima:
+                raise ValueError(f"A data {data} é anterior à do último registro ({ultima})")
+            execucao = conexao.execute(
+                "INSERT INTO execucoes (data, origem, alunos, mudancas) VALUES (?, ?, ?, 0)",
+                (data, origem, len(alunos))
+            ).lastrowid
+
+            alunos_retrato = self._codigos_alunos(conexao, alunos)
+            codigos_campo = self._codigos_campos(conexao, campos)
+            posicao = valores["aluno"].to_numpy()
+            campo = codigos_campo[valores["campo"].to_numpy()]
+            valor = valores["valor"].to_numpy()
+            tipo_campo, tipos = pd.factorize(campos["tipo"])
+            codigo_tipo = tipo_campo[valores["campo"].to_numpy()]
+
+            # Só os alunos com assinatura diferente da guardada são comparados ao estado
+            hashes = _assinaturas(posicao, campo, codigo_tipo, valor, len(alunos), len(tipos))
+            conjuntos = [_conjunto(campo[codigo_tipo == i]) for i in range(len(tipos))]
+            alteradas = self._assinaturas_alteradas(conexao, alunos_retrato, list(tipos), conjuntos, hashes)
+            alterados = alteradas.any(axis=1)
+            linhas = alterados[posicao]
+            # Posição de cada valor entre os alunos alterados
+            posicao_alterados = np.cumsum(alterados) - 1
+            mudancas = self._comparar(conexao, alunos_retrato[alterados], posicao_alterados[posicao[linhas]],
+                                      campo[linhas], valor[linhas], codigos_campo)
+            self._gravar(conexao, execucao, mudancas)
+            linha, coluna = np.nonzero(alteradas)
+            conexao.executemany(
+                "INSERT OR REPLACE INTO assinaturas (aluno, tipo, conjunto, hash) VALUES (?, ?, ?, ?)",
+                zip(alunos_retrato[linha].tolist(), tipos[coluna].tolist(),
+                    [conjuntos[i] for i in coluna.tolist()], hashes[linha, coluna].tolist())
+            )
+            conexao.execute("UPDATE execucoes SET mudancas = ? WHERE id = ?", (len(mudancas), execucao))
+            medida.anotar(alunos=len(alunos), alterados=int(alterados.sum()), valores=len(valores),
+                          mudancas=len(mudancas))
+        return {"execucao": execucao, "alunos": len(alunos), "mudancas": len(mudancas)}
+
+    def _codigos_alunos(self, conexao, alunos):
+        """Código na base de cada aluno do retrato, na ordem de ``alunos``.
+
+        Só alunos novos ou com DR, Polo ou Nome diferentes são gravados; uma
+        coluna ausente no retrato (None) não apaga o que já se sabe do aluno.
+        """
+        colunas = ["DR", "Polo", "Nome"]
+        guardados = pd.DataFrame(
+            conexao.execute("SELECT aluno_id, id, dr, polo, nome FROM alunos").fetchall(),
+            columns=["Aluno_ID", "id"] + colunas, dtype=object
+        ).set_index("Aluno_ID")
+        ids = pd.Index(alunos["Aluno_ID"].to_numpy(dtype=object))
+        anteriores = guardados.reindex(ids)
+        existe = anteriores["id"].notna().to_numpy()
+        novos = alunos[colunas].set_axis(ids)
+        novos = novos.where(novos.notna(), anteriores[colunas])
+        iguais = ((novos == anteriores[colunas]) | (novos.isna() & anteriores[colunas].isna())).all(axis=1)
+        gravar = ~(iguais.to_numpy() & existe)
+        conexao.executemany(
+            "INSERT INTO alunos (aluno_id, dr, polo, nome) VALUES (?, ?, ?, ?) "
+            "ON CONFLICT (aluno_id) DO UPDATE SET dr = excluded.dr, polo = excluded.polo, nome = excluded.nome",
+            zip(ids[gravar].tolist(), *[novos[col][gravar].tolist() for col in colunas])
+        )
+        codigos = anteriores["id"]
+        if not existe.all():
+            # Códigos dos alunos que acabaram de entrar na base
+            ultimo = int(guardados["id"].max()) if len(guardados) else 0
+            codigos = codigos.fillna(pd.Series(dict(conexao.execute(
+                "SELECT aluno_id, id FROM alunos WHERE id > ?", (ultimo,)
+            ).fetchall()), dtype=object))
+        return codigos.to_numpy(dtype=np.int64)
+
+    def _codigos_campos(self, conexao, campos):
+        """Código na base de cada (tipo, campo) do retrato, na ordem de ``campos``."""
+        conexao.executemany("INSERT OR IGNORE INTO campos (tipo, nome) VALUES (?, ?)",
+                            campos.itertuples(index=False))
+        linhas = conexao.execute("SELECT tipo, nome, id FROM campos").fetchall()
+        codigos = {(tipo, nome): codigo for tipo, nome, codigo in linhas}
+        return np.array([codigos[chave] for chave in campos.itertuples(index=False, name=None)], dtype=np.int64)
+
+    def _assinaturas_alteradas(self, conexao, alunos, tipos, conjuntos, hashes):
+        """Matriz (alunos × tipos) que marca as assinaturas novas ou diferentes das guardadas."""
+        marcas = ", ".join("?" * len(tipos))
+        guardadas = pd.DataFrame(
+            conexao.execute(f"SELECT aluno, tipo, conjunto, hash FROM assinaturas WHERE tipo IN ({marcas})",
+                            tipos).fetchall(),
+            columns=["aluno", "tipo", "conjunto", "hash"]
+        )
+        alteradas = np.ones(hashes.shape, dtype=bool)
+        for i, tipo in enumerate(tipos):
+            do_tipo = guardadas[guardadas["tipo"] == tipo]
+            # Com outro conjunto de campos, a assinatura guardada não serve de comparação
+            do_tipo = do_tipo[do_tipo["conjunto"] == conjuntos[i]]
+            guardada = pd.Series(do_tipo["hash"].to_numpy(), index=do_tipo["aluno"].to_numpy())
+            alteradas[:, i] = guardada.reindex(alunos).to_numpy() != hashes[:, i]
+        return alteradas
+
+    def _comparar(self, conexao, alunos, aluno, campo, valor, campos_retrato):
+        """Mudanças do retrato em relação ao estado: DataFrame (aluno, campo, anterior, valor).
+
+        ``alunos`` são os códigos dos alunos comparados e ``aluno`` a posição,
+        nessa lista, do aluno de cada valor. Entra o que é novo ou diferente
+        e, nos campos do retrato, o que tinha valor e deixou de ter (None).
+        """
+        aluno = alunos[aluno]
+        conexao.execute("CREATE TEMP TABLE alterados (aluno INTEGER PRIMARY KEY)")
+        conexao.executemany("INSERT INTO alterados VALUES (?)", ((codigo,) for codigo in alunos.tolist()))
+        marcas = ", ".join("?" * len(campos_retrato))
+        estado = conexao.execute(
+            f"SELECT e.aluno, e.campo, e.valor FROM temp.alterados a JOIN estado e ON e.aluno = a.aluno "
+            f"WHERE e.campo IN ({marcas})",
+            campos_retrato.tolist()
+        ).fetchall()
+        conexao.execute("DROP TABLE temp.alterados")
+        estado_aluno = np.fromiter((linha[0] for linha in estado), dtype=np.int64, count=len(estado))
+        estado_campo = np.fromiter((linha[1] for linha in estado), dtype=np.int64, count=len(estado))
+        estado_valor = np.array([linha[2] for linha in estado] + [None], dtype=object)
+
+        # (aluno, campo) num único inteiro, para comparar as chaves de uma vez
+        base = int(max(campo.max(initial=0), estado_campo.max(initial=0))) + 1
+        chave = pd.Index(aluno * base + campo)
+        chave_estado = pd.Index(estado_aluno * base + estado_campo)
+        posicao = chave_estado.get_indexer(chave)
+        anterior = estado_valor[posicao]  # -1 (sem estado) aponta para o None do fim
+        mudou = (posicao < 0) | (anterior != valor)
+
+        sumiu = chave.get_indexer(chave_estado) < 0
+        return pd.DataFrame({
+            "aluno": np.concatenate([aluno[mudou], estado_aluno[sumiu]]),
+            "campo": np.concatenate([campo[mudou], estado_campo[sumiu]]),
+            "anterior": np.concatenate([anterior[mudou], estado_valor[:-1][sumiu]]),
+            "valor": np.concatenate([valor[mudou], np.full(sumiu.sum(), None, dtype=object)]),
+        })
+
+    def _gravar(self, conexao, execucao, mudancas):
+        # Na ordem das chaves primárias, as inserções vão sempre para o fim das árvores
+        mudancas = mudancas.sort_values(["aluno", "campo"], kind="stable")
+        conexao.executemany(
+            "INSERT INTO mudancas (execucao, aluno, campo, anterior, valor) VALUES (?, ?, ?, ?, ?)",
+            zip([execucao] * len(mudancas), mudancas["aluno"].tolist(), mudancas["campo"].tolist(),
+                mudancas["anterior"].tolist(), mudancas["valor"].tolist())
+        )
+        # O estado sai das mudanças já gravadas, sem passar de novo pelo Python
+        conexao.execute(
+            "DELETE FROM estado WHERE (aluno, campo) IN "
+            "(SELECT aluno, campo FROM mudancas WHERE execucao = ? AND valor IS NULL)",
+            (execucao,)
+        )
+        conexao.execute(
+            "INSERT INTO estado (aluno, campo, valor, execucao) "
+            "SELECT aluno, campo, valor, execucao FROM mudancas WHERE execucao = ? AND valor IS NOT NULL "
+            "ON CONFLICT (aluno, campo) DO UPDATE SET valor = excluded.valor, execucao = excluded.execucao",
+            (execucao,)
+        )
+
+    def execucoes(self):
+        """DataFrame com as execuções registradas, da mais antiga à mais recente."""
+        with self._conectar() as conexao:
+            linhas = conexao.execute(
+                "SELECT id, data, origem, alunos, mudancas FROM execucoes ORDER BY id"
+            ).fetchall()
+        return pd.DataFrame(linhas, columns=["execucao", "data", "origem", "alunos", "mudancas"])
+
+    def polos(self):
+        with self._conectar() as conexao:
+            linhas = conexao.execute("SELECT DISTINCT polo FROM alunos WHERE polo IS NOT NULL ORDER BY polo")
+            return [polo for (polo,) in linhas]
+
+    def _intervalo(self, conexao, desde, ate):
+        if ate is None:
+            ate = conexao.execute("SELECT MAX(id) FROM execucoes").fetchone()[0] or 0
+        if desde is None:
+            # Padrão: só a última execução, comparada à anterior
+            desde = conexao.execute("SELECT MAX(id) FROM execucoes WHERE id < ?", (ate,)).fetchone()[0]
+            desde = ate if desde is None else desde
+        return desde, ate
+
+    def mudancas(self, desde=None, ate=None, tipo=None, polos=None):
+        """Mudanças líquidas das execuções depois de ``desde`` até ``ate`` (inclusive).
+
+        Uma linha por aluno e campo que terminou com valor diferente do que
+        tinha depois de ``desde``: ``Anterior`` é o valor naquele momento e
+        ``Atual`` o valor depois de ``ate``. Por padrão, a última execução
+        comparada à anterior; a primeira execução não tem com o que comparar.
+        """
+        with self._conectar() as conexao:
+            desde, ate = self._intervalo(conexao, desde, ate)
+            consulta = (
+                "SELECT a.aluno_id, a.dr, a.polo, a.nome, c.tipo, c.nome, m.anterior, m.valor "
+                "FROM mudancas m JOIN campos c ON c.id = m.campo JOIN alunos a ON a.id = m.aluno "
+                "WHERE m.execucao > ? AND m.execucao <= ?"
+            )
+            parametros = [desde, ate]
+            if tipo is not None:
+                consulta += " AND c.tipo = ?"
+                parametros.append(tipo)
+            if polos:
+                consulta += f" AND a.polo IN ({', '.join('?' * len(polos))})"
+                parametros += list(polos)
+            linhas = conexao.execute(consulta + " ORDER BY m.execucao", parametros).fetchall()
+
+        colunas = ["Aluno_ID", "DR", "Polo", "Nome", "Tipo", "Campo"]
+        # object: os valores misturam textos (menções) e números (tentativas, percentuais)
+        df = pd.DataFrame(linhas, columns=colunas + ["Anterior", "Atual"], dtype=object)
+        # Antes do primeiro registro do intervalo e depois do último
+        ultimas = df.drop_duplicates(["Aluno_ID", "Tipo", "Campo"], keep="last").set_index(["Aluno_ID", "Tipo", "Campo"])
+        primeiras = df.drop_duplicates(["Aluno_ID", "Tipo", "Campo"], keep="first").set_index(["Aluno_ID", "Tipo", "Campo"])
+        ultimas["Anterior"] = primeiras["Anterior"]
+        mudou = ~((ultimas["Anterior"] == ultimas["Atual"]) | (ultimas["Anterior"].isna() & ultimas["Atual"].isna()))
+        return ultimas[mudou].reset_index()[colunas + ["Anterior", "Atual"]]
+
+    def _pendencias(self, desde, ate, polos, pendente_antes):
+        df = self.mudancas(desde, ate, TIPO_MENCAO, polos)
+        df = df[df["Campo"].map(coluna_avaliativa).astype(bool)]
+        antes = df["Anterior"] == PENDENTE
+        depois = df["Atual"] == PENDENTE
+        if pendente_antes:
+            df = df[antes & df["Atual"].notna() & ~depois]
+        else:
+            df = df[~antes & depois]
+        return (df.sort_values("Campo")
+                  .groupby(["Aluno_ID", "DR", "Polo", "Nome"], dropna=False, sort=True)["Campo"]
+                  .agg(Atividades=", ".join, Quantidade="size")
+                  .reset_index())
+
+    def novos_pendentes(self, desde=None, ate=None, polos=None):
+        """Alunos com avaliativas que passaram a ``--`` no intervalo (ver ``mudancas``)."""
+        return self._pendencias(desde, ate, polos, pendente_antes=False)
+
+    def resolvidos(self, desde=None, ate=None, polos=None):
+        """Alunos com avaliativas que deixaram de ser ``--`` (e ganharam menção) no intervalo."""
+        return self._pendencias(desde, ate, polos, pendente_antes=True)
+
+    def piora_risco(self, desde=None, ate=None, polos=None):
+        """Alunos cuja classificação de risco piorou no intervalo, com o percentual final antes e depois."""
+        df = self.mudancas(desde, ate, TIPO_RISCO, polos)
+        chave = ["Aluno_ID", "DR", "Polo", "Nome"]
+        classes = df[df["Campo"] == "Classificacao"]
+        posicao = {classe: i for i, classe in enumerate(CLASSES)}
+        antes = classes["Anterior"].map(posicao)
+        depois = classes["Atual"].map(posicao)
+        pioras = classes[depois < antes].rename(
+            columns={"Anterior": "Classificacao_Anterior", "Atual": "Classificacao_Atual"}
+        )[chave + ["Classificacao_Anterior", "Classificacao_Atual"]]
+        percentuais = df[df["Campo"] == "Percentual_Final_Possivel"].rename(
+            columns={"Anterior": "Percentual_Final_Anterior", "Atual": "Percentual_Final_Atual"}
+        )[["Aluno_ID", "Percentual_Final_Anterior", "Percentual_Final_Atual"]]
+        return pioras.merge(percentuais, on="Aluno_ID", how="left").reset_index(drop=True)
+
+    def historico_aluno(self, aluno):
+        """Todas as mudanças de um aluno (pelo Aluno_ID), em ordem."""
+        with self._conectar() as conexao:
+            linhas = conexao.execute(
+                "SELECT e.data, e.origem, c.tipo, c.nome, m.anterior, m.valor "
+                "FROM mudancas m JOIN execucoes e ON e.id = m.execucao JOIN campos c ON c.id = m.campo "
+                "WHERE m.aluno = (SELECT id FROM alunos WHERE aluno_id = ?) "
+                "ORDER BY m.execucao, c.tipo, c.nome",
+                (aluno,)
+            ).fetchall()
+        return pd.DataFrame(linhas, columns=["Data", "Origem", "Tipo", "Campo", "Anterior", "Atual"], dtype=object)
+
+    def limpar(self):
+        with self._conectar() as conexao:
+            for tabela in ["mudancas", "estado", "assinaturas", "execucoes", "campos", "alunos"]:
+                conexao.execute(f"DELETE FROM {tabela}")
+
+
+def registrar_historico(caminho, estruturado=None, risco=None, data=None, origem=""):
+    """Registra o relatório estruturado e/ou o resultado do risco numa execução do histórico."""
+    retratos = []
+    if estruturado is not None:
+        retratos.append(retrato_relatorio(estruturado))
+    if risco is not None:
+        retratos.append(retrato_risco(risco))
+    return HistoricoAlunos(caminho).registrar(retratos, data=data, origem=origem)
@@ -0,0 +1,362 @@
+"""Compilação incremental: base local com as planilhas já lidas.
+
+A base é um arquivo SQLite com um manifesto (nome do arquivo, SHA-256 do
+conteúdo, linhas, data de atualização e posição na compilação) e o DataFrame
+já lido de cada planilha, identificados pelo par nome e hash. A cada
+atualização, só as planilhas novas ou com conteúdo diferente do manifesto
+passam pela leitura: as novas entram no fim da compilação e as alteradas
+substituem as linhas anteriores, na mesma posição. As que não mudaram nem
+são abertas.
+
+A base guarda também o último compilado (antes de tirar as duplicadas), com
+a planilha de origem e o hash de cada linha. A compilação seguinte parte
+dele: as linhas das versões substituídas saem pela origem, só as planilhas
+novas são unificadas a ele e só as linhas delas são hasheadas. Se uma troca
+puder mudar o esquema de colunas (uma versão nova com outros cabeçalhos ou
+tipos, ou um nome retirado da base), o compilado é refeito com todas as
+planilhas guardadas (``unificar_em_lotes``: elas saem da base aos poucos,
+sem ficarem todas em memória). Nos dois casos o resultado é idêntico ao de
+``compilar_planilhas`` sobre os mesmos arquivos na mesma ordem.
+
+A planilha é identificada pelo nome do arquivo enviado, então o arquivo de
+um polo deve manter o mesmo nome de uma semana para outra: enviar um nome
+substitui tudo o que a base tinha com ele. Arquivos diferentes com o mesmo
+nome no mesmo envio (de pastas diferentes) ficam todos na base. Cada base é
+um arquivo próprio; o app usa uma por espaço de trabalho, para que sessões e
+equipes diferentes não misturem planilhas.
+"""
+import contextlib
+import copy
+import datetime
+import hashlib
+import os
+import pickle
+import sqlite3
+
+import numpy as np
+import pandas as pd
+
+from pedagogico import perfil
+from pedagogico.compilacao import (LIMITE_MEMORIA_PADRAO_MB, acumular_resumo, conteudo_arquivo, hash_linhas,
+                                   ler_planilhas, origem_linhas, sem_categorias_excedentes, sem_duplicadas, unificar_em_lotes,
+                                   unificar_planilhas)
+from pedagogico.tipos import MENCOES, categorica, tipo_mencao
+
+CAMINHO_PADRAO = os.environ.get("PEDAGOGICO_BASE") or os.path.join(".pedagogico", "compilacao.sqlite")
+
+# Bases de versões anteriores (chave só pelo nome, sem o compilado guardado) são recriadas
+VERSAO_ESQUEMA = 3
+_ESQUEMA = """
+CREATE TABLE IF NOT EXISTS manifesto (
+    nome TEXT NOT NULL,
+    hash TEXT NOT NULL,
+    linhas INTEGER NOT NULL,
+    atualizado TEXT NOT NULL,
+    posicao INTEGER NOT NULL,
+    ordem INTEGER NOT NULL,
+    assinatura TEXT NOT NULL,
+    PRIMARY KEY (nome, hash)
+);
+CREATE TABLE IF NOT EXISTS planilhas (
+    nome TEXT NOT NULL,
+    hash TEXT NOT NULL,
+    dados BLOB NOT NULL,
+    PRIMARY KEY (nome, hash),
+    FOREIGN KEY (nome, hash) REFERENCES manifesto(nome, hash) ON DELETE CASCADE
+);
+CREATE TABLE IF NOT EXISTS estado (
+    id INTEGER PRIMARY KEY CHECK (id = 0),
+    dados BLOB NOT NULL
+);
+"""
+
+
+def nome_planilha(arquivo, conteudo):
+    """Nome que identifica a planilha na base: o do upload, o do caminho ou o hash."""
+    nome = getattr(arquivo, "name", None)
+    if nome is None and isinstance(arquivo, (str, os.PathLike)):
+        nome = os.path.basename(arquivo)
+    return nome or hashlib.sha256(conteudo).hexdigest()
+
+
+def _assinatura(df):
+    """Hash do que decide o esquema da junção: cabeçalhos, tipos, vazios e texto numérico de cada coluna."""
+    colunas = []
+    for i, nome in enumerate(df.columns):
+        serie = df.iloc[:, i]
+        coluna = (repr(nome), str(serie.dtype), bool(serie.hasnans))
+        if serie.dtype == object or pd.api.types.is_string_dtype(serie.dtype):
+            numerico = pd.to_numeric(serie, errors="coerce")
+            coluna += (pd.api.types.infer_dtype(serie, skipna=True),
+                       int(numerico.isna().sum()) == int(serie.isna().sum()))
+        colunas.append(coluna)
+    return hashlib.sha256(repr(colunas).encode("utf-8")).hexdigest()
+
+
+def _classe(dtype):
+    # Tipos cujo hash por valor é o mesmo (texto e categoria, inteiros de larguras diferentes) contam como um
+    if isinstance(dtype, pd.CategoricalDtype):
+        return _classe(dtype.categories.dtype)
+    if isinstance(dtype, np.dtype) and dtype.kind in "iu":
+        return "i"
+    if dtype == object or pd.api.types.is_string_dtype(dtype):
+        return "texto"
+    return str(dtype)
+
+
+def _colunas(df):
+    return [(repr(nome), _classe(df.iloc[:, i].dtype)) for i, nome in enumerate(df.columns)]
+
+
+def _sem_categorias_vazias(df):
+    # Categorias que só apareciam nas linhas das versões substituídas saem, como na compilação completa
+    df = df.copy(deep=False)
+    for i in range(len(df.columns)):
+        serie = df.iloc[:, i]
+        if not categorica(serie):
+            continue
+        if list(serie.cat.categories[:len(MENCOES)]) == MENCOES:
+            codigos = serie.cat.codes.to_numpy()
+            df.isetitem(i, serie.astype(tipo_mencao(serie.cat.categories[np.unique(codigos[codigos >= 0])])))
+        else:
+            df.isetitem(i, serie.cat.remove_unused_categories())
+    return df
+
+
+def _so_acrescimos(anteriores, atuais):
+    """Se ``atuais`` só troca versões por outras de mesma assinatura e acrescenta nomes no fim."""
+    def por_nome(planilhas):
+        grupos = {}
+        for nome, _, assinatura in planilhas:
+            grupos.setdefault(nome, []).append(assinatura)
+        return grupos
+
+    antes, depois = por_nome(anteriores), por_nome(atuais)
+    return list(depois)[:len(antes)] == list(antes) and all(depois[nome] == antes[nome] for nome in antes)
+
+
+class BaseIncremental:
+    """Manifesto e DataFrames das planilhas compiladas, num arquivo SQLite."""
+
+    def __init__(self, caminho=CAMINHO_PADRAO):
+        self.caminho = caminho
+        pasta = os.path.dirname(caminho)
+        if pasta:
+            os.makedirs(pasta, exist_ok=True)
+        with self._conectar() as conexao:
+            if conexao.execute("PRAGMA user_version").fetchone()[0] < VERSAO_ESQUEMA:
+                conexao.executescript(
+                    "DROP TABLE IF EXISTS estado; DROP TABLE IF EXISTS planilhas; DROP TABLE IF EXISTS manifesto;"
+                )
+            conexao.executescript(_ESQUEMA)
+            conexao.execute(f"PRAGMA user_version = {VERSAO_ESQUEMA}")
+
+    @contextlib.contextmanager
+    def _conectar(self):
+        # Uma conexão por operação: o Streamlit atende cada sessão numa thread
+        conexao = sqlite3.connect(self.caminho)
+        try:
+            conexao.execute("PRAGMA foreign_keys = ON")
+            with conexao:
+                yield conexao
+        finally:
+            conexao.close()
+
+    def manifesto(self):
+        """DataFrame com nome, hash, linhas e data de atualização, na ordem da compilação."""
+        with self._conectar() as conexao:
+            linhas = conexao.execute(
+                "SELECT nome, hash, linhas, atualizado FROM manifesto ORDER BY posicao, ordem"
+            ).fetchall()
+        return pd.DataFrame(linhas, columns=["nome", "hash", "linhas", "atualizado"])
+
+    def atualizar(self, arquivos, max_workers=None, limite_memoria_mb=LIMITE_MEMORIA_PADRAO_MB, cache=None,
+                  progresso=None):
+        """Lê só as planilhas novas ou alteradas e grava na base.
+
+        Retorna um dicionário com as listas de nomes ``novos``, ``alterados`` e
+        ``inalterados``. Os arquivos enviados com um nome substituem os que a
+        base tinha com ele; conteúdos repetidos contam uma vez só.
+        ``progresso(feitos, total, mensagem)`` é chamado a cada planilha gravada;
+        as já gravadas ficam na base mesmo que a atualização seja interrompida.
+        """
+        with self._conectar() as conexao:
+            guardados = conexao.execute("SELECT nome, hash, posicao FROM manifesto").fetchall()
+        conhecidos, posicoes = {}, {}
+        for nome, digest, posicao in guardados:
+            conhecidos.setdefault(nome, set()).add(digest)
+            posicoes[nome] = posicao
+        proxima = max(posicoes.values(), default=-1) + 1
+
+        recebidos = {}
+        for arquivo in arquivos:
+            conteudo = conteudo_arquivo(arquivo)
+            versoes = recebidos.setdefault(nome_planilha(arquivo, conteudo), {})
+            versoes.setdefault(hashlib.sha256(conteudo).hexdigest(), conteudo)
+
+        resumo = {"novos": [], "alterados": [], "inalterados": []}
+        ler, manter = [], []
+        for nome, versoes in recebidos.items():
+            if nome not in conhecidos:
+                resumo["novos"].append(nome)
+                posicoes[nome] = proxima
+                proxima += 1
+            elif conhecidos[nome] != set(versoes):
+                resumo["alterados"].append(nome)
+            else:
+                resumo["inalterados"].append(nome)
+                continue
+            for ordem, (digest, conteudo) in enumerate(versoes.items()):
+                if digest in conhecidos.get(nome, ()):
+                    manter.append((nome, digest, ordem))
+                else:
+                    ler.append((nome, digest, conteudo, posicoes[nome], ordem))
+
+        with perfil.etapa("compilacao_incremental", entrada=[item[2] for item in ler]) as medida:
+            medida.anotar(**{chave: len(nomes) for chave, nomes in resumo.items()})
+            leituras = ler_planilhas([item[2] for item in ler], max_workers=max_workers,
+                                     limite_memoria_mb=limite_memoria_mb, cache=cache)
+            agora = datetime.datetime.now().isoformat(timespec="seconds")
+            for feitos, ((nome, digest, _, posicao, ordem), df) in enumerate(zip(ler, leituras), start=1):
+                self._gravar(nome, digest, df, agora, posicao, ordem)
+                if progresso is not None:
+                    progresso(feitos, len(ler), f"{nome} ({feitos} de {len(ler)})")
+
+        # Só depois de gravadas as novas versões saem as que não foram reenviadas
+        with self._conectar() as conexao:
+            conexao.executemany("UPDATE manifesto SET ordem = ? WHERE nome = ? AND hash = ?",
+                                [(ordem, nome, digest) for nome, digest, ordem in manter])
+            for nome in resumo["alterados"]:
+                conexao.execute(
+                    f"DELETE FROM manifesto WHERE nome = ? AND hash NOT IN ({', '.join('?' * len(recebidos[nome]))})",
+                    (nome, *recebidos[nome])
+                )
+        return resumo
+
+    def _gravar(self, nome, digest, df, atualizado, posicao, ordem):
+        dados = pickle.dumps(df, protocol=pickle.HIGHEST_PROTOCOL)
+        with self._conectar() as conexao:
+            conexao.execute(
+                "INSERT OR REPLACE INTO manifesto (nome, hash, linhas, atualizado, posicao, ordem, assinatura) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (nome, digest, len(df), atualizado, posicao, ordem, _assinatura(df)),
+            )
+            conexao.execute("INSERT OR REPLACE INTO planilhas (nome, hash, dados) VALUES (?, ?, ?)",
+                            (nome, digest, dados))
+
+    def compilado(self, limite_memoria_mb=LIMITE_MEMORIA_PADRAO_MB):
+        """Junção de todas as planilhas da base, na ordem do manifesto: (DataFrame, resumo da junção).
+
+        Parte do compilado guardado na base sempre que possível (ver o módulo)
+        e guarda o novo.
+        """
+        with perfil.etapa("base_compilada") as medida:
+            with self._conectar() as conexao:
+                planilhas = conexao.execute(
+                    "SELECT nome, hash, assinatura FROM manifesto ORDER BY posicao, ordem"
+                ).fetchall()
+                guardado = conexao.execute("SELECT dados FROM estado").fetchone()
+            estado = None if guardado is None else pickle.loads(guardado[0])
+            if estado is None or not _so_acrescimos(estado["planilhas"], planilhas):
+                estado, modo = self._reconstruir(planilhas, limite_memoria_mb), "completa"
+            elif estado["planilhas"] != planilhas:
+                estado, modo = self._incorporar(estado, planilhas), "incremental"
+            else:
+                modo = "guardada"
+            if modo != "guardada":
+                dados = pickle.dumps(estado, protocol=pickle.HIGHEST_PROTOCOL)
+                with self._conectar() as conexao:
+                    conexao.execute("INSERT OR REPLACE INTO estado (id, dados) VALUES (0, ?)", (dados,))
+
+            juncao = copy.deepcopy(estado["juncao"])
+            compilado = estado["compilado"]
+            if not compilado.columns.empty:
+                compilado = sem_duplicadas(compilado, juncao, estado["origem"], estado["hashes"])
+            medida.anotar(modo=modo, duplicadas=juncao["linhas_duplicadas"])
+            medida.saida(compilado)
+        return compilado, juncao
+
+    def _reconstruir(self, planilhas, limite_memoria_mb):
+        """Compilado (sem tirar as duplicadas) de todas as planilhas guardadas, com origem e hash das linhas."""
+        tamanhos = []
+
+        def guardadas(cursor):
+            for (dados,) in cursor:
+                df = pickle.loads(dados)
+                tamanhos.append(len(df))
+                yield df
+
+        with self._conectar() as conexao:
+            cursor = conexao.execute(
+                "SELECT p.dados FROM planilhas p JOIN manifesto m USING (nome, hash) ORDER BY m.posicao, m.ordem"
+            )
+            compilado, juncao = unificar_em_lotes(guardadas(cursor), limite_memoria_mb)
+        origem = origem_linhas(tamanhos)
+        hashes = hash_linhas(compilado) if not compilado.columns.empty else np.empty(0, dtype=np.uint64)
+        return {"planilhas": planilhas, "compilado": compilado, "origem": origem, "hashes": hashes,
+                "colunas": _colunas(compilado), "juncao": juncao}
+
+    def _incorporar(self, estado, planilhas):
+        """O compilado guardado sem as versões substituídas e com as planilhas novas no lugar delas."""
+        anteriores = [(nome, digest) for nome, digest, _ in estado["planilhas"]]
+        chaves = [(nome, digest) for nome, digest, _ in planilhas]
+        indices = {chave: i for i, chave in enumerate(chaves)}
+        origem = np.array([indices.get(chave, -1) for chave in anteriores], dtype=np.int32)[estado["origem"]]
+        manter = origem >= 0
+        compilado, hashes = estado["compilado"], estado["hashes"]
+        if not manter.all():
+            compilado = compilado[manter].reset_index(drop=True)
+            origem, hashes = origem[manter], hashes[manter]
+
+        guardadas = set(anteriores)
+        novas = [(i, chave) for i, chave in enumerate(chaves) if chave not in guardadas]
+        with self._conectar() as conexao:
+            partes = [
+                pickle.loads(conexao.execute("SELECT dados FROM planilhas WHERE nome = ? AND hash = ?",
+                                             chave).fetchone()[0])
+                for _, chave in novas
+            ]
+        juncao = copy.deepcopy(estado["juncao"])
+        anterior = len(compilado)
+        compilado, parcial = unificar_planilhas([compilado, *partes])
+        compilado = sem_categorias_excedentes(_sem_categorias_vazias(compilado))
+        acumular_resumo(juncao, parcial)
+        origem = np.concatenate([origem, np.repeat(np.array([i for i, _ in novas], dtype=np.int32),
+                                                   [len(parte) for parte in partes])])
+
+        # Só as linhas novas são hasheadas, a não ser que o tipo de alguma coluna tenha mudado
+        colunas = _colunas(compilado)
+        if colunas == estado["colunas"]:
+            hashes = np.concatenate([hashes, hash_linhas(compilado.iloc[anterior:])])
+        else:
+            hashes = hash_linhas(compilado)
+        if len(origem) and (np.diff(origem) < 0).any():
+            # Versões alteradas voltam à posição da planilha no manifesto
+            ordem = np.argsort(origem, kind="stable")
+            compilado = compilado.take(ordem).reset_index(drop=True)
+            origem, hashes = origem[ordem], hashes[ordem]
+        return {"planilhas": planilhas, "compilado": compilado, "origem": origem, "hashes": hashes,
+                "colunas": colunas, "juncao": juncao}
+
+    def remover(self, nomes):
+        """Tira da base as planilhas com esses nomes (todas as versões de cada um)."""
+        with self._conectar() as conexao:
+            conexao.executemany("DELETE FROM manifesto WHERE nome = ?", [(nome,) for nome in nomes])
+
+    def limpar(self):
+        """Apaga todas as planilhas da base."""
+        with self._conectar() as conexao:
+            conexao.execute("DELETE FROM manifesto")
+            conexao.execute("DELETE FROM estado")
+
+
+def compilar_incremental(arquivos, caminho=CAMINHO_PADRAO, max_workers=None,
+                         limite_memoria_mb=LIMITE_MEMORIA_PADRAO_MB, cache=None, progresso=None):
+    """Atualiza a base com ``arquivos`` e retorna (compilado, resumo da atualização e da junção)."""
+    base = BaseIncremental(caminho)
+    resumo = base.atualizar(arquivos, max_workers=max_workers, limite_memoria_mb=limite_memoria_mb,
+                            cache=cache, progresso=progresso)
+    if progresso is not None:
+        progresso(len(resumo["novos"]) + len(resumo["alterados"]), None, "Juntando as planilhas da base")
+    compilado, juncao = base.compilado(limite_memoria_mb)
+    return compilado, {**resumo, **juncao}
@@ -0,0 +1,138 @@
+"""Leitura das planilhas enviadas: reconhecimento do esquema e decodificação única.
+
+``farejar_esquema`` percorre só as primeiras linhas da aba (openpyxl em modo
+somente leitura) e decide a linha do cabeçalho e as colunas-chave: CH,
+avaliativas e tentativas. Cada decisão vai, em texto, para a lista
+``decisoes`` do esquema, para que uma detecção errada fique visível.
+``ler_planilha`` decodifica a aba uma única vez, já com esse cabeçalho e só
+com as colunas pedidas, pelo mesmo TextParser que o ``pd.read_excel`` usa,
+então o resultado é o mesmo da leitura com ``header=`` e ``usecols=``. A
+diferença é o texto com ``_xHHHH_`` (caracteres escapados no padrão OOXML,
+como nos arquivos exportados pelo app), que aqui volta ao original.
+"""
+import pandas as pd
+from pandas.io.parsers import TextParser
+
+from pedagogico import perfil
+from pedagogico.compilacao import ler_linhas
+from pedagogico.risco import escolher_coluna_ch
+from pedagogico.tipos import compactar
+
+COLUNAS_CABECALHO = ['DR', 'Polo', 'Nome']
+# O cabeçalho é procurado nestas primeiras linhas, como no preview de 10 linhas de antes
+LINHAS_CABECALHO = 10
+# Linhas de dados lidas depois do cabeçalho para reconhecer as colunas pelos valores
+LINHAS_AMOSTRA = 50
+
+
+def coluna_avaliativa(nome):
+    texto = str(nome).lower()
+    return "avaliativa" in texto and "tentativas" not in texto
+
+
+def coluna_tentativas(nome):
+    return "tentativas" in str(nome).lower()
+
+
+def linha_cabecalho(linhas):
+    """Índice da primeira linha que contém DR, Polo e Nome, ou None."""
+    for i, linha in enumerate(linhas):
+        if all(col in linha for col in COLUNAS_CABECALHO):
+            return i
+    return None
+
+
+def _interpretar(linhas, cabecalho, colunas=None):
+    return TextParser(linhas, header=cabecalho, usecols=colunas, skip_blank_lines=False).read()
+
+
+def farejar_esquema(conteudo, aba=0):
+    """Lê as primeiras linhas da aba e retorna o esquema detectado (um dicionário).
+
+    Chaves: ``aba``, ``linha_cabecalho`` (índice na aba ou None),
+    ``cabecalho_encontrado``, ``colunas``, ``coluna_ch``, ``ch_pelo_nome``,
+    ``colunas_avaliativas``, ``colunas_tentativas`` e ``decisoes``.
+    """
+    with perfil.etapa("farejar_esquema", entrada=conteudo) as medida:
+        linhas = ler_linhas(conteudo, aba, limite=LINHAS_CABECALHO + LINHAS_AMOSTRA + 1)
+        decisoes = []
+
+        encontrada = linha_cabecalho(linhas[:LINHAS_CABECALHO])
+        if encontrada is not None:
+            cabecalho = encontrada
+            decisoes.append(f"Cabeçalho na linha {cabecalho + 1}: primeira linha com DR, Polo e Nome.")
+        else:
+            cabecalho = 0
+            decisoes.append(
+                f"Nenhuma das {LINHAS_CABECALHO} primeiras linhas tem DR, Polo e Nome; "
+                "usando a linha 1 como cabeçalho."
+            )
+
+        amostra = pd.DataFrame()
+        if len(linhas) > cabecalho:
+            amostra = _interpretar(linhas[:cabecalho + 1 + LINHAS_AMOSTRA], cabecalho)
+        colunas = list(amostra.columns)
+
+        coluna_ch, ch_pelo_nome, motivo = escolher_coluna_ch(
+            colunas, [amostra.iloc[:, i].tolist() for i in range(amostra.shape[1])]
+        )
+        if coluna_ch is None:
+            decisoes.append(f"Coluna CH não encontrada: {motivo}.")
+        else:
+            decisoes.append(f"Coluna CH: '{coluna_ch}' ({motivo}).")
+
+        avaliativas = [col for col in colunas if coluna_avaliativa(col)]
+        tentativas = [col for col in colunas if coluna_tentativas(col)]
+        decisoes.append(f"{len(avaliativas)} coluna(s) de avaliativas e {len(tentativas)} de tentativas.")
+
+        medida.anotar(linha_cabecalho=encontrada, coluna_ch=coluna_ch)
+        return {
+            "aba": aba,
+            "linha_cabecalho": encontrada,
+            "cabecalho_encontrado": encontrada is not None,
+            "colunas": colunas,
+            "coluna_ch": coluna_ch,
+            "ch_pelo_nome": ch_pelo_nome,
+            "colunas_avaliativas": avaliativas,
+            "colunas_tentativas": tentativas,
+            "decisoes": decisoes,
+        }
+
+
+def _posicoes(conteudo, aba, cabecalho, colunas):
+    """Posições das ``colunas`` na aba e os nomes que o TextParser dá a elas, pelo cabeçalho; ou None.
+
+    None quando alguma coluna não está no cabeçalho: a leitura completa
+    decide, como o ``usecols`` do read_excel.
+    """
+    linhas = ler_linhas(conteudo, aba, limite=cabecalho + 1)
+    if len(linhas) <= cabecalho:
+        return None
+    nomes = list(_interpretar(linhas, cabecalho).columns)
+    pedidas = set(colunas)
+    posicoes = [i for i, nome in enumerate(nomes) if nome in pedidas]
+    if len(posicoes) != len(pedidas):
+        return None
+    return posicoes, [nomes[i] for i in posicoes]
+
+
+def ler_planilha(conteudo, aba=0, cabecalho=0, colunas=None):
+    """Decodifica a aba uma vez, com o cabeçalho na linha ``cabecalho`` e só as ``colunas`` pedidas.
+
+    Equivale a ``pd.read_excel(sheet_name=aba, header=cabecalho, usecols=colunas)``
+    seguido de ``compactar``. As células das colunas que não foram pedidas
+    não são convertidas (o cabeçalho é lido antes, para achar as posições).
+    """
+    with perfil.etapa("ler_planilha", entrada=conteudo) as medida:
+        selecao = None if colunas is None else _posicoes(conteudo, aba, cabecalho, colunas)
+        if selecao is None:
+            linhas = ler_linhas(conteudo, aba)
+            if len(linhas) <= cabecalho:
+                return medida.saida(pd.DataFrame())
+            return medida.saida(compactar(_interpretar(linhas, cabecalho, colunas)))
+        posicoes, nomes = selecao
+        linhas = ler_linhas(conteudo, aba, colunas=posicoes)
+        df = _interpretar(linhas, cabecalho)
+        # Nomes do cabeçalho inteiro (repetidos e vazios numerados pela posição na aba)
+        df.columns = nomes
+        return medida.saida(compactar(df))
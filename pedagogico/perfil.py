@@ -0,0 +1,211 @@
+"""Medição por etapa: tempo, pico de memória e dimensões de entrada e saída.
+
+As funções do pacote marcam as suas etapas com ``etapa``::
+
+    with perfil.etapa("pivotagem", entrada=df) as medida:
+        resultado = ...
+        medida.saida(resultado)
+
+Sem um ``Perfilador`` ativo (ver ``ativar``), ``etapa`` devolve um objeto
+vazio compartilhado e o custo é o de uma consulta a uma ContextVar. Com um
+perfilador ativo, o pico de memória vem do ``tracemalloc``, que deixa o
+código mais lento enquanto estiver ligado; etapas aninhadas são medidas
+separadamente. Alocações feitas em outros processos (o pool da compilação)
+não entram no pico.
+
+O ``tracemalloc`` é global ao processo e as etapas podem rodar ao mesmo
+tempo em várias threads (as tarefas em segundo plano e o script de cada
+sessão). Ele fica ligado enquanto houver alguma etapa aberta, em qualquer
+thread. O pico só é zerado no início de uma etapa quando as únicas etapas
+abertas são as de fora dela, na mesma thread; com etapas de outras threads
+abertas, a etapa compara o pico do processo com o do seu início: se ele
+subiu, o novo pico é da etapa (somado ao que as outras alocaram); se não,
+fica a memória no fim da etapa.
+
+Cada medida vai para ``registros``, para o logger ``pedagogico.perfil`` e,
+se configurado, para um arquivo JSON Lines (variável de ambiente
+PEDAGOGICO_PERFIL_LOG).
+"""
+import contextvars
+import datetime
+import itertools
+import json
+import logging
+import os
+import threading
+import time
+import tracemalloc
+
+logger = logging.getLogger(__name__)
+
+_perfilador = contextvars.ContextVar("perfilador", default=None)
+
+_trava_rastreio = threading.Lock()
+_etapas_abertas = 0       # em todas as threads
+_ligou_rastreio = False   # o tracemalloc foi ligado aqui, e não por quem usa o pacote
+
+
+def _reiniciar_rastreio():
+    # O processo filho (pool da compilação) não herda as etapas abertas nem a trava de outra thread
+    global _trava_rastreio, _etapas_abertas, _ligou_rastreio
+    _trava_rastreio = threading.Lock()
+    _etapas_abertas = 0
+    _ligou_rastreio = tracemalloc.is_tracing()
+
+
+# Só existe no Unix; sem fork (Windows) não há estado herdado a reiniciar
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_reiniciar_rastreio)
+
+
+def _dimensoes(objeto):
+    forma = getattr(objeto, "shape", None)
+    if forma is not None:
+        return {"linhas": int(forma[0]) if forma else 1, "colunas": int(forma[1]) if len(forma) > 1 else 1}
+    if isinstance(objeto, (bytes, bytearray, memoryview)):
+        return {"bytes": len(objeto)}
+    if isinstance(objeto, (list, tuple, dict)):
+        return {"itens": len(objeto)}
+    return {}
+
+
+class _EtapaInativa:
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *erro):
+        return False
+
+    def saida(self, objeto):
+        return objeto
+
+    def anotar(self, **valores):
+        pass
+
+
+_INATIVA = _EtapaInativa()
+
+
+class _Etapa:
+    def __init__(self, perfilador, nome, entrada):
+        self.perfilador = perfilador
+        self.registro = {"etapa": nome}
+        self.registro.update({f"{chave}_entrada": valor for chave, valor in _dimensoes(entrada).items()})
+        self._pico_filhos = 0
+
+    def __enter__(self):
+        global _etapas_abertas, _ligou_rastreio
+        pilha = self.perfilador._pilha
+        self.registro["ordem"] = next(self.perfilador._ordem)
+        self.registro["nivel"] = len(pilha)
+        self.registro["inicio"] = datetime.datetime.now().isoformat(timespec="milliseconds")
+        with _trava_rastreio:
+            if not tracemalloc.is_tracing():
+                tracemalloc.start()
+                _ligou_rastreio = True
+            self._memoria_inicial, pico = tracemalloc.get_traced_memory()
+            # Zerar o pico apagaria o das etapas abertas em outras threads
+            self._pico_inicial = None if _etapas_abertas == len(pilha) else pico
+            if self._pico_inicial is None:
+                if pilha:
+                    # O reset_peak abaixo apagaria o pico já observado pela etapa de fora
+                    pilha[-1]._pico_filhos = max(pilha[-1]._pico_filhos, pico)
+                tracemalloc.reset_peak()
+            _etapas_abertas += 1
+        pilha.append(self)
+        self._inicio = time.perf_counter()
+        return self
+
+    def __exit__(self, tipo, erro, rastro):
+        global _etapas_abertas, _ligou_rastreio
+        tempo = time.perf_counter() - self._inicio
+        with _trava_rastreio:
+            atual, pico = tracemalloc.get_traced_memory()
+            if self._pico_inicial is not None and pico <= self._pico_inicial:
+                # O pico do processo é anterior à etapa
+                pico = atual
+            _etapas_abertas -= 1
+            if _etapas_abertas == 0 and _ligou_rastreio:
+                tracemalloc.stop()
+                _ligou_rastreio = False
+        pico = max(pico, self._pico_filhos)
+        pilha = self.perfilador._pilha
+        pilha.pop()
+        if pilha:
+            pilha[-1]._pico_filhos = max(pilha[-1]._pico_filhos, pico)
+
+        self.registro["tempo_s"] = round(tempo, 4)
+        self.registro["pico_memoria_mb"] = round(max(pico - self._memoria_inicial, 0) / 1024 / 1024, 2)
+        if tipo is not None:
+            self.registro["erro"] = tipo.__name__
+        self.perfilador._registrar(self.registro)
+        return False
+
+    def saida(self, objeto):
+        """Anota as dimensões do resultado da etapa e o devolve."""
+        self.registro.update({f"{chave}_saida": valor for chave, valor in _dimensoes(objeto).items()})
+        return objeto
+
+    def anotar(self, **valores):
+        self.registro.update(valores)
+
+
+class Perfilador:
+    """Acumula as medidas das etapas executadas enquanto estiver ativo."""
+
+    def __init__(self, arquivo_log=None, contexto=None):
+        if arquivo_log is None:
+            arquivo_log = os.environ.get("PEDAGOGICO_PERFIL_LOG") or None
+        self.arquivo_log = arquivo_log
+        self.contexto = contexto or {}
+        self.registros = []
+        self._pilha = []
+        self._ordem = itertools.count()
+
+    def etapa(self, nome, entrada=None):
+        return _Etapa(self, nome, entrada)
+
+    def _registrar(self, registro):
+        registro = {**self.contexto, **registro}
+        self.registros.append(registro)
+        linha = json.dumps(registro, ensure_ascii=False, default=str)
+        logger.info(linha)
+        if self.arquivo_log:
+            with open(self.arquivo_log, "a", encoding="utf-8") as f:
+                f.write(linha + "\n")
+
+    def limpar(self):
+        self.registros = []
+
+    def tabela(self):
+        """Registros na ordem em que as etapas começaram, com o nome recuado pelo nível."""
+        linhas = []
+        for registro in sorted(self.registros, key=lambda r: r["ordem"]):
+            linha = {
+                # Espaço largo: o recuo de espaços comuns some na tabela do Streamlit
+                "etapa": "\u2003" * registro["nivel"] + registro["etapa"],
+                "tempo_s": registro["tempo_s"],
+                "pico_memoria_mb": registro["pico_memoria_mb"],
+            }
+            linha.update({chave: valor for chave, valor in registro.items()
+                          if chave not in linha and chave not in ("ordem", "nivel", "inicio")
+                          and chave not in self.contexto})
+            linhas.append(linha)
+        return linhas
+
+
+def ativar(perfilador):
+    """Define o perfilador do contexto atual (None desliga a medição)."""
+    _perfilador.set(perfilador)
+
+
+def perfilador_ativo():
+    return _perfilador.get()
+
+
+def etapa(nome, entrada=None):
+    """Context manager que mede a etapa ``nome`` se houver perfilador ativo."""
+    perfilador = _perfilador.get()
+    if perfilador is None:
+        return _INATIVA
+    return perfilador.etapa(nome, entrada)
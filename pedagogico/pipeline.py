@@ -0,0 +1,292 @@
+"""Execução em lote das quatro ferramentas, sem a interface do Streamlit.
+
+Encadeia compilação -> reestruturação -> busca ativa -> risco sobre uma pasta
+de planilhas de polo, mantendo os resultados intermediários em memória (nada
+é gravado e relido em .xlsx entre as etapas). Busca ativa e risco são
+calculados aluno a aluno, então rodam por DR/Polo num pool de processos; os
+resultados gerais são a junção dos resultados de cada grupo, na ordem original.
+As funções são as mesmas chamadas pelo app.py.
+
+Uso:
+    python -m pedagogico ENTRADA SAIDA [--ch ARQUIVO] [--carga-ideal 80] [--carga-ocorrida 36]
+                         [--historico ARQUIVO] [--data AAAA-MM-DD]
+"""
+import argparse
+import glob
+import os
+import re
+import sys
+
+import pandas as pd
+
+from pedagogico import perfil
+from pedagogico.atividades import DicionarioAtividades
+from pedagogico.busca_ativa import MatrizPendencias
+from pedagogico.compilacao import LIMITE_MEMORIA_PADRAO_MB, compilar_planilhas, conteudo_arquivo, pool_processos
+from pedagogico.exportacao import FORMATOS, copiar, exportar, nome_arquivo
+from pedagogico.historico import data_iso, registrar_historico
+from pedagogico.incremental import compilar_incremental
+from pedagogico.leitura import farejar_esquema, ler_planilha
+from pedagogico.reestruturacao import COLUNAS_ALUNO, aluno_id, colunas_faltantes, reestruturar_relatorio
+from pedagogico.risco import calcular_risco, detectar_coluna_ch
+from pedagogico.tipos import sem_categoria
+
+AVALIATIVAS = ["Todos", 1, 2, 3, 4]
+COLUNAS_GRUPO = ["DR", "Polo"]
+SEM_POLO = "(sem polo)"
+
+
+def calcular_pendencias(df):
+    """Pendências de cada avaliativa que tem colunas no relatório estruturado."""
+    matriz = MatrizPendencias(df)
+    pendencias = {}
+    for avaliativa in AVALIATIVAS:
+        colunas = matriz.colunas if avaliativa == "Todos" else matriz.colunas_da_avaliativa(avaliativa)
+        if colunas:
+            pendencias[avaliativa] = matriz.pendentes(avaliativa)
+    return pendencias
+
+
+def _processar_polo(estruturado, ch, ch_col, carga_ideal, carga_ocorrida):
+    pendencias = calcular_pendencias(estruturado)
+    risco = None
+    if ch is not None:
+        risco = calcular_risco(ch.copy(), ch_col, carga_ideal, carga_ocorrida)
+    return pendencias, risco
+
+
+def ch_por_aluno(relatorio, ch_col):
+    """Dados do aluno e CH do relatório compilado, que tem uma linha por atividade: uma linha por aluno.
+
+    Vale o primeiro valor preenchido de cada coluna entre as linhas do aluno.
+    """
+    if 'Aluno_ID' in relatorio.columns or 'Polo' in relatorio.columns:
+        ids = aluno_id(relatorio)
+    else:
+        ids = sem_categoria(relatorio['Nome'])
+    colunas = [col for col in relatorio.columns if col in COLUNAS_ALUNO or col == ch_col]
+    with perfil.etapa("ch_por_aluno", entrada=relatorio) as medida:
+        alunos = relatorio[colunas].groupby(ids.to_numpy(), sort=False).first()
+        return medida.saida(alunos.reset_index(drop=True))
+
+
+def _grupos(df):
+    """Divide o DataFrame por (DR, Polo), na ordem de aparição; vazios viram um grupo próprio."""
+    if df is None:
+        return {}
+    colunas = [col for col in COLUNAS_GRUPO if col in df.columns]
+    if not colunas:
+        return {(SEM_POLO,): df}
+    chaves = [df[col].astype(object).where(df[col].notna(), SEM_POLO) for col in colunas]
+    grupos = df.groupby(chaves, sort=False)
+    return {chave if isinstance(chave, tuple) else (chave,): grupo for chave, grupo in grupos}
+
+
+def _juntar(partes):
+    # Volta à ordem original das linhas; partes vazias não entram (mudariam os tipos)
+    preenchidas = [parte for parte in partes if len(parte)]
+    if not preenchidas:
+        return partes[0]
+    return pd.concat(preenchidas).sort_index(kind="stable")
+
+
+def executar_pipeline(arquivos, carga_ideal=80, carga_ocorrida=36, arquivo_ch=None,
+                      max_workers=None, limite_memoria_mb=LIMITE_MEMORIA_PADRAO_MB, base=None,
+                      atividades=None, historico=None, data=None):
+    """Roda as quatro etapas e retorna um dicionário com todos os resultados.
+
+    O risco usa ``arquivo_ch`` quando informado; senão, o próprio relatório
+    compilado, se tiver uma coluna CH, reduzido a uma linha por aluno (ver
+    ``ch_por_aluno``). Chaves do resultado: ``compilado``,
+    ``linhas_duplicadas`` (removidas na compilação), ``estruturado``,
+    ``pendencias`` (avaliativa -> DataFrame), ``risco``, ``coluna_ch`` e
+    ``por_polo`` ((DR, Polo) -> {"pendencias", "risco"}).
+    Com ``base`` (caminho de uma base incremental), só as planilhas novas ou
+    alteradas são lidas e o compilado inclui todas as planilhas da base.
+    ``atividades`` é o caminho de um dicionário de atividades (nomes e
+    apelidos; ver pedagogico.atividades) usado na reestruturação.
+    Com ``historico`` (caminho de uma base de histórico), o estruturado e o
+    risco são registrados como uma execução na ``data`` (padrão: hoje) e a
+    chave ``historico`` traz o resumo do registro.
+    """
+    if base is not None:
+        compilado, juncao = compilar_incremental(arquivos, base, max_workers=max_workers,
+                                                 limite_memoria_mb=limite_memoria_mb)
+    else:
+        compilado, juncao = compilar_planilhas(arquivos, max_workers=max_workers,
+                                               limite_memoria_mb=limite_memoria_mb)
+
+    relatorio = compilado.dropna(how='all')
+    faltantes = colunas_faltantes(relatorio)
+    if faltantes:
+        raise ValueError(f"Colunas faltantes no relatório compilado: {faltantes}")
+    dicionario = DicionarioAtividades(atividades) if atividades is not None else None
+    estruturado = reestruturar_relatorio(relatorio.copy(), dicionario)
+
+    if arquivo_ch is not None:
+        conteudo = conteudo_arquivo(arquivo_ch)
+        esquema = farejar_esquema(conteudo)
+        ch = ler_planilha(conteudo, cabecalho=esquema["linha_cabecalho"] or 0)
+        ch_col, pelo_nome = esquema["coluna_ch"], esquema["ch_pelo_nome"]
+    else:
+        ch_col, pelo_nome = detectar_coluna_ch(relatorio)
+        ch = ch_por_aluno(relatorio, ch_col) if ch_col is not None and pelo_nome else None
+    if ch_col is None or (arquivo_ch is None and not pelo_nome):
+        ch = None
+
+    grupos_estruturado = _grupos(estruturado)
+    grupos_ch = _grupos(ch)
+    polos = list(dict.fromkeys(list(grupos_estruturado) + list(grupos_ch)))
+
+    vazio = estruturado.iloc[:0]
+    por_polo = {}
+    with perfil.etapa("por_polo", entrada=estruturado) as medida, \
+            pool_processos(max_workers) as pool:
+        medida.anotar(polos=len(polos))
+        futuros = {
+            polo: pool.submit(_processar_polo, grupos_estruturado.get(polo, vazio), grupos_ch.get(polo),
+                              ch_col, carga_ideal, carga_ocorrida)
+            for polo in polos
+        }
+        for polo, futuro in futuros.items():
+            pendencias, risco = futuro.result()
+            por_polo[polo] = {"pendencias": pendencias, "risco": risco}
+
+    pendencias = {}
+    for avaliativa in AVALIATIVAS:
+        partes = [r["pendencias"][avaliativa] for r in por_polo.values() if avaliativa in r["pendencias"]]
+        if partes:
+            pendencias[avaliativa] = _juntar(partes)
+    partes = [r["risco"] for r in por_polo.values() if r["risco"] is not None]
+    risco = _juntar(partes) if partes else None
+
+    registro = None
+    if historico is not None:
+        registro = registrar_historico(historico, estruturado, risco, data=data, origem="pipeline")
+
+    return {
+        "compilado": compilado,
+        "linhas_duplicadas": juncao["linhas_duplicadas"],
+        "estruturado": estruturado,
+        "pendencias": pendencias,
+        "risco": risco,
+        "coluna_ch": ch_col if ch is not None else None,
+        "por_polo": por_polo,
+        "historico": registro,
+    }
+
+
+def _nome_pasta(texto):
+    return re.sub(r'[^\w\- ]+', '_', str(texto)).strip() or "_"
+
+
+def _gravar(df, caminho, formato, nome_aba):
+    os.makedirs(os.path.dirname(caminho), exist_ok=True)
+    with exportar(df, formato=formato, nome_aba=nome_aba) as arquivo, open(caminho, "wb") as f:
+        copiar(arquivo, f)
+    return caminho
+
+
+def _arquivos_saida(pendencias, risco):
+    saidas = []
+    for avaliativa, df in pendencias.items():
+        saidas.append((df, f"pendencias_avaliativa_{avaliativa}", "Pendências"))
+    if risco is not None:
+        saidas.append((risco, "relatorio_classificacao_estudantes", "Risco_Reprovacao"))
+    return saidas
+
+
+def salvar_resultados(resultado, destino, formato="xlsx", por_polo=True, max_workers=None):
+    """Grava os arquivos gerais em ``destino`` e, opcionalmente, uma pasta por DR/Polo."""
+    tarefas = [
+        (resultado["compilado"], os.path.join(destino, nome_arquivo("planilhas_compiladas", formato)), "Sheet1"),
+        (resultado["estruturado"], os.path.join(destino, nome_arquivo("relatorio_estruturado", formato)), "Sheet1"),
+    ]
+    for df, base, aba in _arquivos_saida(resultado["pendencias"], resultado["risco"]):
+        tarefas.append((df, os.path.join(destino, nome_arquivo(base, formato)), aba))
+
+    if por_polo:
+        for polo, r in resultado["por_polo"].items():
+            pasta = os.path.join(destino, "polos", *[_nome_pasta(parte) for parte in polo])
+            for df, base, aba in _arquivos_saida(r["pendencias"], r["risco"]):
+                tarefas.append((df, os.path.join(pasta, nome_arquivo(base, formato)), aba))
+
+    with pool_processos(max_workers) as pool:
+        futuros = [pool.submit(_gravar, df, caminho, formato, aba) for df, caminho, aba in tarefas]
+        return [futuro.result() for futuro in futuros]
+
+
+def listar_planilhas(entrada):
+    if os.path.isdir(entrada):
+        return sorted(glob.glob(os.path.join(entrada, "*.xlsx")))
+    return [entrada]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        prog="python -m pedagogico",
+        description="Compila, reestrutura e gera busca ativa e risco para uma pasta de planilhas."
+    )
+    parser.add_argument("entrada", help="pasta com as planilhas de polo (.xlsx)")
+    parser.add_argument("saida", help="pasta onde os resultados serão gravados")
+    parser.add_argument("--ch", help="planilha com a coluna CH (padrão: o próprio relatório compilado)")
+    parser.add_argument("--carga-ideal", type=float, default=80)
+    parser.add_argument("--carga-ocorrida", type=float, default=36)
+    parser.add_argument("--formato", choices=list(FORMATOS), default="xlsx")
+    parser.add_argument("--processos", type=int, default=None, help="processos em paralelo")
+    parser.add_argument("--limite-memoria-mb", type=int, default=LIMITE_MEMORIA_PADRAO_MB)
+    parser.add_argument("--sem-polos", action="store_true", help="não grava as pastas de cada DR/Polo")
+    parser.add_argument("--base", metavar="ARQUIVO",
+                        help="base incremental (SQLite): só planilhas novas ou alteradas são lidas")
+    parser.add_argument("--atividades", metavar="ARQUIVO",
+                        help="dicionário de atividades (SQLite) com os nomes canônicos e apelidos")
+    parser.add_argument("--historico", metavar="ARQUIVO",
+                        help="histórico dos estudantes (SQLite): registra esta execução e as mudanças")
+    parser.add_argument("--data", help="data do relatório no histórico (AAAA-MM-DD; padrão: hoje)")
+    parser.add_argument("--perfil", metavar="ARQUIVO",
+                        help="grava tempo e memória de cada etapa neste arquivo JSON Lines")
+    args = parser.parse_args(argv)
+    if args.data is not None:
+        try:
+            args.data = data_iso(args.data)
+        except ValueError as e:
+            parser.error(str(e))
+
+    if args.perfil:
+        perfil.ativar(perfil.Perfilador(arquivo_log=args.perfil))
+
+    arquivos = listar_planilhas(args.entrada)
+    if not arquivos:
+        parser.error(f"Nenhuma planilha .xlsx encontrada em {args.entrada}")
+
+    try:
+        resultado = executar_pipeline(
+            arquivos, carga_ideal=args.carga_ideal, carga_ocorrida=args.carga_ocorrida,
+            arquivo_ch=args.ch, max_workers=args.processos, limite_memoria_mb=args.limite_memoria_mb,
+            base=args.base, atividades=args.atividades, historico=args.historico, data=args.data
+        )
+    except ValueError as e:
+        print(f"Erro: {e}", file=sys.stderr)
+        return 1
+
+    gravados = salvar_resultados(resultado, args.saida, formato=args.formato,
+                                 por_polo=not args.sem_polos, max_workers=args.processos)
+
+    print(f"{len(arquivos)} planilha(s) compilada(s): {len(resultado['compilado'])} linhas")
+    if resultado["linhas_duplicadas"]:
+        print(f"{resultado['linhas_duplicadas']} linha(s) duplicada(s) removida(s)")
+    print(f"{len(resultado['estruturado'])} alunos no relatório estruturado")
+    for avaliativa, df in resultado["pendencias"].items():
+        print(f"Avaliativa {avaliativa}: {len(df)} aluno(s) com pendência")
+    if resultado["risco"] is None:
+        print("Risco não calculado: nenhuma coluna CH encontrada")
+    else:
+        contagem = resultado["risco"]["Classificacao"].value_counts()
+        for classe, total in contagem.items():
+            print(f"{classe}: {total}")
+    if resultado["historico"] is not None:
+        registro = resultado["historico"]
+        print(f"Histórico: execução {registro['execucao']}, {registro['alunos']} aluno(s), "
+              f"{registro['mudancas']} mudança(s) registrada(s)")
+    print(f"{len(gravados)} arquivo(s) gravado(s) em {args.saida}")
+    return 0
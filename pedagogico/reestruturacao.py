@@ -0,0 +1,180 @@
+"""Reestruturação do relatório compilado: uma linha por aluno, uma coluna por atividade.
+
+Em vez de dois ``pivot_table`` e dois ``merge`` pela chave textual
+``Aluno_ID``, aluno e atividade são fatorizados em códigos inteiros uma única
+vez. As menções e as tentativas são espalhadas numa só passada em matrizes
+pré-alocadas, e os dados do aluno são anexados pelo próprio código. O
+código da atividade vem do dicionário de atividades (ver
+pedagogico.atividades), que também decide o nome de cada coluna.
+"""
+import numpy as np
+import pandas as pd
+
+from pedagogico import perfil
+from pedagogico.atividades import DicionarioAtividades
+from pedagogico.tipos import como_mencao, menor_inteiro, sem_categoria
+
+COLUNA_ATIVIDADES = 'Atividades(tentativas/quantidade de tentativas)'
+COLUNAS_NECESSARIAS = ['Nome', COLUNA_ATIVIDADES, 'Menção Atual']
+COLUNAS_ALUNO = ['Aluno_ID', 'DR', 'Polo', 'Nome', 'Etapa', 'Sala', 'Área de conhecimento',
+                 'Data último acesso', 'Brasileiro(a)', 'Aluno AEE']
+
+
+def colunas_faltantes(colunas):
+    """Colunas obrigatórias ausentes; aceita um DataFrame ou a lista de colunas."""
+    return [col for col in COLUNAS_NECESSARIAS if col not in colunas]
+
+
+def colunas_leitura(colunas):
+    """Das colunas da planilha, as que a reestruturação usa."""
+    return [col for col in colunas if col in COLUNAS_ALUNO or col in COLUNAS_NECESSARIAS]
+
+
+def aluno_id(df):
+    """Chave de cada aluno: a coluna Aluno_ID, se houver; senão "Polo - Nome"."""
+    if 'Aluno_ID' in df.columns:
+        return sem_categoria(df['Aluno_ID'])
+    return sem_categoria(df['Polo']) + ' - ' + sem_categoria(df['Nome'])
+
+
+def _espalhar(distintos, codigos, vazio=np.nan):
+    # Código -1 (valor ausente) aponta para o último elemento, que é o valor de vazio
+    return np.append(np.asarray(distintos, dtype=object), vazio)[codigos]
+
+
+def preparar_atividades(df, dicionario):
+    """Acrescenta Aluno_ID, o nome bruto e o código da atividade e as tentativas.
+
+    O texto da coluna de atividades é tratado uma vez por valor distinto e
+    espalhado pelas linhas a partir dos códigos da fatorização; o código
+    (``Atividade_ID``) é o do ``dicionario``.
+    """
+    with perfil.etapa("nome_atividade", entrada=df):
+        df['Aluno_ID'] = aluno_id(df)
+        codigos, distintas = pd.factorize(df[COLUNA_ATIVIDADES])
+        distintas = pd.Series(np.asarray(distintas, dtype=object), dtype=object)
+        nomes = distintas.str.split('(').str[0].str.strip()
+        df['Atividade'] = _espalhar(nomes, codigos)
+    with perfil.etapa("dicionario_atividades", entrada=nomes) as medida:
+        ids = dicionario.codificar(nomes.tolist())
+        df['Atividade_ID'] = menor_inteiro(np.append(ids, -1)[codigos])
+        medida.anotar(atividades=len(np.unique(ids[ids >= 0])))
+
+    with perfil.etapa("tentativas", entrada=distintas):
+        if len(df):
+            tentativas = distintas.str.extract(r'\((\d+)/(\d+)\)')
+            for i, col in enumerate(['Tentativas_Realizadas', 'Tentativas_Total']):
+                contagem = pd.to_numeric(tentativas[i]).fillna(0).to_numpy(dtype=np.int64)
+                df[col] = menor_inteiro(np.append(contagem, 0)[codigos])
+    return df
+
+
+def _primeira_por_par(linhas, codigo_aluno, codigo_atividade, n_atividades):
+    # Equivale ao aggfunc='first': fica a primeira linha de cada par (aluno, atividade)
+    par = codigo_aluno[linhas] * n_atividades + codigo_atividade[linhas]
+    return linhas[~pd.Series(par).duplicated().to_numpy()]
+
+
+def _matriz(valores, linhas, codigo_aluno, codigo_atividade, n_alunos, n_atividades, preenchimento,
+            ausente=np.nan):
+    """Espalha os valores (inteiros) numa matriz alunos x atividades.
+
+    Alunos sem nenhum valor ficam com ``ausente`` na linha inteira (NaN
+    converte a matriz para float) e atividades sem nenhum valor são
+    descartadas, como no resultado do pivot_table + merge.
+    """
+    linhas_aluno = codigo_aluno[linhas]
+    linhas_atividade = codigo_atividade[linhas]
+
+    matriz = np.full((n_alunos, n_atividades), preenchimento, dtype=valores.dtype)
+    matriz[linhas_aluno, linhas_atividade] = valores[linhas]
+
+    presentes = np.zeros(n_alunos, dtype=bool)
+    presentes[linhas_aluno] = True
+    colunas = np.zeros(n_atividades, dtype=bool)
+    colunas[linhas_atividade] = True
+
+    matriz = matriz[:, colunas]
+    if not presentes.all():
+        if isinstance(ausente, float):
+            matriz = matriz.astype(float)
+        matriz[~presentes] = ausente
+    return matriz, colunas
+
+
+def pivotar_por_aluno(df, dicionario):
+    """Monta o relatório estruturado a partir do DataFrame de ``preparar_atividades``.
+
+    Mantém as colunas e a ordem do formato original: dados do aluno, uma
+    coluna de menção por atividade (``--`` quando não houve entrega) e, se
+    houver tentativas, uma coluna ``<atividade>_Tentativas`` por atividade.
+    As colunas levam o nome canônico do ``dicionario``, em ordem alfabética.
+    As colunas de menção saem categóricas, com a tabela de códigos de
+    ``pedagogico.tipos``: a matriz é montada só com os códigos.
+    """
+    with perfil.etapa("pivotagem", entrada=df) as medida:
+        return medida.saida(_pivotar(df, dicionario))
+
+
+def _codigos_atividade(ids, dicionario):
+    """Renumera os códigos do dicionário para 0..n-1 na ordem alfabética dos nomes."""
+    presentes = np.unique(ids[ids >= 0])
+    nomes = np.array(dicionario.nomes(presentes), dtype=object)
+    ordem = np.argsort(nomes, kind="stable")
+    posicao = np.full(int(presentes.max(initial=-1)) + 2, -1, dtype=np.int64)
+    posicao[presentes[ordem]] = np.arange(len(presentes))
+    # Código -1 (sem atividade) cai na última posição, que continua -1
+    return posicao[ids], pd.Index(nomes[ordem], dtype=object)
+
+
+def _pivotar(df, dicionario):
+    ids = df['Aluno_ID']
+    # Uma linha por aluno, na ordem da primeira aparição (inclusive Aluno_ID vazio)
+    linhas_info = np.flatnonzero(~ids.duplicated().to_numpy())
+    colunas_aluno = [col for col in COLUNAS_ALUNO if col in df.columns]
+    info_alunos = df.iloc[linhas_info][colunas_aluno].reset_index(drop=True)
+
+    # Aluno_ID vazio também ganha código (como no drop_duplicates), mas não entra na pivotagem;
+    # assim o código de cada aluno é a sua posição em info_alunos
+    codigo_aluno, _ = pd.factorize(ids, use_na_sentinel=False)
+    codigo_atividade, atividades = _codigos_atividade(df['Atividade_ID'].to_numpy(), dicionario)
+    n_alunos = len(linhas_info)
+    n_atividades = len(atividades)
+    validas = ids.notna().to_numpy() & (codigo_atividade >= 0)
+
+    blocos = [info_alunos]
+
+    mencoes = como_mencao(df['Menção Atual'])
+    tipo = mencoes.dtype
+    codigos = mencoes.cat.codes.to_numpy()
+    com_mencao = np.flatnonzero(validas & (codigos >= 0))
+    com_mencao = _primeira_por_par(com_mencao, codigo_aluno, codigo_atividade, n_atividades)
+    # "--" é o código 0 da tabela; -1 é o vazio do aluno sem nenhuma menção
+    matriz, colunas = _matriz(codigos, com_mencao, codigo_aluno, codigo_atividade,
+                              n_alunos, n_atividades, tipo.categories.get_loc('--'), ausente=-1)
+    blocos.append(pd.DataFrame({
+        col: pd.Categorical.from_codes(matriz[:, j], dtype=tipo)
+        for j, col in enumerate(atividades[colunas])
+    }, index=pd.RangeIndex(n_alunos)))
+
+    if 'Tentativas_Realizadas' in df.columns:
+        tentativas = df['Tentativas_Realizadas'].to_numpy()
+        com_tentativa = _primeira_por_par(np.flatnonzero(validas), codigo_aluno, codigo_atividade,
+                                          n_atividades)
+        matriz, colunas = _matriz(tentativas, com_tentativa, codigo_aluno, codigo_atividade,
+                                  n_alunos, n_atividades, 0)
+        blocos.append(pd.DataFrame(matriz, columns=[f'{col}_Tentativas' for col in atividades[colunas]]))
+
+    resultado = pd.concat(blocos, axis=1)
+    return resultado.infer_objects()
+
+
+def reestruturar_relatorio(df, dicionario=None):
+    """Etapa completa: prepara as atividades e pivota por aluno.
+
+    Sem ``dicionario``, usa um dicionário de atividades só em memória, sem apelidos.
+    """
+    if dicionario is None:
+        dicionario = DicionarioAtividades()
+    with perfil.etapa("reestruturacao", entrada=df) as medida:
+        return medida.saida(pivotar_por_aluno(preparar_atividades(df, dicionario), dicionario))
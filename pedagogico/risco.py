@@ -0,0 +1,334 @@
+"""Núcleo do cálculo de risco de reprovação presencial.
+
+A coluna CH ("28/84", "36 / 76", "28,5/80" ou só "28") é interpretada com
+extração vetorizada de texto, e a classificação usa limites aplicados sobre
+arrays. Valores fora desses formatos caem em ``parse_ch``, a regra original
+linha a linha, de modo que o resultado é sempre o mesmo.
+
+``projetar_risco`` aplica a mesma regra a um cronograma de vários meses de
+uma vez, numa grade estudantes × meses.
+"""
+import re
+
+import numpy as np
+import pandas as pd
+
+from pedagogico import perfil
+from pedagogico.tipos import categorica
+
+CLASSE_RISCO = "Risco de Reprovação Presencial"
+CLASSE_ATENCAO = "Atenção necessária"
+CLASSE_IDEAL = "Situação Ideal"
+CLASSES = [CLASSE_RISCO, CLASSE_ATENCAO, CLASSE_IDEAL]
+LIMITE_RISCO = 75
+LIMITE_ATENCAO = 80
+# Linhas usadas para reconhecer a coluna CH pelos valores
+AMOSTRA_CH = 50
+# Grupo dos estudantes sem DR ou Polo na projeção por polo
+SEM_GRUPO = "(sem polo)"
+
+# Textos só com dígitos, ponto, vírgula, barra e espaço seguem pelo caminho vetorizado
+_SIMPLES = r'[0-9.,/ ]+'
+_FRACAO = r'([0-9]+(?:[.,][0-9]+)?) */ *([0-9]+(?:[.,][0-9]+)?)'
+_NUMERO = r'(?:[0-9]+\.?[0-9]*|\.[0-9]+)'
+
+
+def parse_ch(val):
+    """Aceita formatos como '28/84', '36 / 76', ou apenas '28'."""
+    if pd.isna(val):
+        return (np.nan, np.nan)
+    s = str(val).strip()
+    m = re.search(r'(\d+(?:[.,]\d+)?)\s*/\s*(\d+(?:[.,]\d+)?)', s)
+    if m:
+        num = float(m.group(1).replace(',', '.'))
+        den = float(m.group(2).replace(',', '.'))
+        return (num, den)
+    parts = s.split('/')
+    if len(parts) == 2:
+        try:
+            num = float(parts[0].replace(',', '.'))
+            den = float(parts[1].replace(',', '.'))
+            return (num, den)
+        except ValueError:
+            return (np.nan, np.nan)
+    try:
+        num = float(s.replace(',', '.'))
+        return (num, np.nan)
+    except ValueError:
+        return (np.nan, np.nan)
+
+
+def _para_float(textos):
+    return textos.str.replace(',', '.', regex=False).astype(float).to_numpy()
+
+
+def _interpretar_textos(textos):
+    """Interpreta textos de CH distintos; retorna (realizadas, totais)."""
+    n = len(textos)
+    realizadas = np.full(n, np.nan)
+    totais = np.full(n, np.nan)
+    resolvidos = np.zeros(n, dtype=bool)
+
+    simples = textos.str.fullmatch(_SIMPLES).to_numpy(dtype=bool)
+
+    fracao = textos[simples].str.extract(_FRACAO)
+    com_fracao = fracao[0].notna().to_numpy()
+    linhas = np.flatnonzero(simples)[com_fracao]
+    realizadas[linhas] = _para_float(fracao[0][com_fracao])
+    totais[linhas] = _para_float(fracao[1][com_fracao])
+    resolvidos[linhas] = True
+
+    # Número puro: sem barra, após trocar a vírgula decimal por ponto
+    sem_barra = simples & ~resolvidos & ~textos.str.contains('/', regex=False).to_numpy(dtype=bool)
+    candidatos = textos[sem_barra].str.strip().str.replace(',', '.', regex=False)
+    numero = candidatos.str.fullmatch(_NUMERO).to_numpy(dtype=bool)
+    linhas = np.flatnonzero(sem_barra)[numero]
+    realizadas[linhas] = candidatos[numero].astype(float).to_numpy()
+    resolvidos[sem_barra] = True  # os demais não são número nem fração: ficam NaN
+
+    # O que sobrou (outros formatos) segue a regra original
+    for linha in np.flatnonzero(~resolvidos):
+        realizadas[linha], totais[linha] = parse_ch(textos.iloc[linha])
+
+    return realizadas, totais
+
+
+def interpretar_ch(serie):
+    """Converte a coluna CH em dois arrays: horas realizadas e horas totais do arquivo.
+
+    Os textos são fatorizados antes da extração: uma coluna CH tem poucos
+    valores distintos, e cada um é interpretado uma única vez.
+    """
+    realizadas = np.full(len(serie), np.nan)
+    totais = np.full(len(serie), np.nan)
+
+    if categorica(serie):
+        # Coluna compacta: as categorias já são os valores distintos
+        codigos = serie.cat.codes.to_numpy()
+        presentes = codigos >= 0
+        codigos = codigos[presentes]
+        unicos = serie.cat.categories.astype(str)
+    else:
+        presentes = serie.notna().to_numpy()
+        codigos, unicos = pd.factorize(serie[presentes].astype(str))
+    realizadas_unicos, totais_unicos = _interpretar_textos(pd.Series(unicos, dtype=object))
+    realizadas[presentes] = realizadas_unicos[codigos]
+    totais[presentes] = totais_unicos[codigos]
+    return realizadas, totais
+
+
+def classificar(percentual):
+    """Classificação pelo percentual final possível (NaN conta como situação ideal).
+
+    Retorna um Categorical com as categorias de ``CLASSES``.
+    """
+    return pd.Categorical.from_codes(codigos_classe(percentual), categories=CLASSES)
+
+
+def codigos_classe(percentual):
+    """Posição em ``CLASSES`` de cada percentual (int8, com a mesma forma da entrada)."""
+    percentual = np.asarray(percentual, dtype=float)
+    # NaN não é menor que nenhum limite: fica com o código da situação ideal
+    return 2 - (percentual < LIMITE_RISCO).astype(np.int8) - (percentual < LIMITE_ATENCAO).astype(np.int8)
+
+
+def parece_ch(valores):
+    """Se ao menos metade dos valores preenchidos está no formato horas/total ("28/84")."""
+    textos = [str(valor).strip() for valor in valores if not pd.isna(valor)]
+    textos = [texto for texto in textos if texto]
+    if not textos:
+        return False
+    return 2 * sum(re.fullmatch(_FRACAO, texto) is not None for texto in textos) >= len(textos)
+
+
+def escolher_coluna_ch(colunas, amostras):
+    """Escolhe a coluna CH a partir dos nomes e de uma amostra dos valores de cada coluna.
+
+    Retorna (coluna, encontrada_pelo_nome, motivo). Ordem de preferência:
+    cabeçalho com "ch" e valores no formato horas/total; cabeçalho com "ch";
+    primeira coluna com valores no formato; a 5ª coluna (E).
+    """
+    por_nome = [i for i, col in enumerate(colunas) if isinstance(col, str) and 'ch' in col.lower()]
+    for i in por_nome:
+        if parece_ch(amostras[i]):
+            return colunas[i], True, "cabeçalho contém 'CH' e os valores estão no formato horas/total"
+    if por_nome:
+        return colunas[por_nome[0]], True, "cabeçalho contém 'CH', mas os valores não estão no formato horas/total"
+    for i, col in enumerate(colunas):
+        if parece_ch(amostras[i]):
+            return col, False, "nenhum cabeçalho contém 'CH'; é a primeira coluna com valores no formato horas/total"
+    if len(colunas) >= 5:
+        return colunas[4], False, "nenhum cabeçalho contém 'CH' nem há valores no formato horas/total; usando a 5ª coluna (E)"
+    return None, False, "nenhum cabeçalho contém 'CH' e a planilha tem menos de 5 colunas"
+
+
+def detectar_coluna_ch(df):
+    """Retorna (coluna, encontrada_pelo_nome); a coluna é None se não houver candidata."""
+    amostra = df.head(AMOSTRA_CH)
+    coluna, pelo_nome, _ = escolher_coluna_ch(
+        list(df.columns), [amostra.iloc[:, i].tolist() for i in range(df.shape[1])]
+    )
+    return coluna, pelo_nome
+
+
+def _horas_totais(totais_arquivo, carga_ideal):
+    # Denominador ausente ou não positivo: usa a carga ideal informada
+    return np.where(np.isnan(totais_arquivo) | (totais_arquivo <= 0), carga_ideal, totais_arquivo)
+
+
+def calcular_risco(df, ch_col, carga_ideal, carga_ocorrida):
+    """Acrescenta ao DataFrame as colunas de horas, percentuais e a Classificacao."""
+    with perfil.etapa("risco", entrada=df) as medida:
+        return medida.saida(_calcular_risco(df, ch_col, carga_ideal, carga_ocorrida))
+
+
+def _calcular_risco(df, ch_col, carga_ideal, carga_ocorrida):
+    with perfil.etapa("interpretar_ch", entrada=df[ch_col]):
+        realizadas, totais_arquivo = interpretar_ch(df[ch_col])
+    df['Horas_Realizadas'] = realizadas
+    df['Horas_Totais_Arquivo'] = totais_arquivo
+
+    totais = _horas_totais(totais_arquivo, carga_ideal)
+    df['Horas_Totais_Usadas'] = totais
+
+    restantes = np.maximum(totais - carga_ocorrida, 0)
+    df['Horas_Restantes_Possiveis'] = restantes
+
+    percentual_atual = realizadas / totais * 100
+    df['Percentual_Atual'] = percentual_atual
+    maximo = np.where(np.isnan(realizadas), 0, realizadas) + restantes
+    df['Max_Horas_Possiveis'] = maximo
+    percentual_final = maximo / totais * 100
+    df['Percentual_Final_Possivel'] = percentual_final
+
+    df['Classificacao'] = classificar(percentual_final)
+
+    df['Percentual_Atual'] = df['Percentual_Atual'].round(1)
+    df['Percentual_Final_Possivel'] = df['Percentual_Final_Possivel'].round(1)
+    return df
+
+
+def _agrupar(series, linhas):
+    """Código do grupo de cada linha e, por coluna, o valor de cada grupo (grupos em ordem).
+
+    Cada coluna é fatorizada à parte (vazios viram ``SEM_GRUPO``; coluna
+    None é um grupo só) e os códigos são combinados num inteiro por linha.
+    """
+    combinado = np.zeros(linhas, dtype=np.int64)
+    fatores = []
+    for serie in series:
+        if serie is None:
+            codigos, valores = np.zeros(linhas, dtype=np.int64), np.array([SEM_GRUPO], dtype=object)
+        else:
+            try:
+                codigos, valores = pd.factorize(serie, sort=True, use_na_sentinel=False)
+            except TypeError:
+                codigos, valores = pd.factorize(serie, use_na_sentinel=False)
+            valores = np.asarray(valores, dtype=object)
+            valores[pd.isna(valores)] = SEM_GRUPO
+        combinado = combinado * len(valores) + codigos
+        fatores.append(valores)
+    unicos, codigos_grupo = np.unique(combinado, return_inverse=True)
+    # Desfaz a combinação para saber o valor de cada coluna em cada grupo
+    colunas = []
+    for valores in reversed(fatores):
+        colunas.append(valores[unicos % len(valores)])
+        unicos = unicos // len(valores)
+    return codigos_grupo.ravel(), colunas[::-1]
+
+
+def projetar_risco(df, ch_col, cronograma, carga_ideal):
+    """Projeção do risco de cada estudante para vários meses de uma vez.
+
+    ``cronograma`` associa cada mês, em ordem, à carga horária já ocorrida
+    (acumulada) ao fim dele. Para cada estudante e mês vale a mesma regra de
+    ``calcular_risco``, supondo que o estudante não realize mais nenhuma hora
+    além das que já constam no arquivo. Retorna uma ``ProjecaoRisco``.
+    """
+    with perfil.etapa("projecao_risco", entrada=df) as medida:
+        with perfil.etapa("interpretar_ch", entrada=df[ch_col]):
+            realizadas, totais_arquivo = interpretar_ch(df[ch_col])
+        projecao = ProjecaoRisco(df, realizadas, totais_arquivo, cronograma, carga_ideal)
+        medida.anotar(meses=len(projecao.meses))
+        return projecao
+
+
+class ProjecaoRisco:
+    """Percentual final possível e classificação de cada estudante (linhas) em cada mês (colunas).
+
+    A grade é calculada numa única operação de arrays com difusão
+    (estudantes × meses); as tabelas por estudante e por polo são montadas
+    a partir dela sem laço pelas linhas.
+    """
+
+    def __init__(self, df, realizadas, totais_arquivo, cronograma, carga_ideal):
+        cronograma = dict(cronograma)
+        if not cronograma:
+            raise ValueError("cronograma vazio: informe a carga ocorrida acumulada de ao menos um mês")
+        self.df = df
+        self.meses = list(cronograma)
+        ocorridas = np.array(list(cronograma.values()), dtype=float)
+        if np.isnan(ocorridas).any() or (ocorridas < 0).any():
+            raise ValueError("A carga horária ocorrida de cada mês deve ser um número não negativo")
+        if (np.diff(ocorridas) < 0).any():
+            raise ValueError("O cronograma deve ser acumulado: a carga ocorrida não pode diminuir de um mês para o outro")
+
+        totais = _horas_totais(totais_arquivo, carga_ideal)
+        restantes = np.maximum(totais[:, None] - ocorridas[None, :], 0)
+        maximo = np.where(np.isnan(realizadas), 0, realizadas)[:, None] + restantes
+        self.percentual = maximo / totais[:, None] * 100
+        self.codigos = codigos_classe(self.percentual)
+
+        # Primeiro mês abaixo do limite de risco; -1 se o estudante nunca fica irrecuperável
+        abaixo = self.codigos == 0
+        self.primeiro_mes = np.where(abaixo.any(axis=1), abaixo.argmax(axis=1), -1)
+
+    def classificacao(self, mes):
+        """Classificação de todos os estudantes no ``mes`` (Categorical com as ``CLASSES``)."""
+        return pd.Categorical.from_codes(self.codigos[:, self.meses.index(mes)], categories=CLASSES)
+
+    def mes_irrecuperavel(self):
+        """Mês em que cada estudante fica abaixo de 75% pela primeira vez (vazio se não fica)."""
+        return pd.Categorical.from_codes(self.primeiro_mes, categories=self.meses, ordered=True)
+
+    def por_aluno(self, colunas=None):
+        """Colunas ``colunas`` do arquivo, o percentual final possível de cada mês e o mês irrecuperável."""
+        base = self.df if colunas is None else self.df[list(colunas)]
+        grade = pd.DataFrame(
+            self.percentual.round(1), index=self.df.index,
+            columns=[f"Percentual_Final_{mes}" for mes in self.meses]
+        )
+        resultado = pd.concat([base, grade], axis=1)
+        resultado["Mes_Irrecuperavel"] = self.mes_irrecuperavel()
+        return resultado
+
+    def por_polo(self, grupos=("DR", "Polo")):
+        """Quantidade de estudantes em cada classe, por grupo e mês.
+
+        Uma linha por grupo (valores de ``grupos``; vazios viram ``(sem polo)``)
+        e mês, com uma coluna por classe e ``Novos_Irrecuperaveis``: quantos
+        ficam abaixo de 75% pela primeira vez naquele mês.
+        """
+        grupos = [col for col in grupos if col in self.df.columns] or ["Polo"]
+        codigos_grupo, valores = _agrupar([self.df[col] if col in self.df.columns else None for col in grupos],
+                                          len(self.df))
+        n_grupos, n_meses, n_classes = len(valores[0]), len(self.meses), len(CLASSES)
+
+        # Um só bincount sobre (grupo, mês, classe) conta todas as células da grade
+        celulas = (codigos_grupo[:, None] * n_meses + np.arange(n_meses)) * n_classes + self.codigos
+        contagens = np.bincount(celulas.ravel(), minlength=n_grupos * n_meses * n_classes)
+        contagens = contagens.reshape(n_grupos * n_meses, n_classes)
+        irrecuperaveis = self.primeiro_mes >= 0
+        novos = np.bincount(
+            codigos_grupo[irrecuperaveis] * n_meses + self.primeiro_mes[irrecuperaveis],
+            minlength=n_grupos * n_meses
+        )
+
+        resultado = pd.DataFrame({col: np.repeat(valores[i], n_meses) for i, col in enumerate(grupos)})
+        resultado["Mes"] = pd.Categorical.from_codes(
+            np.tile(np.arange(n_meses), n_grupos), categories=self.meses, ordered=True
+        )
+        for i, classe in enumerate(CLASSES):
+            resultado[classe] = contagens[:, i]
+        resultado["Novos_Irrecuperaveis"] = novos
+        return resultado
@@ -0,0 +1,221 @@
+"""Execução em segundo plano das etapas longas do app, com progresso e cancelamento.
+
+O Streamlit reexecuta o app.py a cada interação, e uma compilação rodando na
+thread do script seria interrompida e recomeçada a cada clique. Aqui a etapa
+roda num pool de threads compartilhado; o script só consulta o andamento e,
+quando a tarefa termina, pega o resultado, que fica guardado com a tarefa.
+
+O pool é um só para o processo: no máximo ``MAX_TAREFAS`` tarefas rodam ao
+mesmo tempo, somando as de todos os usuários, e as demais esperam a vez na
+ordem em que foram submetidas. ``Tarefa.posicao_fila`` diz quantas estão na
+frente, para a página mostrar por que a tarefa ainda não começou.
+
+Cada sessão tem o seu ``Tarefas`` (guardado no ``st.session_state``), com no
+máximo uma tarefa por nome. A tarefa é identificada pela ``chave``, um hash
+das entradas (ver ``chave_tarefa``): submeter de novo com a mesma chave
+devolve a tarefa existente, em andamento ou concluída; com outra chave, a
+anterior é cancelada e uma nova começa.
+
+A função da tarefa recebe ``progresso=`` e deve chamá-lo a cada arquivo,
+bloco ou etapa, como ``progresso(feitos, total, mensagem)``. O cancelamento é
+cooperativo: depois de pedido, a próxima chamada de ``progresso`` levanta
+``TarefaCancelada`` dentro da tarefa.
+"""
+import concurrent.futures
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+
+from pedagogico import perfil
+
+logger = logging.getLogger(__name__)
+
+MAX_TAREFAS = int(os.environ.get("PEDAGOGICO_TAREFAS", "2"))
+
+AGUARDANDO = "aguardando"
+EXECUTANDO = "executando"
+CONCLUIDA = "concluída"
+FALHOU = "falhou"
+CANCELADA = "cancelada"
+
+_executor = None
+_trava_executor = threading.Lock()
+# Tarefas submetidas ao pool compartilhado que ainda não começaram, na ordem de submissão
+_fila = []
+_trava_fila = threading.Lock()
+
+
+def executor_padrao():
+    """Pool de threads compartilhado pelas sessões (criado no primeiro uso)."""
+    global _executor
+    with _trava_executor:
+        if _executor is None:
+            _executor = concurrent.futures.ThreadPoolExecutor(
+                max_workers=MAX_TAREFAS, thread_name_prefix="pedagogico-tarefa"
+            )
+        return _executor
+
+
+def chave_tarefa(*partes):
+    """SHA-256 das entradas: bytes entram como estão, o resto como JSON."""
+    digest = hashlib.sha256()
+    for parte in partes:
+        if not isinstance(parte, (bytes, bytearray, memoryview)):
+            parte = json.dumps(parte, sort_keys=True, default=str).encode("utf-8")
+        digest.update(hashlib.sha256(parte).digest())
+    return digest.hexdigest()
+
+
+def _sair_da_fila(tarefa):
+    with _trava_fila:
+        if tarefa in _fila:
+            _fila.remove(tarefa)
+
+
+class TarefaCancelada(Exception):
+    """Levantada dentro da tarefa quando o cancelamento foi pedido."""
+
+
+class Tarefa:
+    """Uma execução em segundo plano: estado, progresso e resultado (ou erro)."""
+
+    def __init__(self, nome, chave):
+        self.nome = nome
+        self.chave = chave
+        self.estado = AGUARDANDO
+        self.feitos = 0
+        self.total = None
+        self.mensagem = ""
+        self.resultado = None
+        self.erro = None
+        self.inicio = time.time()
+        self.fim = None
+        # Com o painel de desempenho ligado, a tarefa mede as suas etapas à parte
+        ativo = perfil.perfilador_ativo()
+        self.perfilador = perfil.Perfilador(contexto={**ativo.contexto, "tarefa": nome}) if ativo else None
+        self._cancelamento = threading.Event()
+        self._futuro = None
+
+    @property
+    def ativa(self):
+        return self.estado in (AGUARDANDO, EXECUTANDO)
+
+    @property
+    def posicao_fila(self):
+        """Quantas tarefas do pool compartilhado estão na frente desta (None se ela não está na fila)."""
+        with _trava_fila:
+            return _fila.index(self) if self in _fila else None
+
+    @property
+    def fracao(self):
+        """Fração concluída (0 a 1); 0 enquanto o total não é conhecido."""
+        if not self.total:
+            return 0.0
+        return min(self.feitos / self.total, 1.0)
+
+    def progresso(self, feitos, total=None, mensagem=None):
+        """Atualiza o andamento; é também o ponto em que o cancelamento é atendido."""
+        if self._cancelamento.is_set():
+            raise TarefaCancelada(self.nome)
+        self.feitos = feitos
+        self.total = total
+        if mensagem is not None:
+            self.mensagem = mensagem
+
+    def cancelar(self):
+        self._cancelamento.set()
+        if self._futuro is not None and self._futuro.cancel():
+            _sair_da_fila(self)
+            self._finalizar(CANCELADA)
+
+    def aguardar(self, timeout=None):
+        """Espera a tarefa terminar por até ``timeout`` segundos; retorna se terminou."""
+        if self._futuro is not None:
+            concurrent.futures.wait([self._futuro], timeout=timeout)
+        return not self.ativa
+
+    def _finalizar(self, estado):
+        self.fim = time.time()
+        self.estado = estado
+
+    def _executar(self, funcao, args, kwargs):
+        _sair_da_fila(self)
+        if self._cancelamento.is_set():
+            self._finalizar(CANCELADA)
+            return
+        self.estado = EXECUTANDO
+        perfil.ativar(self.perfilador)
+        try:
+            resultado = funcao(*args, progresso=self.progresso, **kwargs)
+        except TarefaCancelada:
+            self._finalizar(CANCELADA)
+        except Exception as erro:
+            logger.exception("Tarefa %s falhou", self.nome)
+            self.erro = erro
+            self._finalizar(FALHOU)
+        else:
+            if self._cancelamento.is_set():
+                self._finalizar(CANCELADA)
+            else:
+                self.resultado = resultado
+                self._finalizar(CONCLUIDA)
+        finally:
+            # A thread do pool é reaproveitada por outras tarefas
+            perfil.ativar(None)
+
+
+class Tarefas:
+    """Tarefas de uma sessão, no máximo uma por nome."""
+
+    def __init__(self, executor=None):
+        self._executor = executor
+        self._tarefas = {}
+        self._trava = threading.Lock()
+
+    def submeter(self, nome, chave, funcao, *args, **kwargs):
+        """Executa ``funcao(*args, progresso=..., **kwargs)`` em segundo plano.
+
+        Se a tarefa ``nome`` já existe com a mesma ``chave``, ela é devolvida
+        como está (inclusive se falhou ou foi cancelada; ver ``descartar``).
+        """
+        with self._trava:
+            atual = self._tarefas.get(nome)
+            if atual is not None and atual.chave == chave:
+                return atual
+            if atual is not None:
+                atual.cancelar()
+            tarefa = Tarefa(nome, chave)
+            self._tarefas[nome] = tarefa
+        if self._executor is not None:
+            tarefa._futuro = self._executor.submit(tarefa._executar, funcao, args, kwargs)
+            return tarefa
+        # Entra na fila antes do submit: a tarefa pode começar antes de o submit retornar
+        with _trava_fila:
+            _fila.append(tarefa)
+        try:
+            tarefa._futuro = executor_padrao().submit(tarefa._executar, funcao, args, kwargs)
+        except BaseException:
+            _sair_da_fila(tarefa)
+            raise
+        return tarefa
+
+    def obter(self, nome):
+        return self._tarefas.get(nome)
+
+    def cancelar(self, nome):
+        tarefa = self._tarefas.get(nome)
+        if tarefa is not None:
+            tarefa.cancelar()
+
+    def descartar(self, nome):
+        """Cancela (se preciso) e esquece a tarefa; a próxima submissão recomeça."""
+        with self._trava:
+            tarefa = self._tarefas.pop(nome, None)
+        if tarefa is not None:
+            tarefa.cancelar()
+
+    def __iter__(self):
+        return iter(list(self._tarefas.values()))
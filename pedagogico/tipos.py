@@ -0,0 +1,98 @@
+"""Representação compacta dos DataFrames: categorias e inteiros pequenos.
+
+Colunas de texto com poucos valores distintos (DR, Polo, Etapa, Sala, Área,
+atividades...) viram categorias: cada linha guarda só um código de 1 ou 2
+bytes, e o texto fica uma vez na tabela de categorias. As menções usam uma
+tabela de códigos fixa (``MENCOES``), a mesma em todas as colunas de
+atividade do relatório estruturado, e contagens viram int8/int16. Os valores
+não mudam, só a forma de guardá-los; pivô, máscaras e exportação trabalham
+direto sobre os códigos.
+"""
+import numpy as np
+import pandas as pd
+
+from pedagogico import perfil
+
+# Tabela fixa de códigos das menções; valores fora dela entram depois, em ordem
+MENCOES = ["--", "I", "R", "B", "MB"]
+COLUNAS_MENCAO = ["Menção Atual"]
+# Texto vira categoria quando tem até esta fração de valores distintos
+LIMITE_CARDINALIDADE = 0.5
+
+
+def tipo_mencao(valores=()):
+    """CategoricalDtype das menções: a tabela fixa mais os valores que não estão nela."""
+    extras = {valor for valor in valores if not pd.isna(valor)} - set(MENCOES)
+    return pd.CategoricalDtype(MENCOES + sorted(extras, key=str))
+
+
+def categorica(serie):
+    return isinstance(serie.dtype, pd.CategoricalDtype)
+
+
+def como_mencao(serie):
+    """A série no tipo das menções (já categórica com a tabela fixa, não é copiada)."""
+    if categorica(serie) and list(serie.cat.categories[:len(MENCOES)]) == MENCOES:
+        return serie
+    return serie.astype(tipo_mencao(pd.unique(serie.dropna().to_numpy(dtype=object))))
+
+
+def sem_categoria(serie):
+    """Volta uma coluna categórica ao tipo dos seus valores (para operações de texto)."""
+    if categorica(serie):
+        return serie.astype(serie.cat.categories.dtype)
+    return serie
+
+
+def menor_inteiro(valores):
+    """Array de inteiros no menor tipo com sinal que comporta os valores."""
+    valores = np.asarray(valores)
+    if len(valores) == 0:
+        return valores.astype(np.int8)
+    menor, maior = valores.min(), valores.max()
+    for tipo in (np.int8, np.int16, np.int32):
+        limites = np.iinfo(tipo)
+        if limites.min <= menor and maior <= limites.max:
+            return valores.astype(tipo)
+    return valores.astype(np.int64)
+
+
+def _texto(serie):
+    return serie.dtype == object or pd.api.types.is_string_dtype(serie.dtype)
+
+
+def compactar_coluna(serie, limite=LIMITE_CARDINALIDADE):
+    if categorica(serie):
+        return serie
+    if isinstance(serie.dtype, np.dtype) and serie.dtype.kind in "iu":
+        return pd.Series(menor_inteiro(serie.to_numpy()), index=serie.index, name=serie.name)
+    if not _texto(serie):
+        return serie
+    # Só colunas inteiramente de texto: misturas (datas, números) ficam como estão
+    if len(serie) == 0 or pd.api.types.infer_dtype(serie, skipna=True) != "string":
+        return serie
+    distintos = serie.dropna().unique()
+    if len(distintos) > limite * len(serie):
+        return serie
+    if set(distintos) <= set(MENCOES):
+        # Colunas só de menções (as atividades do relatório estruturado) usam a tabela fixa
+        return serie.astype(tipo_mencao())
+    return serie.astype("category")
+
+
+def compactar(df, limite=LIMITE_CARDINALIDADE):
+    """Cópia rasa do DataFrame com as colunas na forma compacta.
+
+    As colunas de ``COLUNAS_MENCAO`` sempre usam a tabela de menções; as
+    demais colunas de texto viram categoria se tiverem até ``limite`` de
+    valores distintos.
+    """
+    with perfil.etapa("compactacao", entrada=df) as medida:
+        compacto = df.copy(deep=False)
+        for i, col in enumerate(df.columns):
+            serie = df.iloc[:, i]
+            if col in COLUNAS_MENCAO and _texto(serie):
+                compacto.isetitem(i, como_mencao(serie))
+            else:
+                compacto.isetitem(i, compactar_coluna(serie, limite))
+        return medida.saida(compacto)
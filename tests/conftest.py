@@ -0,0 +1,40 @@
+import pytest
+
+from benchmarks.gerador import gerar_compilado, gerar_planilhas
+from pedagogico.exportacao import exportar
+
+
+def _xlsx(df):
+    arquivo = exportar(df)
+    try:
+        return arquivo.read()
+    finally:
+        arquivo.close()
+
+
+@pytest.fixture(scope="session")
+def xlsx():
+    """Bytes do .xlsx que o app exporta para um DataFrame."""
+    return _xlsx
+
+
+@pytest.fixture(scope="session")
+def compilado():
+    return gerar_compilado(linhas=600, n_polos=3, n_atividades=10, n_avaliativas=2, semente=7)
+
+
+@pytest.fixture(scope="session")
+def planilhas(compilado):
+    return [conteudo for _, conteudo in gerar_planilhas(compilado)]
+
+
+@pytest.fixture(scope="session")
+def relatorio(compilado):
+    """Relatório compilado com grafias variadas, menções vazias e atividades repetidas."""
+    df = compilado.copy()
+    atividades = "Atividades(tentativas/quantidade de tentativas)"
+    df.loc[3, atividades] = "avaliativa 1 - MATEMÁTICA(1/2)"
+    df.loc[14, atividades] = "Avaliativa 2 - Matematica(0/1)"
+    df.loc[[5, 27], "Menção Atual"] = None
+    df.loc[40, atividades] = df.loc[41, atividades]
+    return _xlsx(df)
@@ -0,0 +1,173 @@
+"""Regras do app original (commit baseline), para comparar com os módulos atuais.
+
+Cada função repete o código da página correspondente do ``app.py`` original,
+só sem o Streamlit; os testes rodam as duas versões sobre os mesmos arquivos.
+"""
+import io
+import re
+import unicodedata
+
+import numpy as np
+import pandas as pd
+
+
+def compilar(conteudos):
+    dfs = []
+    for conteudo in conteudos:
+        df = pd.read_excel(io.BytesIO(conteudo), header=None)
+        df = df.iloc[1:].reset_index(drop=True)
+        df.columns = df.iloc[0]
+        df = df.iloc[1:].reset_index(drop=True)
+        dfs.append(df)
+    df_compilado = pd.concat(dfs, ignore_index=True)
+    return df_compilado.loc[:, ~df_compilado.columns.duplicated()]
+
+
+def _normalizar_nome(nome):
+    if pd.isna(nome):
+        return nome
+    nome = ''.join(c for c in unicodedata.normalize('NFD', str(nome))
+                   if unicodedata.category(c) != 'Mn')
+    return nome.lower().strip()
+
+
+def reestruturar(conteudo):
+    preview = pd.read_excel(io.BytesIO(conteudo), header=None, nrows=10)
+    header_linha = None
+    for i, row in preview.iterrows():
+        if all(col in row.values for col in ['DR', 'Polo', 'Nome']):
+            header_linha = i
+            break
+    df = pd.read_excel(io.BytesIO(conteudo), header=header_linha)
+    df = df.dropna(how='all')
+
+    df['Aluno_ID'] = df['Polo'] + ' - ' + df['Nome']
+    df['Atividade'] = df['Atividades(tentativas/quantidade de tentativas)'].str.split('(').str[0].str.strip()
+    df['Atividade_Normalizada'] = df['Atividade'].apply(_normalizar_nome)
+
+    tentativas = df['Atividades(tentativas/quantidade de tentativas)'].str.extract(r'\((\d+)/(\d+)\)')
+    if not tentativas.empty:
+        df['Tentativas_Realizadas'] = tentativas[0].fillna(0).astype(int)
+        df['Tentativas_Total'] = tentativas[1].fillna(0).astype(int)
+
+    pivot_mencoes = df.pivot_table(index='Aluno_ID', columns='Atividade_Normalizada', values='Menção Atual',
+                                   aggfunc='first', fill_value='--').reset_index()
+    if 'Tentativas_Realizadas' in df.columns:
+        pivot_tentativas = df.pivot_table(index='Aluno_ID', columns='Atividade_Normalizada',
+                                          values='Tentativas_Realizadas', aggfunc='first',
+                                          fill_value=0).reset_index()
+        pivot_tentativas.columns = ['Aluno_ID'] + [f'{col}_Tentativas' for col in pivot_tentativas.columns
+                                                   if col != 'Aluno_ID']
+
+    colunas_aluno = ['Aluno_ID', 'DR', 'Polo', 'Nome', 'Etapa', 'Sala', 'Área de conhecimento',
+                     'Data último acesso', 'Brasileiro(a)', 'Aluno AEE']
+    colunas_aluno = [col for col in colunas_aluno if col in df.columns]
+    info_alunos = df[colunas_aluno].drop_duplicates(subset=['Aluno_ID'])
+
+    resultado = info_alunos.merge(pivot_mencoes, on='Aluno_ID', how='left')
+    if 'Tentativas_Realizadas' in df.columns:
+        resultado = resultado.merge(pivot_tentativas, on='Aluno_ID', how='left')
+
+    colunas_ordenadas = [col for col in colunas_aluno if col in resultado.columns]
+    colunas_atividades = [col for col in resultado.columns if col not in colunas_ordenadas and col != 'Aluno_ID']
+    return resultado[colunas_ordenadas + colunas_atividades]
+
+
+def busca_ativa(conteudo, avaliativa):
+    df = pd.read_excel(io.BytesIO(conteudo))
+    colunas_padrao = ["DR", "Polo", "Nome"]
+    colunas_adicionais = [col for col in ["Etapa", "Sala", "Data último acesso"] if col in df.columns]
+
+    if avaliativa == "Todos":
+        colunas_atividades = [c for c in df.columns if "avaliativa" in c.lower() and "tentativas" not in c.lower()]
+        mask = df[colunas_atividades].apply(lambda x: x.astype(str).str.contains("--")).all(axis=1)
+        alunos_com_pendencia = df[mask][colunas_padrao + colunas_adicionais + colunas_atividades].copy()
+        alunos_com_pendencia["Áreas com Pendência"] = "Todas"
+        return alunos_com_pendencia
+
+    colunas_avaliativa = [col for col in df.columns
+                          if f"avaliativa {avaliativa}" in col.lower() and "tentativas" not in col.lower()]
+    mask = df[colunas_avaliativa].apply(lambda x: x.astype(str).str.contains("--")).any(axis=1)
+    alunos_com_pendencia = df[mask][colunas_padrao + colunas_adicionais + colunas_avaliativa].copy()
+
+    def identificar_areas_pendentes(row):
+        areas_pendentes = []
+        for col in colunas_avaliativa:
+            if str(row[col]).strip() == "--":
+                area = col.replace(f"Avaliativa {avaliativa}", "").strip()
+                if area.startswith(('-', '–', '—', ':')):
+                    area = area[1:].strip()
+                if area:
+                    areas_pendentes.append(area)
+        return ", ".join(areas_pendentes) if areas_pendentes else "Nenhuma"
+
+    alunos_com_pendencia["Áreas com Pendência"] = alunos_com_pendencia.apply(identificar_areas_pendentes, axis=1)
+    return alunos_com_pendencia[alunos_com_pendencia["Áreas com Pendência"] != "Nenhuma"]
+
+
+def coluna_ch(df):
+    for col in df.columns:
+        if isinstance(col, str) and 'ch' in col.lower():
+            return col
+    return df.columns[4] if df.shape[1] >= 5 else None
+
+
+def _parse_ch(val):
+    if pd.isna(val):
+        return (np.nan, np.nan)
+    s = str(val).strip()
+    m = re.search(r'(\d+(?:[.,]\d+)?)\s*/\s*(\d+(?:[.,]\d+)?)', s)
+    if m:
+        return (float(m.group(1).replace(',', '.')), float(m.group(2).replace(',', '.')))
+    parts = s.split('/')
+    if len(parts) == 2:
+        try:
+            return (float(parts[0].replace(',', '.')), float(parts[1].replace(',', '.')))
+        except ValueError:
+            return (np.nan, np.nan)
+    try:
+        return (float(s.replace(',', '.')), np.nan)
+    except ValueError:
+        return (np.nan, np.nan)
+
+
+def _classificar_situacao(percentual):
+    if percentual < 75:
+        return "Risco de Reprovação Presencial"
+    elif 75 <= percentual < 80:
+        return "Atenção necessária"
+    return "Situação Ideal"
+
+
+def risco(df, ch_col, carga_ideal, carga_ocorrida):
+    parsed = df[ch_col].apply(_parse_ch)
+    df['Horas_Realizadas'] = parsed.apply(lambda x: x[0])
+    df['Horas_Totais_Arquivo'] = parsed.apply(lambda x: x[1])
+    df['Horas_Totais_Usadas'] = df['Horas_Totais_Arquivo'].fillna(carga_ideal)
+    df.loc[df['Horas_Totais_Usadas'] <= 0, 'Horas_Totais_Usadas'] = carga_ideal
+
+    df['Horas_Restantes_Possiveis'] = df['Horas_Totais_Usadas'] - carga_ocorrida
+    df.loc[df['Horas_Restantes_Possiveis'] < 0, 'Horas_Restantes_Possiveis'] = 0
+    df['Percentual_Atual'] = (df['Horas_Realizadas'] / df['Horas_Totais_Usadas']) * 100
+    df['Max_Horas_Possiveis'] = df['Horas_Realizadas'].fillna(0) + df['Horas_Restantes_Possiveis']
+    df['Percentual_Final_Possivel'] = (df['Max_Horas_Possiveis'] / df['Horas_Totais_Usadas']) * 100
+    df['Classificacao'] = df['Percentual_Final_Possivel'].apply(_classificar_situacao)
+
+    df['Percentual_Atual'] = df['Percentual_Atual'].round(1)
+    df['Percentual_Final_Possivel'] = df['Percentual_Final_Possivel'].round(1)
+    return df
+
+
+def comparavel(df):
+    """Colunas categóricas (da compactação) de volta a objeto, para comparar só os valores."""
+    df = df.copy()
+    for col in df.columns:
+        if isinstance(df[col].dtype, pd.CategoricalDtype):
+            df[col] = df[col].astype(object)
+    return df
+
+
+def assert_mesmos_valores(atual, esperado):
+    """Compara só os valores: tipos compactos e o tipo do índice de colunas podem diferir do original."""
+    pd.testing.assert_frame_equal(comparavel(atual), esperado, check_dtype=False, check_names=False,
+                                  check_column_type=False, check_index_type=False)
@@ -0,0 +1,49 @@
+import pandas as pd
+import pytest
+
+import referencia
+from pedagogico.busca_ativa import montar_matriz_pendencias
+from pedagogico.leitura import farejar_esquema, ler_planilha
+from pedagogico.reestruturacao import colunas_leitura, reestruturar_relatorio
+
+
+@pytest.fixture(scope="module")
+def estruturado(relatorio, xlsx):
+    esquema = farejar_esquema(relatorio)
+    df = ler_planilha(relatorio, cabecalho=esquema["linha_cabecalho"], colunas=colunas_leitura(esquema["colunas"]))
+    return xlsx(reestruturar_relatorio(df.dropna(how='all')))
+
+
+@pytest.fixture(scope="module")
+def cabecalhos_variados(xlsx):
+    """Áreas com separadores diferentes, avaliativa sem área, tentativas e "--" com espaços."""
+    return xlsx(pd.DataFrame({
+        "DR": ["DR 01"] * 4,
+        "Polo": ["Polo 1"] * 4,
+        "Nome": ["Ana", "Bruno", "Carla", "Davi"],
+        "Sala": ["Sala 1", "Sala 2", "Sala 1", None],
+        "Avaliativa 1 - Matemática": ["--", "MB", "--", "B"],
+        "Avaliativa 1: Redação": ["--", " -- ", "R", "--"],
+        "Avaliativa 1 – Artes": ["--", "--", "--x", "I"],
+        "Avaliativa 1": ["--", "--", "B", "B"],
+        "Avaliativa 1 - Matemática_Tentativas": [0, 2, 0, 1],
+        "Avaliativa 2 - Matemática": ["--", "B", None, "--"],
+    }))
+
+
+@pytest.mark.parametrize("avaliativa", ["Todos", 1, 2])
+def test_pendencias_iguais_as_do_original(estruturado, avaliativa):
+    pendentes = montar_matriz_pendencias(estruturado).pendentes(avaliativa)
+    referencia.assert_mesmos_valores(pendentes, referencia.busca_ativa(estruturado, avaliativa))
+
+
+@pytest.mark.parametrize("avaliativa", ["Todos", 1, 2])
+def test_areas_com_cabecalhos_variados_como_no_original(cabecalhos_variados, avaliativa):
+    pendentes = montar_matriz_pendencias(cabecalhos_variados).pendentes(avaliativa)
+    esperado = referencia.busca_ativa(cabecalhos_variados, avaliativa)
+    referencia.assert_mesmos_valores(pendentes, esperado)
+    assert not pendentes.empty
+
+
+def test_avaliativa_sem_colunas_nao_tem_pendentes(estruturado):
+    assert montar_matriz_pendencias(estruturado).pendentes(4).empty
@@ -0,0 +1,54 @@
+import io
+
+import pandas as pd
+import pytest
+from openpyxl import Workbook
+
+import referencia
+from pedagogico.compilacao import compilar_planilhas, processar_planilha
+
+
+def _pasta(linhas):
+    wb = Workbook()
+    for linha in linhas:
+        wb.active.append(linha)
+    arquivo = io.BytesIO()
+    wb.save(arquivo)
+    return arquivo.getvalue()
+
+
+def test_compilacao_igual_a_original(planilhas):
+    compilado, resumo = compilar_planilhas(planilhas, max_workers=1)
+    esperado = referencia.compilar(planilhas)
+    referencia.assert_mesmos_valores(compilado, esperado)
+    assert resumo["linhas_duplicadas"] == 0
+
+
+def test_compilacao_em_processos_igual_a_sequencial(planilhas):
+    sequencial, _ = compilar_planilhas(planilhas, max_workers=1)
+    paralelo, _ = compilar_planilhas(planilhas, max_workers=2)
+    pd.testing.assert_frame_equal(paralelo, sequencial)
+
+
+def test_planilha_reenviada_nao_duplica_linhas(planilhas):
+    compilado, resumo = compilar_planilhas(planilhas + planilhas[:1], max_workers=1)
+    esperado = referencia.compilar(planilhas)
+    referencia.assert_mesmos_valores(compilado, esperado)
+    assert resumo["linhas_duplicadas"] == len(referencia.compilar(planilhas[:1]))
+
+
+def test_planilha_so_com_titulo_levanta_index_error():
+    conteudo = _pasta([["Relatório de Acompanhamento - Polo 000"]])
+    with pytest.raises(IndexError):
+        referencia.compilar([conteudo])
+    with pytest.raises(IndexError):
+        processar_planilha(conteudo)
+    with pytest.raises(IndexError):
+        compilar_planilhas([conteudo], max_workers=1)
+
+
+def test_planilha_so_com_cabecalho_fica_vazia():
+    conteudo = _pasta([["Relatório"], ["DR", "Polo", "Nome"]])
+    df = processar_planilha(conteudo)
+    assert list(df.columns) == ["DR", "Polo", "Nome"]
+    assert df.empty
@@ -0,0 +1,63 @@
+import gzip
+import io
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import referencia
+from benchmarks.suite import TEXTOS_IDA_E_VOLTA, ida_e_volta
+from pedagogico.compilacao import processar_planilha
+from pedagogico.exportacao import escrever_xlsx, exportar
+from pedagogico.leitura import ler_planilha
+
+
+@pytest.fixture(scope="module")
+def amostra(compilado):
+    """Textos com caracteres de controle e ``_xHHHH_`` literal, números, vazios e datas."""
+    df = compilado.head(40).reset_index(drop=True)
+    df["Texto"] = np.resize(np.array(TEXTOS_IDA_E_VOLTA + ["nulo \x00 fim", "_x", "_x00e9_"], dtype=object), len(df))
+    df["Inteiro"] = np.arange(len(df))
+    df["Real"] = np.where(np.arange(len(df)) % 3 == 0, np.nan, np.arange(len(df)) / 4)
+    return df
+
+
+def _ler(arquivo):
+    with arquivo:
+        return arquivo.read()
+
+
+def test_xlsx_volta_igual(amostra):
+    relido = ler_planilha(_ler(exportar(amostra)))
+    referencia.assert_mesmos_valores(relido, amostra)
+
+
+def test_xlsx_com_titulo_volta_igual_pela_compilacao(amostra):
+    arquivo = io.BytesIO()
+    escrever_xlsx(amostra, arquivo, titulo="Relatório de Acompanhamento")
+    referencia.assert_mesmos_valores(processar_planilha(arquivo.getvalue()), amostra)
+
+
+def test_relatorio_estruturado_volta_igual(relatorio):
+    estruturado = ler_planilha(relatorio)
+    referencia.assert_mesmos_valores(ler_planilha(_ler(exportar(estruturado))), referencia.comparavel(estruturado))
+
+
+@pytest.mark.parametrize("formato", ["csv", "csv.gz"])
+def test_csv_volta_igual(amostra, formato):
+    conteudo = _ler(exportar(amostra, formato=formato))
+    if formato == "csv.gz":
+        conteudo = gzip.decompress(conteudo)
+    # O leitor C do read_csv corta o texto no caractere nulo; o de Python lê a célula inteira
+    relido = pd.read_csv(io.BytesIO(conteudo), sep=";", decimal=",", engine="python",
+                         parse_dates=["Data último acesso"])
+    referencia.assert_mesmos_valores(relido, amostra)
+
+
+def test_colunas_exportadas_na_ordem_pedida(amostra):
+    colunas = ["Nome", "Texto", "DR"]
+    assert list(ler_planilha(_ler(exportar(amostra, colunas=colunas))).columns) == colunas
+
+
+def test_ida_e_volta_do_benchmark(compilado):
+    assert ida_e_volta(compilado)
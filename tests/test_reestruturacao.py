@@ -0,0 +1,22 @@
+import referencia
+from pedagogico.leitura import farejar_esquema, ler_planilha
+from pedagogico.reestruturacao import colunas_leitura, reestruturar_relatorio
+
+
+def _reestruturar(conteudo):
+    # Mesmos passos da página "Reestruturar Relatório"
+    esquema = farejar_esquema(conteudo)
+    df = ler_planilha(conteudo, cabecalho=esquema["linha_cabecalho"], colunas=colunas_leitura(esquema["colunas"]))
+    return reestruturar_relatorio(df.dropna(how='all'))
+
+
+def test_reestruturacao_igual_a_original(compilado, xlsx):
+    conteudo = xlsx(compilado)
+    referencia.assert_mesmos_valores(_reestruturar(conteudo), referencia.reestruturar(conteudo))
+
+
+def test_grafias_mencoes_vazias_e_repeticoes_como_no_original(relatorio):
+    estruturado = _reestruturar(relatorio)
+    referencia.assert_mesmos_valores(estruturado, referencia.reestruturar(relatorio))
+    assert "avaliativa 1 - matematica" in estruturado.columns
+    assert "avaliativa 1 - matematica_Tentativas" in estruturado.columns
@@ -0,0 +1,55 @@
+import io
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import referencia
+from pedagogico.leitura import farejar_esquema, ler_planilha
+from pedagogico.risco import CLASSES, calcular_risco, projetar_risco
+
+# Formatos que o caminho vetorizado trata e os que caem na regra original, linha a linha
+CH_VARIADOS = ["28/84", "36 / 76", "28,5/80", "28", 28, 61.5, None, "", "abc", "0/0", "12 / 0", "90/80",
+               " 40/80 ", "40/80 h", "40/80/90", "x/80", "1.5", ",5/80", "3,5", "75/100", "60/80"]
+
+
+@pytest.fixture(scope="module")
+def planilha_ch(compilado, xlsx):
+    """Uma linha por aluno, com a CH do gerador e a dos formatos variados."""
+    alunos = compilado.drop_duplicates("Nome")[["DR", "Polo", "Nome", "Etapa", "Sala", "CH"]]
+    alunos = alunos.reset_index(drop=True).astype(object)
+    alunos.loc[:len(CH_VARIADOS) - 1, "CH"] = pd.Series(CH_VARIADOS, dtype=object)
+    return xlsx(alunos)
+
+
+@pytest.mark.parametrize("carga_ideal,carga_ocorrida", [(80, 36), (80, 0), (76, 90)])
+def test_risco_igual_ao_original(planilha_ch, carga_ideal, carga_ocorrida):
+    esquema = farejar_esquema(planilha_ch)
+    assert esquema["coluna_ch"] == "CH"
+    df = ler_planilha(planilha_ch, cabecalho=esquema["linha_cabecalho"] or 0)
+    esperado = pd.read_excel(io.BytesIO(planilha_ch))
+    assert referencia.coluna_ch(esperado) == "CH"
+    referencia.assert_mesmos_valores(calcular_risco(df, "CH", carga_ideal, carga_ocorrida),
+                                     referencia.risco(esperado, "CH", carga_ideal, carga_ocorrida))
+
+
+def test_projecao_de_um_mes_igual_ao_risco(planilha_ch):
+    df = ler_planilha(planilha_ch)
+    projecao = projetar_risco(df, "CH", {"Junho": 36}, 80)
+    risco = calcular_risco(df.copy(), "CH", 80, 36)
+    np.testing.assert_array_equal(projecao.por_aluno()["Percentual_Final_Junho"],
+                                  risco["Percentual_Final_Possivel"])
+    assert list(projecao.classificacao("Junho")) == list(risco["Classificacao"])
+
+
+def test_projecao_conta_cada_estudante_uma_vez_por_mes(planilha_ch):
+    df = ler_planilha(planilha_ch)
+    por_polo = projetar_risco(df, "CH", {"Junho": 36, "Julho": 44, "Agosto": 52}, 80).por_polo()
+    assert (por_polo.groupby("Mes", observed=True)[CLASSES].sum().sum(axis=1) == len(df)).all()
+    assert por_polo["Novos_Irrecuperaveis"].sum() <= len(df)
+
+
+def test_cronograma_vazio_levanta_value_error(planilha_ch):
+    df = ler_planilha(planilha_ch)
+    with pytest.raises(ValueError, match="cronograma vazio"):
+        projetar_risco(df, "CH", {}, 80)